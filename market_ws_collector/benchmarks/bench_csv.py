@@ -0,0 +1,75 @@
+# benchmarks/bench_csv.py
+# 用法（在 market_ws_collector 目录下）：python -m benchmarks.bench_csv [--count 100000]
+# 与 main.process_snapshot 相同：每个 tick 两条 WriteTask（按交易所 / 按 symbol），写到临时目录
+
+import argparse
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+
+from utils.csv_utils import CSVManager, ThreadedCSVManager, WriteTask, batch_writer_worker, writer_worker
+
+EXCHANGES = ["binance", "okx", "bybit", "gateio", "bitget"]
+
+
+def _tasks(count: int, symbols: int):
+    tasks = []
+    for i in range(count):
+        exchange = EXCHANGES[i % len(EXCHANGES)]
+        symbol = f"SYM{i % symbols}-USDT"
+        ts = f"2024-01-01T00:00:{i % 60:02d}.{i % 1000:03d}000"
+        bid, ask = 100.0 + i % 7, 100.1 + i % 7
+        tasks.append(WriteTask("exchange", exchange, [ts, symbol, bid, ask, 1.5, 2.5]))
+        tasks.append(WriteTask("symbol", symbol, [ts, exchange, bid, ask, 1.5, 2.5]))
+    return tasks
+
+
+async def _drain(worker, csv_manager, tasks: list) -> float:
+    # 队列预先填满，计时到 worker 取完并关闭文件（含最后一次 flush）
+    write_queue = asyncio.Queue()
+    for task in tasks:
+        write_queue.put_nowait(task)
+    start = time.perf_counter()
+    runner = asyncio.create_task(worker(write_queue, csv_manager, flush_interval=3600))
+    await write_queue.join()
+    runner.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await runner
+    await asyncio.get_running_loop().run_in_executor(None, csv_manager.close_all)
+    elapsed = time.perf_counter() - start
+    # 丢弃的行不能计入吞吐
+    dropped = getattr(csv_manager, "dropped", 0)
+    if dropped:
+        raise RuntimeError(f"{type(csv_manager).__name__} 丢弃了 {dropped} 条写入命令，吞吐结果无效")
+    return elapsed
+
+
+def run(count: int = 100_000, symbols: int = 100):
+    tasks = _tasks(count, symbols)
+    cases = {
+        "writer_worker": (writer_worker, CSVManager),
+        "batch_writer_worker": (batch_writer_worker, CSVManager),
+        "batch_writer_worker(thread)": (batch_writer_worker, ThreadedCSVManager),
+    }
+    results = {}
+    print(f"📊 CSV 写盘（{len(tasks)} 行，{len(EXCHANGES)} 个交易所文件 + {symbols} 个 symbol 文件）")
+    for name, (worker, manager_cls) in cases.items():
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            elapsed = asyncio.run(_drain(worker, manager_cls(tmp), tasks))
+        results[f"{name}_rows_per_sec"] = len(tasks) / elapsed
+        print(f"   {name:<28} {len(tasks) / elapsed:12,.0f} 行/s  {elapsed / len(tasks) * 1e6:6.2f} µs/行")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV 写盘吞吐基准")
+    parser.add_argument("--count", type=int, default=100_000, help="tick 数（每个 tick 写两行）")
+    parser.add_argument("--symbols", type=int, default=100)
+    args = parser.parse_args()
+    run(args.count, args.symbols)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_decode.py
+# 用法（在 market_ws_collector 目录下）：python -m benchmarks.bench_decode [--count 5000] [--exchange bitget ...]
+
+import argparse
+import gzip
+import json
+import time
+import zlib
+
+from benchmarks.frames import COMPRESSION, exchanges, load_frames
+from connectors.codec import FrameDecompressor, available_backends, make_decoder, msgspec
+
+
+def _baseline(raw: bytes, compression):
+    # 旧实现：gzip / zlib 模块解压 → bytes.decode → json.loads
+    if compression == "gzip":
+        raw = gzip.decompress(raw)
+    elif compression == "zlib":
+        raw = zlib.decompress(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def _bitget_types():
+    # 强类型解码示例：只声明用到的字段，其余字段由 msgspec 跳过
+    class Arg(msgspec.Struct):
+        instId: str
+
+    class Book(msgspec.Struct):
+        bids: list
+        asks: list
+
+    class BooksMessage(msgspec.Struct):
+        arg: Arg
+        data: list[Book]
+
+    return BooksMessage
+
+
+def _time_it(fn, frames, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for raw in frames:
+            fn(raw)
+        best = min(best, time.perf_counter() - start)
+    return best / len(frames) * 1e6   # 每帧微秒
+
+
+def run(count: int = 5000, repeat: int = 3, names=None):
+    results = {}
+    for exchange in names or exchanges():
+        compression = COMPRESSION.get(exchange)
+        frames = load_frames(exchange, count)
+        decompress = FrameDecompressor(compression).decompress
+        cases = {"baseline(json+str)": lambda raw: _baseline(raw, compression)}
+        for backend in available_backends():
+            decode = make_decoder(backend)
+            cases[backend] = lambda raw, decode=decode: decode(decompress(raw))
+        if exchange == "bitget" and msgspec is not None:
+            typed = make_decoder(message_type=_bitget_types())
+            cases["msgspec(typed)"] = lambda raw: typed(decompress(raw))
+
+        base_us = None
+        print(f"📊 {exchange}（{compression or '无压缩'}，{len(frames)} 帧）")
+        for name, fn in cases.items():
+            us = _time_it(fn, frames, repeat)
+            base_us = base_us or us
+            results[(exchange, name)] = us
+            print(f"   {name:<20} {us:8.2f} µs/帧  {base_us / us:5.2f}x")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 解码后端基准测试")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--exchange", nargs="*")
+    args = parser.parse_args()
+    run(args.count, args.repeat, args.exchange)
+
+
+if __name__ == "__main__":
+    main()
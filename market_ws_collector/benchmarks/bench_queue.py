@@ -0,0 +1,70 @@
+# benchmarks/bench_queue.py
+# 用法（在 market_ws_collector 目录下）：python -m benchmarks.bench_queue [--count 200000] [--symbols 200]
+
+import argparse
+import asyncio
+import time
+
+from dispatcher.queues import POLICIES, BoundedSnapshotQueue
+from models.base import MarketSnapshot
+
+
+def _snapshots(count: int, symbols: int):
+    ts = 1_700_000_000_000
+    return [MarketSnapshot("okx", f"SYM{i % symbols}-USDT", 100.0 + i % 7, 100.1 + i % 7, ts + i,
+                           bid_vol1=1.5, ask_vol1=2.5, raw_symbol=f"SYM{i % symbols}-USDT")
+            for i in range(count)]
+
+
+async def _roundtrip(queue: BoundedSnapshotQueue, items: list, frame_size: int):
+    # 生产者逐条 put，每 frame_size 条让出一次事件循环（相当于连接器等下一帧），消费者同时 get + task_done
+    # 返回 (耗时, 消费条数)
+    consumed = 0
+
+    async def consume():
+        nonlocal consumed
+        while True:
+            await queue.get()
+            queue.task_done()
+            consumed += 1
+
+    consumer = asyncio.create_task(consume())
+    start = time.perf_counter()
+    for i, item in enumerate(items, 1):
+        await queue.put(item)
+        if i % frame_size == 0:
+            await asyncio.sleep(0)
+    while not queue.empty():
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    consumer.cancel()
+    return elapsed, consumed
+
+
+def run(count: int = 200_000, symbols: int = 200, maxsize: int = 10_000, frame_size: int = 20):
+    items = _snapshots(count, symbols)
+    results = {}
+    print(f"📊 BoundedSnapshotQueue 入队 + 消费（{count} 条，{symbols} 个 symbol，maxsize {maxsize}，"
+          f"每帧 {frame_size} 条）")
+    for policy in POLICIES:
+        queue = BoundedSnapshotQueue(maxsize=maxsize, policy=policy)
+        elapsed, consumed = asyncio.run(_roundtrip(queue, items, frame_size))
+        results[f"{policy}_per_sec"] = count / elapsed
+        results[f"{policy}_consumed"] = consumed
+        print(f"   {policy:<12} {count / elapsed:12,.0f} 条/s  {elapsed / count * 1e6:6.2f} µs/条  "
+              f"消费 {consumed}（丢弃 {sum(queue.dropped.values())} 合并 {sum(queue.conflated.values())}）")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="行情队列吞吐基准")
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--maxsize", type=int, default=10_000)
+    parser.add_argument("--frame-size", type=int, default=20)
+    args = parser.parse_args()
+    run(args.count, args.symbols, args.maxsize, args.frame_size)
+
+
+if __name__ == "__main__":
+    main()
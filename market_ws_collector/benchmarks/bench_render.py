@@ -0,0 +1,46 @@
+# benchmarks/bench_render.py
+# 用法（在 market_ws_collector 目录下）：python -m benchmarks.bench_render [--minutes 1 60] [--repeat 3]
+# 单张图的渲染耗时（与 RenderPool 子进程里相同的 render_arbitrage_chart，Agg 后端）
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from benchmarks.bench_spread import synthetic_series  # noqa: E402
+from utils.plot_arbitrage import render_arbitrage_chart  # noqa: E402
+
+
+def run(minutes=(1, 60), rate: float = 10, repeat: int = 3):
+    results = {}
+    print(f"📊 绘图（每个交易所 {rate:g} 笔/秒）")
+    with tempfile.TemporaryDirectory() as tmp:
+        for window in minutes:
+            windows = synthetic_series(window, rate)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    render_arbitrage_chart("BTC-USDT", windows, tmp, window)
+                best = min(best, time.perf_counter() - start)
+            results[f"chart_{window:g}min_ms"] = best * 1000
+            print(f"   {window:g} 分钟窗口 {len(windows)} 个交易所   {best * 1000:8.1f} ms/张")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="绘图耗时基准")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 60], help="窗口长度（分钟）")
+    parser.add_argument("--rate", type=float, default=10, help="每个交易所每秒 tick 数")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.minutes, args.rate, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# benchmarks/bench_replay.py
+# 用法（在 market_ws_collector 目录下）：python -m benchmarks.bench_replay [--count 5000] [--exchange bitget ...]
+#   [--capture capture/*.cap]  指定真实录制文件；不指定时用 benchmarks/frames.py 的样本生成临时录制文件
+
+import argparse
+import asyncio
+import os
+import tempfile
+
+from benchmarks.frames import exchanges, write_capture
+from utils.replay import format_result, replay_file
+
+
+async def run(count: int = 5000, repeat: int = 3, names=None, captures=None) -> dict:
+    # 每个交易所 handle_message 全链路（解压 → 解码 → 解析 → emit）的吞吐，取 repeat 次中最快的一次
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = captures or [write_capture(name, os.path.join(tmp, f"{name}.cap"), count)
+                             for name in names or exchanges()]
+        for path in paths:
+            best = None
+            for _ in range(repeat):
+                result = await replay_file(path, speed=0)
+                if best is None or result.seconds < best.seconds:
+                    best = result
+            print(format_result(best))
+            results[best.exchange] = best.as_dict()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="连接器解析吞吐基准（录制帧回放）")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--exchange", nargs="*")
+    parser.add_argument("--capture", nargs="*", help="录制文件（.cap）")
+    args = parser.parse_args()
+    asyncio.run(run(args.count, args.repeat, args.exchange, args.capture))
+
+
+if __name__ == "__main__":
+    main()
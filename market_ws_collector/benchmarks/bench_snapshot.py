@@ -0,0 +1,111 @@
+# benchmarks/bench_snapshot.py
+# 用法（在 market_ws_collector 目录下）：python -m benchmarks.bench_snapshot [--count 100000]
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from datetime import datetime
+
+from models.base import MarketSnapshot, MarketSnapshotBatch
+
+
+class LegacySnapshot:
+    # 旧版 MarketSnapshot：带 __dict__，构造时即格式化两个时间字符串
+    def __init__(self, exchange, symbol, bid1, ask1, timestamp, bid_vol1=None, ask_vol1=None,
+                 total_volume=None, raw_symbol=None):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.raw_symbol = raw_symbol
+        self.bid1 = bid1
+        self.ask1 = ask1
+        self.bid_vol1 = bid_vol1
+        self.ask_vol1 = ask_vol1
+        self.total_volume = total_volume
+        self.timestamp = timestamp
+        self.timestamp_iso = datetime.fromtimestamp(timestamp / 1000).isoformat(timespec="milliseconds") + "Z"
+        self.timestamp_hms = datetime.fromtimestamp(timestamp / 1000).strftime("%H:%M:%S")
+
+
+def _rows(count):
+    ts = 1_700_000_000_000
+    return [(f"SYM{i % 100}USDT", 100.0 + i % 7, 100.1 + i % 7, ts + i, 1.5, 2.5) for i in range(count)]
+
+
+def _construct(cls, rows):
+    start = time.perf_counter()
+    objs = [cls("bitmex", sym, bid, ask, ts, bid_vol1=bv, ask_vol1=av, raw_symbol=sym)
+            for sym, bid, ask, ts, bv, av in rows]
+    return objs, time.perf_counter() - start
+
+
+def _memory(cls, rows):
+    tracemalloc.start()
+    objs, _ = _construct(cls, rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objs
+    return current / len(rows)
+
+
+async def _queue_roundtrip(rows, frame_size):
+    # 每帧 frame_size 个 symbol：逐条入队 vs 整帧打包入队，消费端展开
+    single, batched = asyncio.Queue(), asyncio.Queue()
+
+    start = time.perf_counter()
+    for sym, bid, ask, ts, bv, av in rows:
+        await single.put(MarketSnapshot("bitmex", sym, bid, ask, ts, bid_vol1=bv, ask_vol1=av, raw_symbol=sym))
+    while not single.empty():
+        single.get_nowait()
+    single_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(0, len(rows), frame_size):
+        batch = MarketSnapshotBatch("bitmex")
+        for sym, bid, ask, ts, bv, av in rows[i:i + frame_size]:
+            batch.append(sym, bid, ask, ts, bid_vol1=bv, ask_vol1=av, raw_symbol=sym)
+        await batched.put(batch)
+    while not batched.empty():
+        for _ in batched.get_nowait():
+            pass
+    batched_sec = time.perf_counter() - start
+    return single_sec, batched_sec
+
+
+def run(count: int = 100_000, frame_size: int = 20):
+    rows = _rows(count)
+    _construct(MarketSnapshot, rows[:1000])   # 预热
+
+    _, legacy_sec = _construct(LegacySnapshot, rows)
+    _, slotted_sec = _construct(MarketSnapshot, rows)
+    legacy_mem = _memory(LegacySnapshot, rows)
+    slotted_mem = _memory(MarketSnapshot, rows)
+    single_sec, batched_sec = asyncio.run(_queue_roundtrip(rows, frame_size))
+
+    print(f"📊 MarketSnapshot 构造（{count} 条）")
+    print(f"   旧版（__dict__ + 立即格式化）  {legacy_sec / count * 1e6:6.2f} µs/条  {legacy_mem:6.0f} B/条")
+    print(f"   __slots__ + 惰性格式化        {slotted_sec / count * 1e6:6.2f} µs/条  {slotted_mem:6.0f} B/条"
+          f"  （{legacy_sec / slotted_sec:.1f}x 更快，内存 {slotted_mem / legacy_mem:.0%}）")
+    print(f"📊 入队 + 消费（每帧 {frame_size} 个 symbol）")
+    print(f"   逐条入队                      {single_sec / count * 1e6:6.2f} µs/条")
+    print(f"   MarketSnapshotBatch           {batched_sec / count * 1e6:6.2f} µs/条")
+    return {
+        "legacy_us": legacy_sec / count * 1e6,
+        "slotted_us": slotted_sec / count * 1e6,
+        "legacy_bytes": legacy_mem,
+        "slotted_bytes": slotted_mem,
+        "queue_single_us": single_sec / count * 1e6,
+        "queue_batch_us": batched_sec / count * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MarketSnapshot 构造 / 内存基准测试")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--frame-size", type=int, default=20)
+    args = parser.parse_args()
+    run(args.count, args.frame_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_spread.py
+# 用法（在 market_ws_collector 目录下）：python -m benchmarks.bench_spread [--minutes 60] [--rate 10]
+
+import argparse
+import time
+
+import numpy as np
+
+from utils.spread_engine import compute_spread, compute_symbol_spread
+from utils.tick_store import TickStore
+
+EXCHANGES = ["binance", "okx", "bybit", "gateio", "bitget", "huobi"]
+
+
+def synthetic_series(minutes: float, rate: float, exchanges=EXCHANGES, end_ms: int = 1_700_000_000_000,
+                     seed: int = 42) -> dict:
+    # {exchange: {'times', 'bid', 'ask'}}：每个交易所约 rate 笔/秒，时间间隔随机，价格随机游走
+    rng = np.random.default_rng(seed)
+    span_ms = int(minutes * 60_000)
+    series = {}
+    for exchange in exchanges:
+        n = max(int(minutes * 60 * rate), 1)
+        times = np.sort(rng.integers(end_ms - span_ms, end_ms, n)).astype(np.int64)
+        mid = 60000 * np.exp(np.cumsum(rng.normal(0, 2e-5, n)))
+        half = mid * rng.uniform(1e-5, 1e-4, n)
+        series[exchange] = {"times": times, "bid": mid - half, "ask": mid + half}
+    return series
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(minutes: float = 60, rate: float = 10, repeat: int = 5):
+    series = synthetic_series(minutes, rate)
+    ticks = sum(len(s["times"]) for s in series.values())
+    store = TickStore()
+    for exchange, s in series.items():
+        for t, b, a in zip(s["times"].tolist(), s["bid"].tolist(), s["ask"].tolist()):
+            store.append("BTC-USDT", exchange, t, b, a)
+    end_ms = max(int(s["times"][-1]) for s in series.values())
+    start_ms = end_ms - int(minutes * 60_000)
+
+    aligned = _best_of(lambda: compute_spread(series, grid_ms=1000), repeat)
+    from_store = _best_of(lambda: compute_symbol_spread(store.symbol_data("BTC-USDT"), start_ms, end_ms), repeat)
+    print(f"📊 价差计算（{minutes:g} 分钟窗口，{len(series)} 个交易所，{ticks} 笔，1 秒网格）")
+    print(f"   compute_spread（已切好窗口）   {aligned * 1000:8.2f} ms")
+    print(f"   compute_symbol_spread（含切片）{from_store * 1000:8.2f} ms")
+    return {
+        "compute_spread_ms": aligned * 1000,
+        "compute_symbol_spread_ms": from_store * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="价差计算基准")
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--rate", type=float, default=10, help="每个交易所每秒 tick 数")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.minutes, args.rate, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# benchmarks/frames.py
+
+import gzip
+import importlib
+import json
+import os
+import random
+import zlib
+
+
+# 录制帧目录：frames/<exchange>.jsonl，每行一帧 JSON；不存在时按各交易所推送格式生成样本
+# （下面手写了几个常用交易所的样本，其余交易所用 benchmarks/mock_exchange.py 的推送格式）
+FRAMES_DIR = os.path.join(os.path.dirname(__file__), "frames")
+SAMPLE_SYMBOL = "BTC-USDT"
+
+# 与连接器保持一致的压缩方式
+COMPRESSION = {
+    "bitget": "zlib",
+    "bingx": "gzip",
+    "huobi": "gzip",
+    "bitrue": "gzip",
+    "digifinex": "zlib",
+}
+
+
+def _levels(price, n, step, rng):
+    return [[f"{price + i * step:.2f}", f"{rng.uniform(0.01, 5):.4f}"] for i in range(n)]
+
+
+def _bitget(rng, ts):
+    mid = 60000 + rng.uniform(-50, 50)
+    return {
+        "action": "snapshot",
+        "arg": {"instType": "SPOT", "channel": "books5", "instId": "BTCUSDT"},
+        "data": [{
+            "asks": _levels(mid + 0.5, 5, 0.1, rng),
+            "bids": _levels(mid - 0.5, 5, -0.1, rng),
+            "checksum": 0, "seq": ts, "ts": str(ts),
+        }],
+        "ts": ts,
+    }
+
+
+def _bingx(rng, ts):
+    mid = 60000 + rng.uniform(-50, 50)
+    return {
+        "code": 0,
+        "dataType": "BTC-USDT@depth20",
+        "data": {
+            "bids": _levels(mid - 0.5, 20, -0.1, rng),
+            "asks": _levels(mid + 2.4, 20, -0.1, rng),   # BingX 卖盘降序，卖一在末尾
+        },
+        "ts": ts,
+    }
+
+
+def _binance(rng, ts):
+    price = 60000 + rng.uniform(-50, 50)
+    return {
+        "stream": "btcusdt@ticker",
+        "data": {"e": "24hrTicker", "E": ts, "s": "BTCUSDT", "c": f"{price:.2f}",
+                 "b": f"{price - 0.01:.2f}", "B": "1.2", "a": f"{price + 0.01:.2f}", "A": "0.8",
+                 "v": "12345.6", "q": "740000000.0"},
+    }
+
+
+def _okx(rng, ts):
+    price = 60000 + rng.uniform(-50, 50)
+    return {
+        "arg": {"channel": "tickers", "instId": "BTC-USDT"},
+        "data": [{"instType": "SPOT", "instId": "BTC-USDT", "last": f"{price:.1f}",
+                  "bidPx": f"{price - 0.1:.1f}", "bidSz": "0.52", "askPx": f"{price + 0.1:.1f}",
+                  "askSz": "1.3", "vol24h": "8123.4", "ts": str(ts)}],
+    }
+
+
+def _huobi(rng, ts):
+    price = 60000 + rng.uniform(-50, 50)
+    return {
+        "ch": "market.btcusdt.ticker",
+        "ts": ts,
+        "tick": {"bid": price - 0.01, "bidSize": 0.4, "ask": price + 0.01, "askSize": 0.7,
+                 "lastPrice": price, "vol": 4.2e8, "ts": ts},
+    }
+
+
+def _bybit(rng, ts):
+    price = 60000 + rng.uniform(-50, 50)
+    return {
+        "topic": "tickers.BTCUSDT", "type": "snapshot", "ts": ts,
+        "data": {"symbol": "BTCUSDT", "bid1Price": f"{price - 0.1:.1f}", "bid1Size": "3.1",
+                 "ask1Price": f"{price + 0.1:.1f}", "ask1Size": "2.2", "turnover24h": "1.2e9"},
+    }
+
+
+def _gateio(rng, ts):
+    price = 60000 + rng.uniform(-50, 50)
+    return {
+        "time": ts // 1000, "time_ms": ts, "channel": "futures.book_ticker", "event": "update",
+        "result": {"t": ts, "u": ts, "s": "BTC_USDT", "b": f"{price - 0.1:.1f}", "B": 120,
+                   "a": f"{price + 0.1:.1f}", "A": 80},
+    }
+
+
+GENERATORS = {
+    "bitget": _bitget,
+    "bingx": _bingx,
+    "binance": _binance,
+    "okx": _okx,
+    "huobi": _huobi,
+    "bybit": _bybit,
+    "gateio": _gateio,
+}
+
+
+def compress(payload: bytes, compression):
+    if compression == "gzip":
+        return gzip.compress(payload)
+    if compression == "zlib":
+        return zlib.compress(payload)
+    return payload
+
+
+def load_frames(exchange: str, count: int = 1000, seed: int = 42) -> list:
+    # 返回 websocket 上收到的原始帧（bytes，按交易所压缩）
+    path = os.path.join(FRAMES_DIR, f"{exchange}.jsonl")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            payloads = [line.rstrip(b"\n") for line in f if line.strip()]
+        payloads = (payloads * (count // max(len(payloads), 1) + 1))[:count]
+    elif exchange in GENERATORS:
+        rng = random.Random(seed)
+        ts = 1_700_000_000_000
+        payloads = [json.dumps(GENERATORS[exchange](rng, ts + i * 100)).encode() for i in range(count)]
+    else:
+        from benchmarks.mock_exchange import sample_payloads   # 依赖 websockets，只在需要时导入
+        payloads = [json.dumps(p).encode() for p in sample_payloads(exchange, _sample_symbol(exchange), count, seed)]
+    return [compress(p, COMPRESSION.get(exchange)) for p in payloads]
+
+
+def _sample_symbol(exchange: str) -> str:
+    # SAMPLE_SYMBOL 在该交易所的写法，与回放时连接器的 symbol_map 一致
+    conn = importlib.import_module(f"connectors.{exchange}").Connector(exchange=exchange, symbols=[SAMPLE_SYMBOL])
+    return conn.format_symbol(SAMPLE_SYMBOL)
+
+
+def exchanges() -> list:
+    recorded = [name[:-6] for name in os.listdir(FRAMES_DIR) if name.endswith(".jsonl")] if os.path.isdir(FRAMES_DIR) else []
+    try:
+        from benchmarks.mock_exchange import DIALECTS
+    except ImportError:     # 没装 websockets 时只用手写样本和录制样本
+        DIALECTS = {}
+    return sorted(set(GENERATORS) | set(DIALECTS) | set(recorded))
+
+
+def write_capture(exchange: str, path: str, count: int = 1000, interval_ms: int = 100, seed: int = 42) -> str:
+    # 把样本帧写成录制文件（connectors/capture.py 格式），没有真实录制时给回放 / 基准使用
+    from connectors.capture import FrameWriter
+
+    compression = COMPRESSION.get(exchange)
+    writer = FrameWriter(path, {"exchange": exchange, "label": exchange, "compression": compression,
+                                "stream_compression": False, "symbols": [SAMPLE_SYMBOL]})
+    start_ns = 0
+    writer.write_session(start_ns, {"label": exchange})
+    for i, raw in enumerate(load_frames(exchange, count, seed)):
+        # 未压缩的帧在 websocket 上是文本帧
+        writer.write(start_ns + i * interval_ms * 1_000_000, raw if compression else raw.decode("utf-8"))
+    writer.close()
+    return path
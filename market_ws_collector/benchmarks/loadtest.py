@@ -0,0 +1,245 @@
+# benchmarks/loadtest.py
+#
+# 整条链路的离线压测：每个速率档启动一个 benchmarks/mock_exchange.py 子进程和一个采集器子进程
+# （main.main，连接器经 MOCK_EXCHANGE_URL 连到模拟服务），预热后统计一段时间内：
+#   offered   模拟服务实际发出的 ticks/s（模拟服务可开多个进程共用一个端口，避免它先成为瓶颈）
+#   consumed  main.consume_snapshots 处理完的 ticks/s
+#   队列深度是否持续增长，以及 接收→输出 / 排队 延迟分位数
+# 消费跟得上发送（≥95%）且队列不增长的速率档视为可持续，报告其中最大的 ticks/s
+#
+# 用法（在 market_ws_collector 目录下）：
+#   python -m benchmarks.loadtest --rates 5 10 20 50 100 --symbols 20 --duration 20
+#   [--exchange okx bybit gateio ...] [--server-procs 4] [--verbose]
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import time
+
+from benchmarks.mock_exchange import serve_forever
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_EXCHANGES = ["binance", "okx", "bybit", "gateio", "huobi", "bitget", "bingx"]
+SUSTAINED_RATIO = 0.95
+
+
+class LoadTestDone(Exception):
+    pass
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _merge_stage(recorder, stage: str):
+    # 所有交易所该阶段的直方图（本周期 + 累计）合并成一个
+    from utils.latency import LatencyHistogram
+    merged = LatencyHistogram()
+    for table in (recorder.window, recorder.cumulative):
+        for hists in table.values():
+            merged.merge(hists[stage])
+    return merged
+
+
+def _growing(samples: list, target: float) -> bool:
+    # 后 1/4 时间的平均深度比前 1/4 高出 max(100, 0.1 秒的目标量) 视为在增长
+    if len(samples) < 4:
+        return False
+    n = len(samples) // 4
+    head = sum(depth for _, depth in samples[:n]) / n
+    tail = sum(depth for _, depth in samples[-n:]) / n
+    return tail - head > max(100.0, 0.1 * target)
+
+
+class _Sampler:
+    # 作为 main.main 的 monitor 协程运行：预热后采样，结果先放进 results 再抛 LoadTestDone 结束 main
+    # （高负载下 asyncio.run 收尾取消任务可能很慢，父进程拿到结果后直接结束子进程）
+    def __init__(self, collector, ticks: list, results, rate: float, target: float, warmup: float, duration: float,
+                 interval: float = 0.25):
+        self.collector = collector
+        self.ticks = ticks
+        self.results = results
+        self.rate = rate
+        self.target = target
+        self.warmup = warmup
+        self.duration = duration
+        self.interval = interval
+
+    async def monitor(self, manager, snapshot_queue, write_queue):
+        await asyncio.sleep(self.warmup)
+        recorder = self.collector.latency_recorder
+        if recorder:
+            recorder.window.clear()
+            recorder.cumulative.clear()
+        consumed0 = self.collector.arbitrage_monitor.ticks
+        offered0 = self._offered()
+        start = time.monotonic()
+        queue_samples, write_samples = [], []
+        while time.monotonic() - start < self.duration:
+            await asyncio.sleep(self.interval)
+            elapsed = time.monotonic() - start
+            queue_samples.append((elapsed, snapshot_queue.qsize()))
+            write_samples.append((elapsed, write_queue.qsize()))
+        seconds = time.monotonic() - start
+        offered = (self._offered() - offered0) / seconds
+        consumed = (self.collector.arbitrage_monitor.ticks - consumed0) / seconds
+
+        growing = _growing(queue_samples, self.target) or _growing(write_samples, 2 * self.target)
+        latency = {}
+        if recorder:
+            for stage in ("total", "queue", "parse"):
+                summary = _merge_stage(recorder, stage).summary()
+                latency[stage] = {k: summary[k] for k in ("count", "p50", "p90", "p99", "p999", "max")}
+        self.results.put({
+            "rate": self.rate,
+            "target": round(self.target, 1),
+            "offered": round(offered, 1),
+            "consumed": round(consumed, 1),
+            "queue_max": max((d for _, d in queue_samples), default=0),
+            "queue_last": queue_samples[-1][1] if queue_samples else 0,
+            "write_queue_max": max((d for _, d in write_samples), default=0),
+            "growing": growing,
+            "server_bound": offered < SUSTAINED_RATIO * self.target,
+            "sustained": consumed >= SUSTAINED_RATIO * offered and not growing and offered > 0,
+            "latency_us": latency,
+            "connections": len(manager.connection_stats()),
+        })
+        raise LoadTestDone()
+
+    def _offered(self) -> int:
+        return sum(v.value for v in self.ticks)
+
+
+def _worker(url: str, workdir: str, rate: float, exchanges: list, symbols: int, warmup: float, duration: float,
+            ticks, results, verbose: bool):
+    # 采集器子进程：先设置环境变量、切到临时目录（main 在 import 时清空 snapshots），再导入 main
+    os.environ["MOCK_EXCHANGE_URL"] = url
+    sys.path.insert(0, ROOT)
+    os.chdir(workdir)
+    if not verbose:
+        sys.stdout = open(os.devnull, "w")
+    symbols_file = os.path.join(workdir, "symbols.json")
+    with open(symbols_file, "w", encoding="utf-8") as f:
+        json.dump({exchange: [f"SYM{i}-USDT" for i in range(symbols)] for exchange in exchanges}, f)
+
+    import main as collector
+    target = rate * symbols * len(exchanges)
+    sampler = _Sampler(collector, ticks, results, rate, target, warmup, duration)
+    try:
+        asyncio.run(collector.main(symbols_file, sampler.monitor, shards=collector.start_shards(symbols_file)))
+    except LoadTestDone:
+        pass
+    except Exception as e:
+        results.put({"rate": rate, "error": repr(e)})
+
+
+def run_rate(rate: float, exchanges: list, symbols: int = 20, warmup: float = 5.0, duration: float = 20.0,
+             verbose: bool = False, server_procs: int = 1) -> dict:
+    ctx = mp.get_context("spawn")
+    port = _free_port()
+    ticks = [ctx.Value("q", 0, lock=False) for _ in range(server_procs)]
+    readies = [ctx.Event() for _ in range(server_procs)]
+    results = ctx.Queue()
+    servers = [ctx.Process(target=serve_forever, args=(port, rate, 20, ready, value, server_procs > 1, i + 1),
+                           daemon=True)
+               for i, (ready, value) in enumerate(zip(readies, ticks))]
+    workdir = tempfile.mkdtemp(prefix="mws-loadtest-")
+    for server in servers:
+        server.start()
+    try:
+        if not all(ready.wait(10) for ready in readies):
+            return {"rate": rate, "error": "模拟服务启动超时"}
+        worker = ctx.Process(target=_worker, args=(f"ws://127.0.0.1:{port}", workdir, rate, exchanges, symbols,
+                                                   warmup, duration, ticks, results, verbose))
+        worker.start()
+        try:
+            result = results.get(timeout=warmup + duration + 60)
+        except Exception:
+            result = {"rate": rate, "error": "采集器没有返回结果"}
+        worker.join(5)
+        if worker.is_alive():
+            worker.terminate()
+            worker.join()
+        return result
+    finally:
+        for server in servers:
+            server.terminate()
+            server.join()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def format_result(result: dict) -> str:
+    if "error" in result:
+        return f"❌ {result['rate']}/s/symbol: {result['error']}"
+    total = result["latency_us"].get("total", {})
+    queue = result["latency_us"].get("queue", {})
+    flag = "✅" if result["sustained"] else "❌"
+    note = "（模拟服务发不出目标速率）" if result["server_bound"] else ""
+    return (f"{flag} {result['rate']:g}/s/symbol 目标 {result['target']:,.0f} 发送 {result['offered']:,.0f} "
+            f"消费 {result['consumed']:,.0f} ticks/s{note} | 队列峰值 {result['queue_max']} "
+            f"{'增长中' if result['growing'] else '稳定'} | 接收→输出 p50 {total.get('p50', 0) / 1000:.2f}ms "
+            f"p99 {total.get('p99', 0) / 1000:.2f}ms p99.9 {total.get('p999', 0) / 1000:.2f}ms "
+            f"排队 p99 {queue.get('p99', 0) / 1000:.2f}ms")
+
+
+def sweep(rates: list, exchanges: list = None, symbols: int = 20, warmup: float = 5.0, duration: float = 20.0,
+          verbose: bool = False, keep_going: bool = False, server_procs: int = 1) -> dict:
+    # 按速率从低到高压测；默认出现第一个不可持续的档位后停止
+    exchanges = exchanges or DEFAULT_EXCHANGES
+    results = []
+    for rate in sorted(rates):
+        result = run_rate(rate, exchanges, symbols, warmup, duration, verbose, server_procs)
+        print(format_result(result), flush=True)
+        results.append(result)
+        if not result.get("sustained") and not keep_going:
+            break
+    sustained = [r for r in results if r.get("sustained")]
+    best = max(sustained, key=lambda r: r["consumed"]) if sustained else None
+    summary = {
+        "exchanges": exchanges,
+        "symbols_per_exchange": symbols,
+        "duration_sec": duration,
+        "server_procs": server_procs,
+        "results": results,
+        "max_sustainable_ticks_per_sec": best["consumed"] if best else 0.0,
+        "max_sustainable_rate": best["rate"] if best else None,
+        "latency_at_max_us": best["latency_us"] if best else {},
+    }
+    if best:
+        print(f"🏁 最大可持续 {best['consumed']:,.0f} ticks/s（{len(exchanges)} 个交易所 × {symbols} 个 symbol × "
+              f"{best['rate']:g}/s）")
+    else:
+        print("🏁 没有可持续的速率档")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模拟交易所 + 采集器全链路压测")
+    parser.add_argument("--rates", type=float, nargs="+", default=[5, 10, 20, 50, 100], help="每个 symbol 每秒推送次数")
+    parser.add_argument("--exchange", nargs="*", help=f"默认 {' '.join(DEFAULT_EXCHANGES)}")
+    parser.add_argument("--symbols", type=int, default=20, help="每个交易所的 symbol 数")
+    parser.add_argument("--warmup", type=float, default=5.0, help="预热秒数（连接 / 订阅）")
+    parser.add_argument("--duration", type=float, default=20.0, help="每档统计秒数")
+    parser.add_argument("--server-procs", type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)),
+                        help="模拟服务进程数（共用一个端口）")
+    parser.add_argument("--keep-going", action="store_true", help="不可持续后继续更高的速率档")
+    parser.add_argument("--json", help="结果另存为 JSON")
+    parser.add_argument("--verbose", action="store_true", help="显示采集器输出")
+    args = parser.parse_args()
+    summary = sweep(args.rates, args.exchange, args.symbols, args.warmup, args.duration, args.verbose,
+                    args.keep_going, args.server_procs)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,748 @@
+# benchmarks/mock_exchange.py
+#
+# 本地模拟交易所 WebSocket 服务：一个端口上按路径区分交易所（ws://127.0.0.1:8765/<exchange>），
+# 按各交易所的订阅 / 心跳 / 推送格式应答，现有连接器不改代码即可连上（gzip / zlib 压缩与线上一致）。
+# 每个订阅的 symbol 以 rate 次/秒推送合成行情；深度频道维护一本网格价格的合成订单簿，
+# 需要增量的交易所（Phemex / AscendEX）推送真实的 diff。
+#
+# 用法（在 market_ws_collector 目录下）：
+#   python -m benchmarks.mock_exchange --port 8765 --rate 10
+#   MOCK_EXCHANGE_URL=ws://127.0.0.1:8765 python main.py      # 见 config.py
+
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import time
+import zlib
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+import websockets
+from websockets.asyncio.server import serve  # 新版 asyncio 实现（ws.request.path），websockets>=13
+
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def _base_price(symbol: str) -> float:
+    # 每个 symbol 固定的基准价，跨几个数量级
+    h = zlib.crc32(symbol.encode())
+    return 10 ** (h % 5 - 1) * (1 + (h >> 8) % 97 / 10)
+
+
+class SyntheticBook:
+    # 网格价格的合成订单簿：mid 随机游走，每步随机改几档数量；价格用整数 tick 表示，避免浮点误差
+    def __init__(self, rng: random.Random, price: float, levels: int = 20):
+        self.rng = rng
+        self.levels = levels
+        self.tick = price * 1e-4
+        self.mid = round(price / self.tick)
+        self.seq = 0
+        self.bids = {}      # 价格 tick → 数量
+        self.asks = {}
+        self._rebuild()
+
+    def _size(self) -> float:
+        return round(self.rng.uniform(0.01, 5), 4)
+
+    def _rebuild(self):
+        bids = {self.mid - 1 - i: self.bids.get(self.mid - 1 - i) or self._size() for i in range(self.levels)}
+        asks = {self.mid + 1 + i: self.asks.get(self.mid + 1 + i) or self._size() for i in range(self.levels)}
+        self.bids, self.asks = bids, asks
+
+    def step(self):
+        # 前进一步，返回 (bid 变化, ask 变化)，每项为 (价格, 数量)，数量 0 表示删除
+        old_bids, old_asks = self.bids, self.asks
+        if self.rng.random() < 0.3:
+            self.mid += self.rng.choice((-1, 1))
+        self._rebuild()
+        for side in (self.bids, self.asks):
+            for p in self.rng.sample(sorted(side), 2):
+                side[p] = self._size()
+        self.seq += 1
+        return self._diff(old_bids, self.bids), self._diff(old_asks, self.asks)
+
+    def _diff(self, old: dict, new: dict) -> list:
+        changes = [(self.price(p), s) for p, s in new.items() if old.get(p) != s]
+        changes += [(self.price(p), 0.0) for p in old if p not in new]
+        return changes
+
+    def price(self, p: int) -> float:
+        return round(p * self.tick, 8)
+
+    def top(self, n: int = None):
+        # (bids 降序, asks 升序)，每档 (价格, 数量)
+        n = n or self.levels
+        bids = [(self.price(p), self.bids[p]) for p in sorted(self.bids, reverse=True)[:n]]
+        asks = [(self.price(p), self.asks[p]) for p in sorted(self.asks)[:n]]
+        return bids, asks
+
+
+def _str_levels(levels):
+    return [[str(p), str(s)] for p, s in levels]
+
+
+class Dialect(ABC):
+    # 一个交易所的协议：解析订阅 / 心跳，生成推送；compression 与连接器一致
+    compression = None
+    server_ping_sec = None      # 服务端主动 ping 的间隔（Huobi / Bitrue / LBank 等）
+
+    def on_message(self, session, msg) -> list:
+        # msg 为 JSON 对象或原始字符串；返回要回复的消息列表
+        return []
+
+    def frames(self, session, symbols: list) -> list:
+        # 每轮推送：默认每个 symbol 一帧；返回 [(payload, ticks)]
+        return [(self.tick(session, symbol), 1) for symbol in symbols]
+
+    @abstractmethod
+    def tick(self, session, symbol):
+        ...
+
+    def initial(self, session, symbol) -> list:
+        # 订阅后连接器先要收到的消息（增量频道的全量快照），离线样本用
+        return []
+
+    def server_ping(self):
+        return None
+
+
+def _quote(session, symbol):
+    bids, asks = session.step(symbol)[2]
+    (bid, bid_size), (ask, ask_size) = bids[0], asks[0]
+    return bid, bid_size, ask, ask_size
+
+
+class Binance(Dialect):
+    def on_message(self, session, msg):
+        if isinstance(msg, dict) and msg.get("method") in ("SUBSCRIBE", "UNSUBSCRIBE"):
+            for stream in msg.get("params", []):
+                symbol = stream.partition("@")[0]
+                if msg["method"] == "SUBSCRIBE":
+                    session.subscribe(symbol)
+                else:
+                    session.unsubscribe(symbol)
+            return [{"result": None, "id": msg.get("id")}]
+        return []
+
+    def tick(self, session, symbol):
+        bid, bv, ask, av = _quote(session, symbol)
+        return {"stream": f"{symbol}@ticker", "data": {
+            "e": "24hrTicker", "E": _now_ms(), "s": symbol.upper(), "c": str((bid + ask) / 2),
+            "b": str(bid), "B": str(bv), "a": str(ask), "A": str(av), "v": "12345.6"}}
+
+
+class OKX(Dialect):
+    channel = "tickers"
+
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict) or msg.get("op") not in ("subscribe", "unsubscribe"):
+            return ["pong"] if msg == "ping" else []
+        replies = []
+        for arg in msg.get("args", []):
+            if msg["op"] == "subscribe":
+                session.subscribe(arg["instId"])
+            else:
+                session.unsubscribe(arg["instId"])
+            replies.append({"event": msg["op"], "arg": arg})
+        return replies
+
+    def tick(self, session, symbol):
+        bid, bv, ask, av = _quote(session, symbol)
+        return {"arg": {"channel": "tickers", "instId": symbol}, "data": [{
+            "instId": symbol, "bidPx": str(bid), "bidSz": str(bv), "askPx": str(ask), "askSz": str(av),
+            "vol24h": "8123.4", "ts": str(_now_ms())}]}
+
+
+class BloFin(OKX):
+    def tick(self, session, symbol):
+        bid, bv, ask, av = _quote(session, symbol)
+        return {"arg": {"channel": "tickers", "instId": symbol}, "data": [{
+            "instId": symbol, "bidPrice": str(bid), "bidSize": str(bv), "askPrice": str(ask), "askSize": str(av),
+            "vol24h": "8123.4", "ts": str(_now_ms())}]}
+
+
+class Bitget(OKX):
+    compression = "zlib"
+
+    def tick(self, session, symbol):
+        bids, asks = session.step(symbol)[2]
+        ts = _now_ms()
+        return {"action": "snapshot", "arg": {"instType": "USDT-FUTURES", "channel": "books5", "instId": symbol},
+                "data": [{"asks": _str_levels(asks[:5]), "bids": _str_levels(bids[:5]), "checksum": 0,
+                          "seq": session.books[symbol].seq, "ts": str(ts)}], "ts": ts}
+
+
+class Bybit(Dialect):
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict) or msg.get("op") not in ("subscribe", "unsubscribe"):
+            return []
+        for arg in msg.get("args", []):
+            symbol = arg.rpartition(".")[2]
+            if msg["op"] == "subscribe":
+                session.subscribe(symbol)
+            else:
+                session.unsubscribe(symbol)
+        return [{"success": True, "ret_msg": "", "op": msg["op"], "req_id": msg.get("req_id")}]
+
+    def tick(self, session, symbol):
+        bid, bv, ask, av = _quote(session, symbol)
+        ts = _now_ms()
+        return {"topic": f"tickers.{symbol}", "type": "snapshot", "ts": ts, "data": {
+            "symbol": symbol, "bid1Price": str(bid), "bid1Size": str(bv), "ask1Price": str(ask),
+            "ask1Size": str(av), "turnover24h": "1.2e9", "ts": ts}}
+
+
+class Huobi(Dialect):
+    compression = "gzip"
+    server_ping_sec = 5
+
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict):
+            return []
+        if "sub" in msg:
+            session.subscribe(msg["sub"].split(".")[1])
+            return [{"id": msg.get("id"), "status": "ok", "subbed": msg["sub"], "ts": _now_ms()}]
+        if "unsub" in msg:
+            session.unsubscribe(msg["unsub"].split(".")[1])
+            return [{"id": msg.get("id"), "status": "ok", "unsubbed": msg["unsub"], "ts": _now_ms()}]
+        return []
+
+    def tick(self, session, symbol):
+        bid, bv, ask, av = _quote(session, symbol)
+        ts = _now_ms()
+        return {"ch": f"market.{symbol}.ticker", "ts": ts, "tick": {
+            "bid": bid, "bidSize": bv, "ask": ask, "askSize": av, "lastPrice": (bid + ask) / 2, "ts": ts}}
+
+    def server_ping(self):
+        return {"ping": _now_ms()}
+
+
+class GateIO(Dialect):
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict):
+            return []
+        if msg.get("channel") == "futures.ping":
+            return [{"time": int(time.time()), "channel": "futures.pong", "event": "", "result": None}]
+        if msg.get("event") in ("subscribe", "unsubscribe"):
+            for symbol in msg.get("payload", []):
+                if msg["event"] == "subscribe":
+                    session.subscribe(symbol)
+                else:
+                    session.unsubscribe(symbol)
+            return [{"time": int(time.time()), "id": msg.get("id"), "channel": msg.get("channel"),
+                     "event": msg["event"], "result": {"status": "success"}}]
+        return []
+
+    def tick(self, session, symbol):
+        bid, bv, ask, av = _quote(session, symbol)
+        ts = _now_ms()
+        return {"time": ts // 1000, "time_ms": ts, "channel": "futures.book_ticker", "event": "update",
+                "result": {"t": ts, "u": ts, "s": symbol, "b": str(bid), "B": int(bv * 100),
+                           "a": str(ask), "A": int(av * 100)}}
+
+
+class MEXC(Dialect):
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict):
+            return []
+        method = msg.get("method", "")
+        if method == "ping":
+            return [{"channel": "pong", "data": _now_ms()}]
+        symbol = msg.get("param", {}).get("symbol")
+        if method.startswith("sub."):
+            session.subscribe(symbol)
+            return [{"channel": f"rs.{method}", "data": "success", "ts": _now_ms()}]
+        if method.startswith("unsub."):
+            session.unsubscribe(symbol)
+            return [{"channel": f"rs.{method}", "data": "success", "ts": _now_ms()}]
+        return []
+
+    def tick(self, session, symbol):
+        bid, bv, ask, av = _quote(session, symbol)
+        return {"channel": "push.ticker", "symbol": symbol, "data": {
+            "symbol": symbol, "bid1": bid, "ask1": ask, "holdVol": bv, "volume24": 123456,
+            "timestamp": _now_ms()}, "ts": _now_ms()}
+
+
+class BitMart(Dialect):
+    def on_message(self, session, msg):
+        if msg == "ping":
+            return ["pong"]
+        if not isinstance(msg, dict) or msg.get("action") not in ("subscribe", "unsubscribe"):
+            return []
+        replies = []
+        for arg in msg.get("args", []):
+            symbol = arg.partition(":")[2]
+            if msg["action"] == "subscribe":
+                session.subscribe(symbol)
+            else:
+                session.unsubscribe(symbol)
+            replies.append({"action": msg["action"], "group": arg, "success": True, "request": msg})
+        return replies
+
+    def tick(self, session, symbol):
+        bid, bv, ask, av = _quote(session, symbol)
+        return {"group": f"futures/ticker:{symbol}", "data": {
+            "symbol": symbol, "bid_price": str(bid), "bid_vol": str(bv), "ask_price": str(ask),
+            "ask_vol": str(av), "volume_24": "123456"}}
+
+
+class BitMEX(Dialect):
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict) or msg.get("op") not in ("subscribe", "unsubscribe"):
+            return ["pong"] if msg == "ping" else []
+        replies = []
+        for arg in msg.get("args", []):
+            symbol = arg.partition(":")[2]
+            if msg["op"] == "subscribe":
+                session.subscribe(symbol)
+            else:
+                session.unsubscribe(symbol)
+            replies.append({"success": True, msg["op"]: arg, "request": msg})
+        return replies
+
+    def frames(self, session, symbols):
+        # BitMEX 一帧带多个 symbol 的报价
+        if not symbols:
+            return []
+        data = [self.tick(session, symbol) for symbol in symbols]
+        return [({"table": "quote", "action": "insert", "data": data}, len(symbols))]
+
+    def tick(self, session, symbol):
+        # 单个 symbol 的报价行，由 frames 合并成一帧
+        bid, bv, ask, av = _quote(session, symbol)
+        return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()), "symbol": symbol,
+                "bidSize": bv, "bidPrice": bid, "askPrice": ask, "askSize": av}
+
+
+class CryptoCom(Dialect):
+    server_ping_sec = 30
+
+    def __init__(self):
+        self._heartbeat_id = 0
+
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict) or msg.get("method") not in ("subscribe", "unsubscribe"):
+            return []
+        for channel in msg.get("params", {}).get("channels", []):
+            symbol = channel.partition(".")[2]
+            if msg["method"] == "subscribe":
+                session.subscribe(symbol)
+            else:
+                session.unsubscribe(symbol)
+        return [{"id": msg.get("id"), "method": msg["method"], "code": 0}]
+
+    def tick(self, session, symbol):
+        bid, bv, ask, av = _quote(session, symbol)
+        return {"id": -1, "method": "subscribe", "code": 0, "result": {
+            "instrument_name": symbol, "subscription": f"ticker.{symbol}", "channel": "ticker",
+            "data": [{"i": symbol, "b": str(bid), "bs": str(bv), "k": str(ask), "ks": str(av),
+                      "v": "1234.5", "t": _now_ms()}]}}
+
+    def server_ping(self):
+        self._heartbeat_id += 1
+        return {"id": self._heartbeat_id, "method": "public/heartbeat", "code": 0}
+
+
+class Digifinex(Dialect):
+    compression = "zlib"
+
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict):
+            return []
+        event = msg.get("event")
+        if event == "server.ping":
+            return [{"id": msg.get("id"), "result": "pong", "error": None}]
+        if event in ("ticker.subscribe", "ticker.unsubscribe"):
+            for symbol in msg.get("instrument_ids", []):
+                if event == "ticker.subscribe":
+                    session.subscribe(symbol)
+                else:
+                    session.unsubscribe(symbol)
+            return [{"id": msg.get("id"), "result": {"status": "success"}, "error": None}]
+        return []
+
+    def tick(self, session, symbol):
+        bid, bv, ask, av = _quote(session, symbol)
+        return {"event": "ticker.update", "data": {
+            "instrument_id": symbol, "best_bid": str(bid), "best_bid_size": str(bv), "best_ask": str(ask),
+            "best_ask_size": str(av), "volume_24h": "123456", "timestamp": _now_ms()}}
+
+
+class KrakenFutures(Dialect):
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict) or msg.get("event") not in ("subscribe", "unsubscribe"):
+            return []
+        if msg.get("feed") != "ticker":
+            return [{"event": "subscribed", "feed": msg.get("feed")}]
+        for symbol in msg.get("product_ids", []):
+            if msg["event"] == "subscribe":
+                session.subscribe(symbol)
+            else:
+                session.unsubscribe(symbol)
+        return [{"event": f"{msg['event']}d", "feed": "ticker", "product_ids": msg.get("product_ids", [])}]
+
+    def tick(self, session, symbol):
+        bid, bv, ask, av = _quote(session, symbol)
+        return {"time": _now_ms(), "feed": "ticker", "product_id": symbol, "bid": bid, "ask": ask,
+                "bid_size": bv, "ask_size": av, "volume": 12345.0}
+
+
+class BingX(Dialect):
+    compression = "gzip"
+
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict) or msg.get("reqType") not in ("sub", "unsub"):
+            return []
+        symbol = msg.get("dataType", "").partition("@")[0]
+        if msg["reqType"] == "sub":
+            session.subscribe(symbol)
+        else:
+            session.unsubscribe(symbol)
+        return [{"id": msg.get("id"), "code": 0, "msg": "", "data": None}]
+
+    def tick(self, session, symbol):
+        bids, asks = session.step(symbol)[2]
+        # BingX 卖盘按价格从高到低排列
+        return {"code": 0, "dataType": f"{symbol}@depth20",
+                "data": {"bids": _str_levels(bids[:20]), "asks": _str_levels(asks[:20][::-1])}, "ts": _now_ms()}
+
+
+class Phemex(Dialect):
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict) or msg.get("method") != "orderbook.subscribe":
+            return []
+        replies = [{"error": None, "id": msg.get("id"), "result": {"status": "success"}}]
+        for symbol in msg.get("params", []):
+            session.subscribe(symbol)
+            replies += self.initial(session, symbol)
+        return replies
+
+    def initial(self, session, symbol):
+        return [self._book(session, symbol, "snapshot")]
+
+    def _book(self, session, symbol, kind, changes=None):
+        session.seq += 1
+        if changes is None:
+            bids, asks = session.books[symbol].top(30)
+        else:
+            bids, asks = changes
+        return {"book": {"asks": [list(l) for l in asks], "bids": [list(l) for l in bids]}, "depth": 30,
+                "sequence": session.seq, "symbol": symbol, "timestamp": time.time_ns(), "type": kind}
+
+    def tick(self, session, symbol):
+        bid_changes, ask_changes = session.step(symbol)[:2]
+        return self._book(session, symbol, "incremental", (bid_changes, ask_changes))
+
+
+class OXFun(Dialect):
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict) or msg.get("op") not in ("subscribe", "unsubscribe"):
+            return []
+        replies = []
+        for arg in msg.get("args", []):
+            symbol = arg.partition(":")[2]
+            if msg["op"] == "subscribe":
+                session.subscribe(symbol)
+            else:
+                session.unsubscribe(symbol)
+            replies.append({"event": msg["op"], "channel": arg, "success": True, "timestamp": str(_now_ms())})
+        return replies
+
+    def tick(self, session, symbol):
+        bids, asks = session.step(symbol)[2]
+        return {"table": "depth", "data": {
+            "seqNum": session.books[symbol].seq, "marketCode": symbol, "timestamp": str(_now_ms()),
+            "bids": [list(l) for l in bids], "asks": [list(l) for l in asks]}}
+
+
+class LBank(Dialect):
+    server_ping_sec = 10
+
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict):
+            return []
+        if msg.get("action") == "ping":
+            return [{"action": "pong", "pong": msg.get("ping")}]
+        if msg.get("action") == "subscribe":
+            session.subscribe(msg.get("pair"))
+        elif msg.get("action") == "unsubscribe":
+            session.unsubscribe(msg.get("pair"))
+        return []
+
+    def tick(self, session, symbol):
+        bids, asks = session.step(symbol)[2]
+        return {"depth": {"asks": [list(l) for l in asks[:10]], "bids": [list(l) for l in bids[:10]]},
+                "count": 10, "type": "depth", "pair": symbol, "SERVER": "V2",
+                "TS": time.strftime("%Y-%m-%dT%H:%M:%S.000")}
+
+    def server_ping(self):
+        return {"action": "ping", "ping": str(_now_ms())}
+
+
+class AscendEX(Dialect):
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict):
+            return []
+        op = msg.get("op")
+        if op == "ping":
+            return [{"m": "pong", "hp": 3}]
+        if op in ("sub", "unsub"):
+            symbol = msg.get("ch", "").split(":")[1]
+            if op == "sub":
+                session.subscribe(symbol)
+            else:
+                session.unsubscribe(symbol)
+            return [{"m": op, "id": msg.get("id"), "ch": msg.get("ch"), "code": 0}]
+        if op == "req" and msg.get("action") == "depth-snapshot":
+            symbol = msg.get("args", {}).get("symbol")
+            return self.initial(session, symbol) if symbol in session.books else []
+        return []
+
+    def initial(self, session, symbol):
+        book = session.books[symbol]
+        bids, asks = book.top()
+        return [{"m": "depth-snapshot", "symbol": symbol, "data": {
+            "seqnum": book.seq, "ts": _now_ms(), "bids": _str_levels(bids), "asks": _str_levels(asks)}}]
+
+    def tick(self, session, symbol):
+        bid_changes, ask_changes, _ = session.step(symbol)
+        return {"m": "depth", "symbol": symbol, "data": {
+            "ts": _now_ms(), "seqnum": session.books[symbol].seq,
+            "bids": _str_levels(bid_changes), "asks": _str_levels(ask_changes)}}
+
+
+class Bitrue(Dialect):
+    compression = "gzip"
+    server_ping_sec = 10
+
+    def on_message(self, session, msg):
+        if not isinstance(msg, dict) or msg.get("event") not in ("sub", "unsub"):
+            return []
+        params = msg.get("params", {})
+        symbol = params.get("cb_id")
+        if msg["event"] == "sub":
+            session.subscribe(symbol)
+        else:
+            session.unsubscribe(symbol)
+        return [{"event_rep": f"{msg['event']}ed", "channel": params.get("channel"), "cb_id": symbol, "status": "ok"}]
+
+    def tick(self, session, symbol):
+        bids, asks = session.step(symbol)[2]
+        return {"channel": f"market_{symbol}_depth_step0", "ts": _now_ms(),
+                "tick": {"buys": _str_levels(bids), "asks": _str_levels(asks)}}
+
+    def server_ping(self):
+        return {"ping": _now_ms()}
+
+
+DIALECTS = {
+    "ascendex": AscendEX,
+    "binance": Binance,
+    "bingx": BingX,
+    "bitget": Bitget,
+    "bitmart": BitMart,
+    "bitmex": BitMEX,
+    "bitrue": Bitrue,
+    "blofin": BloFin,
+    "bybit": Bybit,
+    "cryptocom": CryptoCom,
+    "digifinex": Digifinex,
+    "gateio": GateIO,
+    "huobi": Huobi,
+    "krakenfutures": KrakenFutures,
+    "lbank": LBank,
+    "mexc": MEXC,
+    "okx": OKX,
+    "oxfun": OXFun,
+    "phemex": Phemex,
+}
+
+
+def encode(payload, compression):
+    text = payload if isinstance(payload, str) else json.dumps(payload, separators=(",", ":"))
+    if compression == "gzip":
+        return gzip.compress(text.encode(), compresslevel=1)
+    if compression == "zlib":
+        return zlib.compress(text.encode(), 1)
+    return text
+
+
+class _Session:
+    # 一条客户端连接：已订阅的 symbol 及其合成订单簿
+    def __init__(self, server, ws, exchange: str):
+        self.server = server
+        self.ws = ws
+        self.exchange = exchange
+        self.dialect = DIALECTS[exchange]()
+        self.books = {}         # 交易所格式 symbol → SyntheticBook
+        self.seq = 0
+
+    def subscribe(self, symbol):
+        if symbol and symbol not in self.books:
+            self.books[symbol] = SyntheticBook(self.server.rng, _base_price(symbol), self.server.levels)
+
+    def unsubscribe(self, symbol):
+        self.books.pop(symbol, None)
+
+    def step(self, symbol):
+        book = self.books[symbol]
+        bid_changes, ask_changes = book.step()
+        return bid_changes, ask_changes, book.top()
+
+    async def send(self, payload):
+        await self.ws.send(encode(payload, self.dialect.compression))
+
+    async def pump(self, rate: float):
+        # 每秒 rate 轮，每轮每个 symbol 一条；发送被背压拖慢时不补发积压的轮次（实际速率会低于目标）
+        start = time.monotonic()
+        rounds = 0
+        while True:
+            rounds += 1
+            delay = start + rounds / rate - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # 落后于计划时也要让出事件循环，否则其他连接和心跳会饿死
+                await asyncio.sleep(0)
+                if delay < -1.0:
+                    start, rounds = time.monotonic(), 0
+            for payload, ticks in self.dialect.frames(self, list(self.books)):
+                await self.send(payload)
+                self.server.ticks += ticks
+                self.server.frames += 1
+
+    async def ping(self):
+        interval = self.dialect.server_ping_sec
+        while interval:
+            await asyncio.sleep(interval)
+            await self.send(self.dialect.server_ping())
+
+
+class MockExchangeServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, rate: float = 10.0, levels: int = 20,
+                 seed: int = 1, reuse_port: bool = False):
+        self.host = host
+        self.port = port
+        self.reuse_port = reuse_port    # 多个进程监听同一端口，由内核分配连接（单进程发不出压测需要的速率时）
+        self.rate = rate            # 每个 symbol 每秒推送次数
+        self.levels = levels
+        self.rng = random.Random(seed)
+        self._server = None
+
+        # 指标
+        self.connections = 0
+        self.ticks = 0
+        self.frames = 0
+
+    async def start(self):
+        # 关闭 permessage-deflate：压缩只用交易所自己的 gzip / zlib
+        self._server = await serve(self._handler, self.host, self.port, compression=None,
+                                              max_queue=None, ping_interval=None,
+                                              reuse_port=self.reuse_port or None)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def endpoints(self) -> dict:
+        return {exchange: f"{self.url}/{exchange}" for exchange in DIALECTS}
+
+    async def _handler(self, ws):
+        url = urlparse(ws.request.path)
+        exchange = url.path.strip("/").split("/")[0]
+        if exchange not in DIALECTS:
+            await ws.close(1008, f"unknown exchange {exchange}")
+            return
+        session = _Session(self, ws, exchange)
+        # Binance 组合流在 URL 里订阅
+        for stream in "".join(parse_qs(url.query).get("streams", [])).split("/"):
+            if stream:
+                session.subscribe(stream.partition("@")[0])
+
+        self.connections += 1
+        tasks = [asyncio.create_task(session.pump(self.rate)), asyncio.create_task(session.ping())]
+        try:
+            async for raw in ws:
+                text = raw.decode() if isinstance(raw, bytes) else raw
+                try:
+                    msg = json.loads(text)
+                except ValueError:
+                    msg = text
+                for reply in session.dialect.on_message(session, msg):
+                    await session.send(reply)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections -= 1
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"connections": self.connections, "ticks": self.ticks, "frames": self.frames}
+
+
+def sample_payloads(exchange: str, symbol: str, count: int, seed: int = 42, levels: int = 20) -> list:
+    # 不起服务，直接生成 count 条推送（JSON 对象，前面带上增量频道需要的快照），供 benchmarks/frames.py 使用
+    server = SimpleNamespace(rng=random.Random(seed), levels=levels, ticks=0, frames=0)
+    session = _Session(server, None, exchange)
+    session.subscribe(symbol)
+    payloads = session.dialect.initial(session, symbol)
+    while len(payloads) < count:
+        payloads += [payload for payload, _ in session.dialect.frames(session, [symbol])]
+    return payloads[:count]
+
+
+def serve_forever(port: int, rate: float, levels: int = 20, ready=None, ticks=None, reuse_port: bool = False,
+                  seed: int = 1):
+    # 子进程入口：ready（multiprocessing.Event）在开始监听后置位；ticks（multiprocessing.Value）同步已发送的行情数
+    async def _run():
+        server = await MockExchangeServer(port=port, rate=rate, levels=levels, seed=seed,
+                                          reuse_port=reuse_port).start()
+        if ready is not None:
+            ready.set()
+        while True:
+            await asyncio.sleep(0.1)
+            if ticks is not None:
+                ticks.value = server.ticks
+
+    asyncio.run(_run())
+
+
+async def _main(args):
+    server = await MockExchangeServer(args.host, args.port, args.rate, args.levels).start()
+    print(f"🧪 模拟交易所已启动 → {server.url}/<exchange>，每个 symbol {args.rate} 次/秒")
+    print(f"   MOCK_EXCHANGE_URL={server.url} python main.py")
+    last = 0
+    while True:
+        await asyncio.sleep(10)
+        st = server.stats()
+        print(f"📤 连接 {st['connections']}，{(st['ticks'] - last) / 10:,.0f} ticks/s，累计 {st['ticks']}")
+        last = st["ticks"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟交易所 WebSocket 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=10.0, help="每个 symbol 每秒推送次数")
+    parser.add_argument("--levels", type=int, default=20, help="合成订单簿每边档位数")
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
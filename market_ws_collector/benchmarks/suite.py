@@ -0,0 +1,204 @@
+# benchmarks/suite.py
+#
+# 一次跑完所有热点路径的基准，结果追加到 JSON Lines 历史文件，并与同一台机器上的上一次结果对比：
+#   parse     每个连接器 解压 → 解码 → handle_message → emit 的单帧耗时（bench_replay）
+#   decode    各 JSON 解码后端的单帧耗时（bench_decode）
+#   snapshot  MarketSnapshot 构造 / 内存 / 入队（bench_snapshot）
+#   queue     BoundedSnapshotQueue 各策略吞吐（bench_queue）
+#   csv       writer_worker / batch_writer_worker 行/秒（bench_csv）
+#   spread    1 小时窗口价差计算（bench_spread）
+#   render    单张图渲染耗时（bench_render）
+# 指标名以 per_sec 结尾的越大越好，其余（µs / ms / 字节）越小越好
+#
+# 用法（在 market_ws_collector 目录下）：
+#   python -m benchmarks.suite [--only parse csv ...] [--quick] [--history benchmarks/results/history.jsonl] [--no-save]
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+HISTORY_FILE = os.path.join(os.path.dirname(__file__), "results", "history.jsonl")
+CHANGE_THRESHOLD_PCT = 10.0     # 变化超过该比例才标记
+
+
+def _parse(quick):
+    from benchmarks import bench_replay
+    results = asyncio.run(bench_replay.run(count=1000 if quick else 5000, repeat=1 if quick else 3))
+    metrics = {}
+    for exchange, r in results.items():
+        metrics[f"{exchange}.us_per_frame"] = r["us_per_frame"]
+        metrics[f"{exchange}.frames_per_sec"] = r["frames_per_sec"]
+    return metrics
+
+
+def _decode(quick):
+    from benchmarks import bench_decode
+    results = bench_decode.run(count=1000 if quick else 5000, repeat=1 if quick else 3)
+    return {f"{exchange}.{backend}_us": us for (exchange, backend), us in results.items()}
+
+
+def _snapshot(quick):
+    from benchmarks import bench_snapshot
+    return bench_snapshot.run(count=20_000 if quick else 100_000)
+
+
+def _queue(quick):
+    from benchmarks import bench_queue
+    return bench_queue.run(count=50_000 if quick else 200_000)
+
+
+def _csv(quick):
+    from benchmarks import bench_csv
+    return bench_csv.run(count=20_000 if quick else 100_000)
+
+
+def _spread(quick):
+    from benchmarks import bench_spread
+    return bench_spread.run(minutes=60, repeat=2 if quick else 5)
+
+
+def _render(quick):
+    from benchmarks import bench_render
+    return bench_render.run(minutes=(1,) if quick else (1, 60), repeat=1 if quick else 3)
+
+
+SECTIONS = {
+    "parse": _parse,
+    "decode": _decode,
+    "snapshot": _snapshot,
+    "queue": _queue,
+    "csv": _csv,
+    "spread": _spread,
+    "render": _render,
+}
+
+
+def _git_revision():
+    try:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True,
+                             text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                               capture_output=True, text=True, timeout=30).stdout.strip()
+        return f"{rev}-dirty" if rev and dirty else rev or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _numeric(metrics: dict) -> dict:
+    return {k: round(float(v), 3) for k, v in metrics.items()
+            if isinstance(v, (int, float)) and not isinstance(v, bool)}
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("per_sec")
+
+
+def load_history(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue    # 写入中断留下的半行
+    return records
+
+
+def previous_record(history: list, record: dict):
+    # 同一台机器、同一 Python 版本、同样规模（quick / 完整）的上一次结果
+    for old in reversed(history):
+        if (old.get("host") == record["host"] and old.get("python") == record["python"]
+                and old.get("quick") == record["quick"]):
+            return old
+    return None
+
+
+def compare(old: dict, new: dict, threshold_pct: float = CHANGE_THRESHOLD_PCT) -> list:
+    # [(section, metric, 旧值, 新值, 变化%, 是否变好)]，只列出变化超过阈值的指标
+    changes = []
+    for section, metrics in new["results"].items():
+        old_metrics = old.get("results", {}).get(section, {})
+        for metric, value in metrics.items():
+            before = old_metrics.get(metric)
+            if not before:
+                continue
+            change = (value - before) / before * 100
+            if abs(change) >= threshold_pct:
+                better = change > 0 if higher_is_better(metric) else change < 0
+                changes.append((section, metric, before, value, change, better))
+    return changes
+
+
+def run(sections=None, quick: bool = False) -> dict:
+    record = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "quick": quick,
+        "seconds": {},
+        "results": {},
+    }
+    for name in sections or SECTIONS:
+        print(f"\n===== {name} =====", flush=True)
+        start = time.perf_counter()
+        try:
+            record["results"][name] = _numeric(SECTIONS[name](quick))
+        except Exception as e:
+            # 可选依赖缺失等情况：记下错误，继续其他部分
+            print(f"❌ {name} 失败: {e!r}")
+            record.setdefault("errors", {})[name] = repr(e)
+        record["seconds"][name] = round(time.perf_counter() - start, 1)
+    return record
+
+
+def append_history(path: str, record: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def print_comparison(old, record: dict):
+    print("\n===== 对比 =====")
+    if old is None:
+        print("📭 没有可对比的历史结果（同一机器 / Python 版本 / 规模）")
+        return
+    changes = compare(old, record)
+    print(f"📒 对比 {old['timestamp']}（{old.get('revision')}）→ {record['timestamp']}（{record.get('revision')}），"
+          f"变化超过 {CHANGE_THRESHOLD_PCT:g}% 的指标 {len(changes)} 个")
+    for section, metric, before, value, change, better in sorted(changes, key=lambda c: c[4]):
+        print(f"   {'✅' if better else '⚠️'} {section}.{metric}: {before:,.3f} → {value:,.3f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基准测试套件（结果写入 JSON 历史）")
+    parser.add_argument("--only", nargs="*", choices=sorted(SECTIONS), help="只跑指定部分")
+    parser.add_argument("--quick", action="store_true", help="缩小规模，快速检查")
+    parser.add_argument("--history", default=HISTORY_FILE, help="JSON Lines 历史文件")
+    parser.add_argument("--no-save", action="store_true", help="只对比，不写入历史")
+    args = parser.parse_args()
+
+    record = run(args.only, args.quick)
+    print_comparison(previous_record(load_history(args.history), record), record)
+    if not args.no_save:
+        append_history(args.history, record)
+        print(f"💾 已写入 {args.history}")
+    if record.get("errors"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
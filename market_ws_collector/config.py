@@ -1,5 +1,7 @@
 # market_ws_collector/config.py
 
+import os
+
 # ✅ 标准化合约符号（注意：不同交易所格式可能不同）
 DEFAULT_SYMBOLS = {
     "ascendex":      ["BTC-USDT", "ETH-USDT", "SOL-USDT", "XRP-USDT", "LTC-USDT"],
@@ -60,3 +62,150 @@ DEFAULT_SYMBOLS.update({
 WS_ENDPOINTS.update({
     "binance": "wss://stream.binance.com:9443"
 })
+
+# ✅ 本地压测：设置环境变量 MOCK_EXCHANGE_URL（如 ws://127.0.0.1:8765）后所有交易所改连 benchmarks/mock_exchange.py
+MOCK_EXCHANGE_URL = os.environ.get("MOCK_EXCHANGE_URL")
+if MOCK_EXCHANGE_URL:
+    WS_ENDPOINTS = {exchange: f"{MOCK_EXCHANGE_URL.rstrip('/')}/{exchange}" for exchange in WS_ENDPOINTS}
+
+
+# ✅ 行情缓存：只需覆盖绘图窗口，按 窗口 × 单个 (symbol, exchange) 的预期峰值 tick 速率 × 余量 估算
+PLOT_WINDOW_MINUTES = 1
+TICK_RATE_PER_SEC = 100
+TICK_BUFFER_HEADROOM = 2
+# 每个 (symbol, exchange) 的 ring buffer 内存上限（字节），每个 tick 占 40 字节；默认约 470KB / 12000 个 tick
+TICK_BUFFER_BYTES = PLOT_WINDOW_MINUTES * 60 * TICK_RATE_PER_SEC * TICK_BUFFER_HEADROOM * 40
+
+# ✅ 实时套利监控：价差超过阈值（%）才推送事件；超过最大报价年龄（毫秒）的交易所不参与比较
+ARBITRAGE_MIN_SPREAD_PCT = 0.1
+ARBITRAGE_MAX_QUOTE_AGE_MS = 5000
+
+# ✅ 绘图子进程数量（matplotlib 渲染不在事件循环里执行）
+PLOT_WORKERS = 2
+
+# ✅ CSV 写盘放到独立线程（False 则在事件循环里同步写）
+CSV_WRITER_THREAD = True
+
+# ✅ 额外输出按 date/exchange 分区的 Parquet 文件（需要 pyarrow）
+PARQUET_SINK = False
+
+# ✅ 日志级别：按交易所配置，未列出的交易所使用 "default"
+LOG_LEVELS = {
+    "default": "INFO",
+    # "huobi": "DEBUG",
+}
+
+# ✅ 日志是否同时回显到终端（由后台日志线程输出，不阻塞事件循环）
+LOG_ECHO_STDOUT = True
+
+# ✅ 行情队列上限与满队列策略："block"（连接器等待）/ "drop_oldest"（丢最旧）/ "conflate"（同一 exchange+symbol 只保留最新）
+SNAPSHOT_QUEUE_MAXSIZE = 100_000
+SNAPSHOT_QUEUE_POLICY = "block"
+
+# ✅ CSV 写队列上限（满了之后消费协程等待写线程）
+WRITE_QUEUE_MAXSIZE = 200_000
+
+# ✅ 交易所 → symbol 列表文件（ExchangeManager.load_connectors 读取）
+SYMBOLS_FILE = "../selector/top100_exchange_symbols.json"
+# SYMBOLS_FILE = "../selector/filtered_exchange_symbols_gt50.json"
+
+# ✅ 多进程分片：0 表示所有连接器在主进程的一个事件循环里运行；N>0 表示分到 N 个子进程
+SHARD_WORKERS = 0
+
+# ✅ 分片计划：None 表示按 symbol 数量自动均衡；也可手动指定每个子进程的交易所，
+#    "exchange:i/n" 表示该交易所 symbol 列表的第 i 份（共 n 份），例如：
+# SHARD_PLAN = [["binance:0/2", "okx"], ["binance:1/2", "bybit"]]
+SHARD_PLAN = None
+
+# ✅ 共享内存最新盘口表（供本机策略进程读取，见 utils/shm_book.py 的 ShmBookReader）
+SHM_BOOK = False
+SHM_BOOK_NAME = "market_ws_book"
+
+# ✅ 每个交易所的 WebSocket 连接数（symbol 平均分到各连接，各自接收 / 重连），未列出的用 "default"
+CONNECTIONS_PER_EXCHANGE = {
+    "default": 1,
+    # "binance": 2,
+}
+
+# ✅ 单连接 topic 上限：symbol 数超过上限时自动增加连接数（None / 未列出表示不限制）
+MAX_TOPICS_PER_CONNECTION = {
+    "binance": 1024,   # 组合流单连接最多 1024 个 stream
+    "bitget": 50,      # 官方建议单连接少于 50 个频道
+}
+
+# ✅ 重连策略：指数退避 + 抖动；稳定运行 healthy_after 秒后重试预算清零；预算耗尽冷却 cooldown 秒
+RECONNECT_POLICY = {
+    "base_delay": 1.0,
+    "max_delay": 60.0,
+    "multiplier": 2.0,
+    "jitter": 0.5,
+    "max_retries": 10,
+    "healthy_after": 60.0,
+    "cooldown": 300.0,
+}
+
+# ✅ 假死检测：连续多少秒收不到任何数据就主动重连（None 表示不检测），未列出的用 "default"
+STALE_DATA_SECONDS = {
+    "default": 60,
+}
+
+# ✅ 订阅限速（按各交易所文档的 WebSocket 限制取保守值），未列出的用 "default"
+#   rate：每秒最多发送的订阅消息数；burst：令牌桶容量；batch：每条订阅消息最多包含的 topic 数（None 表示不限）
+SUBSCRIBE_LIMITS = {
+    "default":       {"rate": 10, "burst": 10, "batch": 1},
+    "ascendex":      {"rate": 10, "burst": 10, "batch": 1},
+    "bingx":         {"rate": 10, "burst": 10, "batch": 1},
+    "bitget":        {"rate": 10, "burst": 10, "batch": 50},
+    "bitmart":       {"rate": 10, "burst": 10, "batch": None},
+    "bitmex":        {"rate": 10, "burst": 10, "batch": None},
+    "bitrue":        {"rate": 10, "burst": 10, "batch": 1},
+    "blofin":        {"rate": 10, "burst": 10, "batch": 20},
+    "bybit":         {"rate": 10, "burst": 10, "batch": 10},
+    "cryptocom":     {"rate": 10, "burst": 10, "batch": 50},
+    "digifinex":     {"rate": 10, "burst": 10, "batch": None},
+    "gateio":        {"rate": 10, "burst": 10, "batch": 50},
+    "huobi":         {"rate": 20, "burst": 20, "batch": 1},
+    "krakenfutures": {"rate": 10, "burst": 10, "batch": None},
+    "lbank":         {"rate": 10, "burst": 10, "batch": 1},
+    "mexc":          {"rate": 10, "burst": 10, "batch": 1},
+    "okx":           {"rate": 3,  "burst": 3,  "batch": 100},   # OKX 每连接每小时最多 480 次订阅请求
+    "oxfun":         {"rate": 10, "burst": 10, "batch": 20},
+    "phemex":        {"rate": 10, "burst": 10, "batch": 1},
+}
+
+# ✅ 单个 topic 假死检测：连接正常但某个 symbol 超过这么多秒没有行情，就单独退订再订阅（None 表示不检测）
+#    冷门合约的 ticker 可能几分钟才变一次，阈值不宜过小；连续重订 TOPIC_MAX_RESUBSCRIBE 次仍无行情则放弃
+TOPIC_SILENT_SECONDS = {
+    "default": 300,
+}
+TOPIC_MAX_RESUBSCRIBE = 3
+
+# ✅ 端到端延迟统计：交易所时间戳 → 接收 → 解析 → 出队 → 输出，按交易所输出分位数
+LATENCY_TRACKING = True
+LATENCY_REPORT_SEC = 60
+LATENCY_REPORT_FILE = "snapshots/latency.json"   # 每个周期覆盖写入，含本周期和累计的分位数（微秒）
+LATENCY_CSV_COLUMNS = False                      # True 时每行 CSV 追加 exchange_ts / recv_ts / parse_us / queue_us
+
+# ✅ L2 订单簿输出：深度频道的交易所（bitget / bingx / phemex / oxfun / lbank / ascendex / bitrue）额外输出前 N 档 BookSnapshot
+ORDER_BOOKS = False
+ORDER_BOOK_DEPTH = 10
+ORDER_BOOK_QUEUE_MAXSIZE = 10000                 # 深度队列按 (exchange, symbol) 合并，只保留最新一本
+DEPTH_SNAPSHOT_TIMEOUT_SEC = 5                   # 请求深度快照后超过该时间仍未收到，重新请求（AscendEX）
+
+# ✅ 按深度的可成交套利（需要 ORDER_BOOKS）：taker 手续费（%），未列出的用 "default"；扣费后利润（计价币）达到阈值才推送
+TAKER_FEES = {
+    "default": 0.06,
+    "binance": 0.05,
+    "okx": 0.05,
+    "bybit": 0.055,
+    "bitget": 0.06,
+    "gateio": 0.05,
+    "bingx": 0.05,
+    "mexc": 0.02,
+}
+DEPTH_ARBITRAGE_MIN_PROFIT = 1.0
+
+# ✅ 原始帧录制：每个连接把收到的原始帧追加写入 CAPTURE_DIR/<label>.cap，供 utils/replay.py 离线回放
+CAPTURE_FRAMES = False
+CAPTURE_DIR = "capture"
+CAPTURE_MAX_BYTES = 1024 * 1024 * 1024           # 单个文件上限，达到后停止录制
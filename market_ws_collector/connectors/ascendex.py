@@ -1,11 +1,9 @@
-import asyncio
-import json
 import re
 import time
 import websockets
 
-from config import DEFAULT_SYMBOLS, WS_ENDPOINTS
-from models.base import SubscriptionRequest, MarketSnapshot
+from config import DEFAULT_SYMBOLS, WS_ENDPOINTS, DEPTH_SNAPSHOT_TIMEOUT_SEC
+from models.base import SubscriptionRequest
 from connectors.base import BaseAsyncConnector
 
 
@@ -36,13 +34,19 @@ class Connector(BaseAsyncConnector):
         # 将 BTC-USDT 之类格式转换成 BTC-PERP
         return re.sub(r"-USDT$", "", generic_symbol.upper()) + "-PERP"
 
-    def build_sub_msg(self, request: SubscriptionRequest) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
+        request = batch[0]
         return {
             "op": "sub",
             "id": f"{request.channel}_{request.symbol}",
             "ch": f"{request.channel}:{request.symbol}:{request.depth_level}"
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["op"] = "unsub"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(
             self.ws_url,
@@ -51,43 +55,56 @@ class Connector(BaseAsyncConnector):
         self.log(f"✅ AscendEX WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        for req in self.subscriptions:
-            msg = self.build_sub_msg(req)
-            await self.ws.send(json.dumps(msg))
-            self.log(f"📨 已订阅: {req.symbol}")
-            await asyncio.sleep(0.1)
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
+
+    async def request_depth_snapshot(self, symbol: str) -> bool:
+        # depth 频道只推增量，完整深度需要单独请求；请求前收到的增量由 OrderBook 缓存
+        # 与订阅共用限速，没有令牌时返回 False，下一条增量到来时再请求
+        sent = await self.send_request({
+            "op": "req",
+            "action": "depth-snapshot",
+            "args": {"symbol": symbol}
+        })
+        if sent:
+            self.log(f"📨 请求深度快照: {symbol}", level="DEBUG")
+        return sent
 
     async def handle_message(self, data):
-        # 只处理 depth 消息
-        if data.get("m") == "depth" and "symbol" in data:
+        # depth 增量 / depth-snapshot 快照，seqnum 每条增量加 1
+        if data.get("m") in ("depth", "depth-snapshot") and "symbol" in data:
             symbol = data["symbol"]
             raw_symbol = self.symbol_map.get(symbol, symbol)
-
-            bids = data["data"].get("bids", [])
-            asks = data["data"].get("asks", [])
-
-            bid1, bid_vol1 = map(float, bids[0]) if bids else (0.0, 0.0)
-            ask1, ask_vol1 = map(float, asks[0]) if asks else (0.0, 0.0)
+            tick = data["data"]
+            seq = tick.get("seqnum")
 
             # depth 数据无时间戳，使用本地时间
             timestamp = int(time.time() * 1000)
 
-            snapshot = MarketSnapshot(
-                exchange=self.exchange_name,
-                symbol=symbol,
-                raw_symbol=raw_symbol,
-                bid1=bid1,
-                ask1=ask1,
-                bid_vol1=bid_vol1,
-                ask_vol1=ask_vol1,
-                timestamp=timestamp
-            )
-
-            if self.queue:
-                await self.queue.put(snapshot)
+            book = self.get_book(symbol, raw_symbol)
+            if data["m"] == "depth-snapshot":
+                applied = book.apply_snapshot(tick.get("bids", []), tick.get("asks", []),
+                                              seq=seq, timestamp=timestamp)
+            else:
+                applied = book.apply_delta(tick.get("bids", []), tick.get("asks", []), seq=seq,
+                                           prev_seq=seq - 1 if seq is not None else None, timestamp=timestamp)
+
+            if applied:
+                await self.emit_book(book)
+            elif book.resync_due(time.monotonic(), DEPTH_SNAPSHOT_TIMEOUT_SEC):
+                # 还没有快照、检测到丢包，或上次快照请求超时没有回复
+                if await self.request_depth_snapshot(symbol):
+                    book.mark_resync_requested(time.monotonic())
+
+        elif data.get("m") == "sub":
+            # 订阅回执：{"m":"sub","id":"depth_BTC-PERP","ch":"depth:BTC-PERP:0","code":0}
+            symbol = str(data.get("id", "")).partition("_")[2]
+            if data.get("code", 0) == 0:
+                self.confirm_topics([symbol])
+            else:
+                self.reject_topics([symbol], data.get("reason") or data.get("code"))
 
         elif any(k in str(data).lower() for k in self.pong_keywords):
-            self.log("🔁 收到 pong 心跳回复")
+            self.log_throttled("pong", "🔁 收到 pong 心跳回复")
 
         else:
             # 其他消息忽略或可打印调试
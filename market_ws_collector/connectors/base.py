@@ -1,75 +1,112 @@
 import asyncio
-import datetime
 import json
-import gzip
-import zlib
 import logging
+import math
+import time
 
 from abc import ABC, abstractmethod
 
-# log_filename = f"log/log_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-log_prefix = f"log/log"
-log_dt = f"{datetime.datetime.now().strftime('%m%d_%H%M%S')}"
+from connectors.capture import FrameWriter
+from connectors.codec import DecompressionError, FrameDecompressor, make_decoder, preview
+from connectors.reconnect import ReconnectPolicy, StaleDataError
+from connectors.subscription import SubscriptionTracker, TokenBucket
+from config import SUBSCRIBE_LIMITS, TOPIC_SILENT_SECONDS, TOPIC_MAX_RESUBSCRIBE, ORDER_BOOK_DEPTH
+from models.base import MarketSnapshotBatch
+from models.orderbook import OrderBook
+from utils.logger import LogThrottle, get_exchange_logger
 
+_LEVELS = {
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+}
 
-import os
 
-log_dir = "./log"  # log 目录路径
-
-def clean_log_dir(log_dir: str = "./log"):
-    # 如果 log 目录不存在，创建它
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-        print(f"✅ 创建 log 目录：{log_dir}")
-        return
-
-    for filename in os.listdir(log_dir):
-        filepath = os.path.join(log_dir, filename)
-        if os.path.isfile(filepath):
-            os.remove(filepath)
-            print(f"🗑️ 已删除文件：{filepath}")
-
-clean_log_dir(log_dir)
-clean_log_dir("snapshots")  # 清理 snapshots 目录
+def _truncate(value, limit: int = 200) -> str:
+    text = str(value)
+    return text if len(text) <= limit else f"{text[:limit]}...（共 {len(text)} 字符）"
 
 
 class BaseAsyncConnector(ABC):
+    # 连接器可设置为 msgspec.Struct（或 Union）类型，按自身 payload 结构做强类型解码
+    message_type = None
+
     def __init__(
         self,
         exchange: str,
-        compression: str = None,  # None / "gzip" / "zlib"
+        compression: str = None,  # None / "gzip" / "zlib" / "deflate"（raw deflate）
         ping_interval: int = 20,
         ping_payload=None,        # dict / str / bytes
         pong_keywords=None,
         log_filename=None,
-        max_retries: int = 10
+        max_retries: int = 10,
+        decoder: str = "auto",    # "auto" / "orjson" / "msgspec" / "json"
+        stream_compression: bool = False,  # 整条连接共用压缩上下文时置 True
+        log_throttle_sec: float = 60,      # 心跳 / 未处理消息等高频日志的输出间隔
+        reconnect_policy: ReconnectPolicy = None,
     ):
         self.exchange_name = exchange
+        self.label = exchange       # 多连接时为 "exchange#i"，用于日志和统计
         self.compression = compression
         self.ping_interval = ping_interval
         self.ping_payload = ping_payload
         self.pong_keywords = pong_keywords
         self.ws = None
+        self.queue = None           # 行情队列（子类构造时赋值）
+        self.top_cache = None       # 最新盘口缓存（TopOfBookCache，由 ExchangeManager 注入）
+        self.book_queue = None      # L2 深度队列（BookSnapshot，由 ExchangeManager 注入；None 表示不输出）
+        self.books = {}             # 交易所 symbol → OrderBook（深度频道的连接器维护）
+        self.capture = None         # 原始帧录制（FrameWriter，start_capture 开启）
+        self.book_depth = ORDER_BOOK_DEPTH
         self._stop = False
         self._ws_alive = True
         self.retries = 0
         self.max_retries = max_retries
+        self.reconnect = reconnect_policy or ReconnectPolicy(max_retries=max_retries)
+        self._last_frame_at = None
+        self._connected_at = None
+        self._frame_recv_ns = None  # 当前帧的接收时间（monotonic 纳秒 / 墙钟毫秒），emit 时写入行情
+        self._frame_recv_ms = None
+        limits = SUBSCRIBE_LIMITS.get(exchange, SUBSCRIBE_LIMITS["default"])
+        self.subscribe_batch = limits.get("batch")
+        self.subscribe_bucket = TokenBucket(limits["rate"], limits.get("burst", 1))
+        self.subscription_tracker = SubscriptionTracker()
+        self.topic_silent_after = TOPIC_SILENT_SECONDS.get(exchange, TOPIC_SILENT_SECONDS.get("default"))
+        self._topic_requests = {}   # topic（通用 symbol）→ SubscriptionRequest，用于单独重新订阅
+        self._request_topics = {}   # 订阅消息 req_id → [topic]，用于按 id 回执确认
+        self._req_id = 0
+        self.decode = make_decoder(decoder, self.message_type)
+        self.decompressor = FrameDecompressor(compression, streaming=stream_compression)
 
-        # 设置日志系统
-        self.logger = logging.getLogger(exchange)
-        self.logger.setLevel(logging.DEBUG)
-        formatter = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
+        # 每个连接的收包统计
+        self.frames = 0
+        self.frame_bytes = 0
+        self._rate_at = time.monotonic()
+        self._rate_frames = 0
 
-        log_filename = f"{log_prefix}_{exchange}_{log_dt}.txt"
+        # 设置日志系统：日志进入队列，由后台线程统一写文件 / 回显
+        self.logger = get_exchange_logger(exchange)
+        self.log_throttle = LogThrottle(log_throttle_sec)
 
-        if log_filename:
-            fh = logging.FileHandler(log_filename, encoding='utf-8')
-            fh.setFormatter(formatter)
-            self.logger.addHandler(fh)
-        else:
-            sh = logging.StreamHandler()
-            sh.setFormatter(formatter)
-            self.logger.addHandler(sh)
+    @classmethod
+    def create_group(cls, exchange: str, symbols: list, queue=None, connections: int = 1,
+                     max_topics: int = None, **kwargs) -> list:
+        # 把 symbol 列表分到 K 个连接上：K 取 connections 与 按单连接 topic 上限算出的数量 中较大者
+        # 每个连接是独立的 Connector（各自的 receive loop / 重连），输出到同一个队列
+        symbols = list(symbols or [])
+        count = max(1, connections or 1)
+        if max_topics:
+            count = max(count, math.ceil(len(symbols) / max_topics))
+        count = max(1, min(count, len(symbols) or 1))
+        if count == 1:
+            return [cls(exchange=exchange, symbols=symbols, queue=queue, **kwargs)]
+
+        group = []
+        for i in range(count):
+            conn = cls(exchange=exchange, symbols=symbols[i::count], queue=queue, **kwargs)
+            conn.label = f"{exchange}#{i}"
+            group.append(conn)
+        return group
 
     @abstractmethod
     async def connect(self): pass
@@ -83,6 +120,148 @@ class BaseAsyncConnector(ABC):
     @abstractmethod
     async def handle_message(self, data): pass
 
+    async def emit(self, snapshot):
+        # 连接器统一出口：先原地更新最新盘口缓存，再进入行情队列
+        if self.top_cache is not None:
+            self.top_cache.update(snapshot)
+        # 延迟统计：所在帧的接收时间 + 解析完成时间
+        parsed_ns = time.monotonic_ns()
+        snapshot.recv_ns = self._frame_recv_ns
+        snapshot.recv_ms = self._frame_recv_ms
+        snapshot.parsed_ns = parsed_ns
+        # 记录每个 topic 最近一次行情时间；未确认的 topic 收到行情即视为订阅成功
+        tracker = self.subscription_tracker
+        now = parsed_ns / 1e9
+        if isinstance(snapshot, MarketSnapshotBatch):
+            for topic in snapshot.raw_symbols:
+                tracker.touch(topic, now)
+        else:
+            tracker.touch(snapshot.raw_symbol, now)
+        if self.queue:
+            await self.queue.put(snapshot)
+
+    def get_book(self, symbol: str, raw_symbol: str = None) -> OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(self.exchange_name, symbol, raw_symbol)
+        return book
+
+    async def emit_book(self, book: OrderBook, timestamp=None):
+        # 深度频道统一出口：一档行情照常走 emit；注入了 book_queue 时再输出前 book_depth 档
+        snapshot = book.to_market_snapshot(timestamp)
+        await self.emit(snapshot)
+        if self.book_queue is not None:
+            depth = book.to_snapshot(self.book_depth)
+            depth.recv_ns = snapshot.recv_ns
+            depth.recv_ms = snapshot.recv_ms
+            depth.parsed_ns = snapshot.parsed_ns
+            await self.book_queue.put(depth)
+
+    def book_stats(self) -> dict:
+        # 所有订单簿的汇总：未同步数量、丢包 / 过期 / 交叉次数
+        totals = {"books": len(self.books), "unsynced": 0, "gaps": 0, "stale": 0, "crossed": 0, "deltas": 0,
+                  "resync_timeouts": 0}
+        for book in self.books.values():
+            totals["unsynced"] += not book.synced
+            totals["gaps"] += book.gaps
+            totals["stale"] += book.stale
+            totals["crossed"] += book.crossed
+            totals["deltas"] += book.deltas
+            totals["resync_timeouts"] += book.resync_timeouts
+        return totals
+
+    def _topic(self, request) -> str:
+        return getattr(self, "symbol_map", {}).get(request.symbol, request.symbol)
+
+    def track_subscriptions(self, requests: list):
+        # 新连接开始一轮订阅：所有 topic 置为 pending
+        self._topic_requests = {self._topic(req): req for req in requests}
+        self._request_topics = {}
+        self.subscription_tracker.start(self._topic_requests)
+
+    async def send_subscriptions(self, requests: list, build_msg):
+        # 按 subscribe_batch 把订阅请求打包，每条消息先从令牌桶取令牌再发送（代替固定 sleep）
+        # build_msg(batch, req_id) → dict，batch 为 SubscriptionRequest 列表，req_id 在连接内递增
+        self.track_subscriptions(requests)
+        count = await self._send_batches(requests, build_msg)
+        self.subscription_tracker.all_sent()
+        self.log(f"📨 已发送 {count} 条订阅消息，共 {len(requests)} 个 topic，"
+                 f"用时 {self.subscription_tracker.sent_sec:.2f}s")
+
+    async def _send_batches(self, requests: list, build_msg, track: bool = True) -> int:
+        size = self.subscribe_batch or len(requests) or 1
+        batches = [requests[i:i + size] for i in range(0, len(requests), size)]
+        for batch in batches:
+            await self.subscribe_bucket.acquire()
+            self._req_id += 1
+            if track:
+                self._request_topics[self._req_id] = [self._topic(req) for req in batch]
+            msg = build_msg(batch, self._req_id)
+            await self.ws.send(json.dumps(msg))
+            self.subscription_tracker.sent()
+            self.log(f"📨 订阅: {msg}", level="DEBUG")
+        return len(batches)
+
+    async def send_request(self, msg: dict) -> bool:
+        # 订阅以外的请求（如深度快照）与订阅共用令牌桶；没有令牌时不等待（不阻塞接收循环），返回 False 由调用方稍后重试
+        if not self.subscribe_bucket.try_acquire():
+            return False
+        await self.ws.send(json.dumps(msg))
+        return True
+
+    async def resubscribe(self, topics: list):
+        # 只对指定 topic 退订再订阅，不断开整条连接；协议没有单独退订（无 build_unsub_msg）时直接重新订阅
+        requests = [self._topic_requests[t] for t in topics if t in self._topic_requests]
+        if not requests:
+            return
+        build_unsub = getattr(self, "build_unsub_msg", None)
+        if build_unsub is not None:
+            await self._send_batches(requests, build_unsub, track=False)
+        await self._send_batches(requests, self.build_sub_msg)
+
+    def confirm_topics(self, symbols):
+        # 交易所订阅回执：symbols 为交易所格式
+        symbol_map = getattr(self, "symbol_map", {})
+        for symbol in symbols:
+            self.subscription_tracker.ack(symbol_map.get(symbol, symbol))
+
+    def reject_topics(self, symbols, reason):
+        symbol_map = getattr(self, "symbol_map", {})
+        for symbol in symbols:
+            self.subscription_tracker.reject(symbol_map.get(symbol, symbol), reason)
+        self.log(f"❌ 订阅被拒绝: {list(symbols)[:10]} → {_truncate(reason)}", level="WARNING")
+
+    def _topics_for_request(self, req_id):
+        try:
+            return self._request_topics.get(int(str(req_id).rsplit("-", 1)[-1]), [])
+        except ValueError:
+            return []
+
+    def confirm_request(self, req_id):
+        # 只回 id 的协议：按发送时记录的 req_id → topic 确认
+        for topic in self._topics_for_request(req_id):
+            self.subscription_tracker.ack(topic)
+
+    def reject_request(self, req_id, reason):
+        topics = self._topics_for_request(req_id)
+        for topic in topics:
+            self.subscription_tracker.reject(topic, reason)
+        self.log(f"❌ 订阅请求 {req_id} 被拒绝: {topics[:10]} → {_truncate(reason)}", level="WARNING")
+
+    async def _topic_watchdog(self):
+        # 单个 topic 假死检测：连接正常但某个 symbol 长时间无行情时，只重新订阅这些 topic
+        silent_after = self.topic_silent_after
+        if not silent_after:
+            return
+        interval = min(silent_after / 4, 30.0)
+        while True:
+            await asyncio.sleep(interval)
+            topics = self.subscription_tracker.find_silent(time.monotonic(), silent_after, TOPIC_MAX_RESUBSCRIBE)
+            if topics:
+                self.log(f"⚠️ {len(topics)} 个 topic 超过 {silent_after}s 无行情，重新订阅: {topics[:10]}",
+                         level="WARNING")
+                await self.resubscribe(topics)
+
     async def keep_alive(self):
         if not self.ping_payload:
             return
@@ -96,7 +275,7 @@ class BaseAsyncConnector(ABC):
                         else self.ping_payload
                     )
                     await self.ws.send(payload)
-                    self.log(f"🔁 发送心跳: {payload}")
+                    self.log_throttled("heartbeat", "🔁 发送心跳: {}", payload)
                 await asyncio.sleep(self.ping_interval)
             except Exception as e:
                 self._ws_alive = False
@@ -106,42 +285,89 @@ class BaseAsyncConnector(ABC):
     async def receive_loop(self):
         try:
             async for raw in self.ws:
-                try:
-                    if isinstance(raw, bytes):
-                        raw = self._decompress(raw)
-                    data = json.loads(raw)
-                    await self.handle_message(data)
-                    
-                except Exception as e:
-                    self.log(f"消息解析失败: {e} | raw: {raw}", level="WARNING")
-                    
+                recv_ns = time.monotonic_ns()
+                now = recv_ns / 1e9
+                if self._last_frame_at is None:
+                    self.reconnect.on_message(now)
+                self._last_frame_at = now
+                if self.capture is not None:
+                    self.capture.write(recv_ns, raw)
+                await self._process_frame(raw, recv_ns, time.time_ns() // 1_000_000)
+
         except Exception as e:
             self.log(f"接收循环异常: {e}", level="ERROR")
             raise
 
-    def _decompress(self, raw: bytes) -> str:
+    async def _process_frame(self, raw, recv_ns: int, recv_ms: int):
+        # 单帧处理：解压 → 解码 → handle_message；回放（utils/replay.py）直接调用这里
+        self._frame_recv_ns = recv_ns
+        self._frame_recv_ms = recv_ms
+        self.frames += 1
+        self.frame_bytes += len(raw)
         try:
-            if self.compression == "gzip":
-                return gzip.decompress(raw).decode("utf-8")
-            elif self.compression == "zlib":
-                return zlib.decompress(raw).decode("utf-8")
-            return raw.decode("utf-8")
-        except Exception:
-            return ""
+            payload = self._decompress(raw) if isinstance(raw, bytes) else raw
+            data = self.decode(payload)
+            await self.handle_message(data)
+
+        except DecompressionError as e:
+            self.log_throttled("decompress_error", "{} | raw: {}", e, preview(raw), level="WARNING")
+        except Exception as e:
+            self.log_throttled("parse_error", "消息解析失败: {} | raw: {}", e, preview(raw), level="WARNING")
+
+    def start_capture(self, path: str, max_bytes: int = None):
+        # 录制本连接收到的所有原始帧；文件头记下回放需要的 symbol 列表和压缩方式
+        symbols = list(getattr(self, "symbol_map", {}).values())
+        self.capture = FrameWriter(path, {
+            "exchange": self.exchange_name,
+            "label": self.label,
+            "compression": self.compression,
+            "stream_compression": self.decompressor.streaming,
+            "symbols": symbols,
+        }, max_bytes=max_bytes)
+        self.log(f"🎙️ 录制原始帧 → {path}")
+
+    def _decompress(self, raw: bytes) -> bytes:
+        # 只解压不解码，JSON 解码器直接处理 bytes；失败抛 DecompressionError
+        return self.decompressor.decompress(raw)
 
     def log(self, message: str, level="INFO"):
-        print(f"[{self.exchange_name}] {message}")
-        if level == "INFO":
-            self.logger.info(f"[{self.exchange_name}] {message}")
-        elif level == "WARNING":
-            self.logger.warning(f"[{self.exchange_name}] {message}")
-        elif level == "ERROR":
-            self.logger.error(f"[{self.exchange_name}] {message}")
-        else:
-            self.logger.debug(f"[{self.exchange_name}] {message}")
+        self.logger.log(_LEVELS.get(level, logging.DEBUG), f"[{self.label}] {message}")
+
+    def log_throttled(self, key: str, template: str, *args, level="INFO"):
+        # 同一 key 每个周期只输出一条，参数截断后再格式化；被省略的条数附在下一条后面
+        levelno = _LEVELS.get(level, logging.DEBUG)
+        if not self.logger.isEnabledFor(levelno):
+            self.log_throttle.counts[key] = self.log_throttle.counts.get(key, 0) + 1
+            return
+        suppressed = self.log_throttle.allow(key)
+        if suppressed is None:
+            return
+        message = template.format(*(_truncate(a) for a in args))
+        if suppressed:
+            message += f"（期间省略 {suppressed} 条，累计 {self.log_throttle.counts[key]} 条）"
+        self.logger.log(levelno, f"[{self.label}] {message}")
+
+    def message_stats(self) -> dict:
+        # frames_per_sec 为距上次调用以来的平均值
+        now = time.monotonic()
+        elapsed = now - self._rate_at
+        rate = (self.frames - self._rate_frames) / elapsed if elapsed > 0 else 0.0
+        self._rate_at, self._rate_frames = now, self.frames
+        return {
+            "exchange": self.exchange_name,
+            "topics": len(getattr(self, "subscriptions", None) or getattr(self, "raw_symbols", [])),
+            "frames": self.frames,
+            "bytes": self.frame_bytes,
+            "frames_per_sec": round(rate, 1),
+            "reconnect": self.reconnect.stats(),
+            "subscription": self.subscription_tracker.stats(),
+            "books": self.book_stats() if self.books else None,
+        }
 
     def stop(self):
         self._stop = True
+        if self.capture is not None:
+            self.capture.close()
         if self.ws:
             asyncio.create_task(self.ws.close())
 
@@ -152,28 +378,82 @@ class BaseAsyncConnector(ABC):
         self.log("WebSocket 已断开")
 
     async def run_forever(self):
+        policy = self.reconnect
         while not self._stop:
-            try:
-                self.retries += 1
-                if self.retries > self.max_retries:
-                    self.log("超过最大重连次数, 终止", level="ERROR")
+            if policy.exhausted:
+                if policy.cooldown is None:
+                    self.log(f"连续失败 {policy.failures} 次, 终止", level="ERROR")
                     break
+                self.log(f"连续失败 {policy.failures} 次, 冷却 {policy.cooldown}s 后重试", level="ERROR")
+                await asyncio.sleep(policy.cooldown)
+                policy.reset_budget()
+                continue
 
+            stale = False
+            try:
                 await self._run_once()
+            except StaleDataError as e:
+                stale = True
+                self.log(f"⚠️ {e}, 主动重连", level="WARNING")
             except Exception as e:
                 self.log(f"异常: {e}", level="ERROR")
-                await self.on_disconnected()
-                await asyncio.sleep(1)
+
+            if self._stop:
+                break
+            policy.on_disconnected(stale)
+            self.retries = policy.failures
+            await self.on_disconnected()
+            delay = policy.next_delay()
+            self.log(f"{delay:.1f}s 后重连（连续失败 {policy.failures} 次）")
+            await asyncio.sleep(delay)
+
+    async def _watchdog(self):
+        # 假死检测：连接还在但长时间收不到任何数据（包括心跳回包）时抛 StaleDataError
+        stale_after = self.reconnect.stale_after
+        if not stale_after:
+            await asyncio.Event().wait()
+        interval = min(stale_after / 4, 5.0)
+        while True:
+            await asyncio.sleep(interval)
+            idle = time.monotonic() - (self._last_frame_at or self._connected_at)
+            if idle > stale_after:
+                raise StaleDataError(f"{idle:.1f}s 未收到数据")
+
+    def reset_session(self):
+        # 新连接（或回放中的会话标记）：解压上下文、订单簿都从头开始
+        self.decompressor.reset()
+        self._last_frame_at = None
+        for book in self.books.values():
+            book.clear()    # 新连接重新从快照开始
 
     async def _run_once(self):
+        self.reset_session()
         await self.connect()
+        self._connected_at = time.monotonic()
+        if self.capture is not None:
+            self.capture.write_session(time.monotonic_ns(), {"label": self.label})
+        self.reconnect.on_connected()
         await self.on_connected()
-        await self.subscribe()
 
-        await asyncio.gather(
-            self.receive_loop(),
-            self.keep_alive()
-        )
+        tasks = []
+        try:
+            await self.subscribe()
+            receiver = asyncio.create_task(self.receive_loop())
+            watchdog = asyncio.create_task(self._watchdog())
+            tasks = [receiver, watchdog, asyncio.create_task(self.keep_alive()),
+                     asyncio.create_task(self._topic_watchdog())]
+            # 接收循环结束（断线）或看门狗报警，任一发生即结束本次会话
+            done, _ = await asyncio.wait({receiver, watchdog}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.ws:
+                await self.ws.close()
+            if self.capture is not None:
+                self.capture.flush()
 
     async def run(self):
         await self.run_forever()
\ No newline at end of file
@@ -21,13 +21,31 @@ class Connector(BaseAsyncConnector):
 
         self.formatted_symbols = [self.format_symbol(s) for s in self.raw_symbols]
         self.symbol_map = {self.format_symbol(s): s for s in self.raw_symbols}
+        self.subscriptions = [
+            SubscriptionRequest(symbol=sym, channel="ticker")
+            for sym in self.formatted_symbols
+        ]
 
         streams = [f"{sym}@ticker" for sym in self.formatted_symbols]
-        self.ws_url = ws_url or f"wss://stream.binance.com:9443/stream?streams={'/'.join(streams)}"
+        base_url = WS_ENDPOINTS.get(exchange, "wss://stream.binance.com:9443")
+        self.ws_url = ws_url or f"{base_url}/stream?streams={'/'.join(streams)}"
 
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.lower().replace("-", "")
 
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
+        # 组合流连接上也可以动态订阅，只在单独重新订阅时使用（方法名必须大写）
+        return {
+            "method": "SUBSCRIBE",
+            "params": [f"{req.symbol}@{req.channel}" for req in batch],
+            "id": req_id
+        }
+
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["method"] = "UNSUBSCRIBE"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(
             self.ws_url,
@@ -36,12 +54,22 @@ class Connector(BaseAsyncConnector):
         self.log(f"✅ Binance WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        # Binance 组合流已经在 URL 里订阅，不用发送订阅消息
+        # Binance 组合流已经在 URL 里订阅，不用发送订阅消息；连上即视为全部已发送
+        self.track_subscriptions(self.subscriptions)
+        self.subscription_tracker.all_sent()
         self.log("📡 Binance 使用组合流，不需要发送订阅消息。")
 
     async def handle_message(self, data):
         # 组合流数据格式:
         # {"stream": "btcusdt@ticker", "data": {...ticker_data...}}
+        # 动态订阅回执：{"result":null,"id":1} / {"error":{"code":2,"msg":"..."},"id":1}
+        if "id" in data and ("result" in data or "error" in data):
+            if data.get("error"):
+                self.reject_request(data["id"], data["error"])
+            else:
+                self.confirm_request(data["id"])
+            return
+
         payload = data.get("data")
         if not payload:
             return
@@ -70,8 +98,7 @@ class Connector(BaseAsyncConnector):
             timestamp=timestamp
         )
 
-        if self.queue:
-            await self.queue.put(snapshot)
+        await self.emit(snapshot)
 
     async def run(self):
         await self.run_forever()
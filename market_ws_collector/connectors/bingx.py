@@ -1,11 +1,9 @@
-import json
 import time
 import websockets
 import gzip
-import asyncio
 
 from config import DEFAULT_SYMBOLS, WS_ENDPOINTS
-from models.base import SubscriptionRequest, MarketSnapshot
+from models.base import SubscriptionRequest
 from connectors.base import BaseAsyncConnector
 
 
@@ -34,53 +32,48 @@ class Connector(BaseAsyncConnector):
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.upper()
 
-    def build_sub_msg(self, request: SubscriptionRequest, index: int) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
+        # 每条消息只能订阅一个 dataType
         return {
-            "id": f"depth-{index+1}",
+            "id": f"depth-{req_id}",
             "reqType": "sub",
-            "dataType": f"{request.symbol}@depth20"
+            "dataType": f"{batch[0].symbol}@depth20"
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["reqType"] = "unsub"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url)
         self.log(f"✅ BingX WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        for i, req in enumerate(self.subscriptions):
-            msg = self.build_sub_msg(req, i)
-            await self.ws.send(json.dumps(msg))
-            self.log(f"📨 已订阅: {msg['dataType']}")
-            await asyncio.sleep(0.05)
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
+        # 订阅回执：{"id":"depth-1","code":0,"msg":"","data":null}
+        if "id" in data and "code" in data and not data.get("data"):
+            if data["code"] == 0:
+                self.confirm_request(data["id"])
+            else:
+                self.reject_request(data["id"], data.get("msg") or data["code"])
+            return
+
         # 判断是否是深度数据
         if "data" in data and "bids" in data["data"] and "asks" in data["data"]:
             symbol_full = data.get("dataType", "").split("@")[0]
             raw_symbol = self.symbol_map.get(symbol_full, symbol_full)
 
-            bids = data["data"].get("bids", [])
-            asks = data["data"].get("asks", [])
-
-            bid1, bid_vol1 = map(float, bids[0]) if bids else (0.0, 0.0)
-            ask1, ask_vol1 = map(float, asks[-1]) if asks else (0.0, 0.0)
-
             ts = data["data"].get("ts") or data.get("ts") or int(time.time() * 1000)
 
-            snapshot = MarketSnapshot(
-                exchange=self.exchange_name,
-                symbol=symbol_full,
-                raw_symbol=raw_symbol,
-                bid1=bid1,
-                ask1=ask1,
-                bid_vol1=bid_vol1,
-                ask_vol1=ask_vol1,
-                timestamp=int(ts)
-            )
-
-            if self.queue:
-                await self.queue.put(snapshot)
+            # @depth20 每次推送完整的前 20 档（asks 按价格从高到低排列，OrderBook 会重新排序）
+            book = self.get_book(symbol_full, raw_symbol)
+            book.apply_snapshot(data["data"].get("bids", []), data["data"].get("asks", []), timestamp=int(ts))
+            await self.emit_book(book)
         elif any(k in str(data).lower() for k in self.pong_keywords):
-            self.log("🔁 收到 pong 回复")
+            self.log_throttled("pong", "🔁 收到 pong 回复")
         else:
             pass  # 可选打印其他信息
 
@@ -1,12 +1,11 @@
 import asyncio
-import json
 import time
 import websockets
 
 
 
 from config import DEFAULT_SYMBOLS, WS_ENDPOINTS
-from models.base import SubscriptionRequest, MarketSnapshot
+from models.base import SubscriptionRequest
 from connectors.base import BaseAsyncConnector
 
 
@@ -36,7 +35,7 @@ class Connector(BaseAsyncConnector):
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.replace("-", "").upper()
 
-    def build_sub_msg(self) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
         return {
             "op": "subscribe",
             "args": [
@@ -44,44 +43,39 @@ class Connector(BaseAsyncConnector):
                     "instType": "USDT-FUTURES",
                     "channel": "books5",
                     "instId": req.symbol
-                } for req in self.subscriptions
+                } for req in batch
             ]
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["op"] = "unsubscribe"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url)
         self.log(f"✅ Bitget WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        msg = self.build_sub_msg()
-        await self.ws.send(json.dumps(msg))
-        self.log(f"📨 已发送订阅请求: {msg}")
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         if "data" in data and "arg" in data:
             symbol = data["arg"].get("instId", "unknown")
             raw_symbol = self.symbol_map.get(symbol, symbol)
             orderbook = data["data"][0]
-            bids = orderbook.get("bids", [])
-            asks = orderbook.get("asks", [])
-
-            bid1, bid_vol1 = map(float, bids[0]) if bids else (0.0, 0.0)
-            ask1, ask_vol1 = map(float, asks[0]) if asks else (0.0, 0.0)
             timestamp = int(time.time() * 1000)
 
-            snapshot = MarketSnapshot(
-                exchange=self.exchange_name,
-                symbol=symbol,
-                raw_symbol=raw_symbol,
-                bid1=bid1,
-                ask1=ask1,
-                bid_vol1=bid_vol1,
-                ask_vol1=ask_vol1,
-                timestamp=timestamp
-            )
-
-            if self.queue:
-                await self.queue.put(snapshot)
+            # books5 每次推送完整的前 5 档，带递增的 seq
+            seq = orderbook.get("seq")
+            book = self.get_book(symbol, raw_symbol)
+            if book.apply_snapshot(orderbook.get("bids", []), orderbook.get("asks", []),
+                                   seq=int(seq) if seq is not None else None, timestamp=timestamp):
+                await self.emit_book(book)
+        elif data.get("event") == "subscribe":
+            self.confirm_topics([data.get("arg", {}).get("instId")])
+        elif data.get("event") == "error":
+            self.reject_topics([data.get("arg", {}).get("instId")], data.get("msg") or data.get("code"))
 
     async def run(self):
         await self.run_forever()
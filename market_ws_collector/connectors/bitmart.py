@@ -1,5 +1,4 @@
 import asyncio
-import json
 import time
 import websockets
 
@@ -34,20 +33,23 @@ class Connector(BaseAsyncConnector):
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.replace("-", "").upper()
 
-    def build_sub_msg(self) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
         return {
             "action": "subscribe",
-            "args": [f"futures/ticker:{req.symbol}" for req in self.subscriptions]
+            "args": [f"futures/ticker:{req.symbol}" for req in batch]
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["action"] = "unsubscribe"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url)
         self.log(f"✅ BitMart WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        msg = self.build_sub_msg()
-        await self.ws.send(json.dumps(msg))
-        self.log(f"📨 已发送订阅请求: {msg}")
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         if isinstance(data, dict) and "data" in data and isinstance(data["data"], dict):
@@ -79,8 +81,14 @@ class Connector(BaseAsyncConnector):
                 timestamp=timestamp
             )
 
-            if self.queue:
-                await self.queue.put(snapshot)
+            await self.emit(snapshot)
+        elif isinstance(data, dict) and data.get("action") == "subscribe":
+            # 订阅回执：{"action":"subscribe","group":"futures/ticker:BTCUSDT","success":true}
+            symbol = str(data.get("group", "")).partition(":")[2]
+            if data.get("success"):
+                self.confirm_topics([symbol])
+            else:
+                self.reject_topics([symbol], data.get("error"))
         else:
             self.log(f"⚠️ 无效数据格式: {data}", level="WARNING")
 
@@ -1,11 +1,10 @@
 import asyncio
-import json
 import time
 import websockets
 import re
 
 from config import DEFAULT_SYMBOLS, WS_ENDPOINTS
-from models.base import SubscriptionRequest, MarketSnapshot
+from models.base import SubscriptionRequest, MarketSnapshotBatch
 from connectors.base import BaseAsyncConnector
 
 
@@ -31,24 +30,30 @@ class Connector(BaseAsyncConnector):
         symbol = re.sub(r"USDT$", "USD", symbol)
         return symbol
 
-    def build_sub_msg(self) -> dict:
-        args = [f"quote:{req.symbol}" for req in self.subscriptions]
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
+        args = [f"quote:{req.symbol}" for req in batch]
         return {
             "op": "subscribe",
             "args": args
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["op"] = "unsubscribe"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url)
         self.log(f"✅ BitMEX WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        msg = self.build_sub_msg()
-        await self.ws.send(json.dumps(msg))
-        self.log(f"📨 已发送订阅请求: {msg}")
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         if data.get("table") == "quote" and "data" in data:
+            # 一帧可能带多个 symbol 的报价，整帧打包入队一次
+            batch = MarketSnapshotBatch(self.exchange_name)
+            timestamp = int(time.time() * 1000)
             for item in data["data"]:
                 symbol = item.get("symbol")
                 raw_symbol = self.symbol_map.get(symbol, symbol)
@@ -62,23 +67,19 @@ class Connector(BaseAsyncConnector):
                     self.log(f"⚠️ 数据解析失败: {e}", level="WARNING")
                     continue
 
-                timestamp = int(time.time() * 1000)
-
-                snapshot = MarketSnapshot(
-                    exchange=self.exchange_name,
-                    symbol=symbol,
-                    raw_symbol=raw_symbol,
-                    bid1=bid1,
-                    ask1=ask1,
-                    bid_vol1=bid_vol1,
-                    ask_vol1=ask_vol1,
-                    timestamp=timestamp
-                )
+                batch.append(symbol, bid1, ask1, timestamp,
+                             bid_vol1=bid_vol1, ask_vol1=ask_vol1, raw_symbol=raw_symbol)
 
-                if self.queue:
-                    await self.queue.put(snapshot)
+            if len(batch):
+                await self.emit(batch)
+        elif "subscribe" in data:
+            # 订阅回执：{"success":true,"subscribe":"quote:XBTUSDT"}
+            self.confirm_topics([data["subscribe"].partition(":")[2]])
+        elif "error" in data and data.get("request", {}).get("op") == "subscribe":
+            args = data["request"].get("args", [])
+            self.reject_topics([arg.partition(":")[2] for arg in args], data["error"])
         else:
-            self.log(f"未知消息格式: {data}", level="WARNING")
+            self.log_throttled("unhandled", "未知消息格式: {}", data, level="WARNING")
 
     async def run(self):
         await self.run_forever()
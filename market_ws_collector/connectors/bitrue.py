@@ -1,11 +1,10 @@
-import asyncio
 import json
 import time
 import gzip
 import websockets
 
 from config import DEFAULT_SYMBOLS, WS_ENDPOINTS
-from models.base import SubscriptionRequest, MarketSnapshot
+from models.base import SubscriptionRequest
 from connectors.base import BaseAsyncConnector
 
 class Connector(BaseAsyncConnector):
@@ -32,7 +31,9 @@ class Connector(BaseAsyncConnector):
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.lower().replace("-", "")
 
-    def build_sub_msg(self, symbol: str) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
+        # 每条消息只能订阅一个 channel
+        symbol = batch[0].symbol
         return {
             "event": "sub",
             "params": {
@@ -41,16 +42,17 @@ class Connector(BaseAsyncConnector):
             }
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["event"] = "unsub"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url)
         self.log(f"✅ Bitrue WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        for req in self.subscriptions:
-            sub_msg = self.build_sub_msg(req.symbol)
-            await self.ws.send(json.dumps(sub_msg))
-            self.log(f"📨 已订阅: market_{req.symbol}_depth_step0")
-            await asyncio.sleep(0.1)
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         if "ping" in data:
@@ -58,7 +60,7 @@ class Connector(BaseAsyncConnector):
             pong_msg = {"pong": data["ping"]}
             await self.ws.send(json.dumps(pong_msg))
             
-            self.log(f"🔁 收到 ping → 已发送 pong: {pong_msg}")
+            self.log_throttled("ping", "🔁 收到 ping → 已发送 pong: {}", pong_msg)
             return
         
         if "channel" in data and "tick" in data:
@@ -66,27 +68,19 @@ class Connector(BaseAsyncConnector):
             symbol = channel.replace("market_", "").replace("_depth_step0", "")
             raw_symbol = self.symbol_map.get(symbol, symbol)
 
-            bids = data["tick"].get("buys", [])
-            asks = data["tick"].get("asks", [])
-
-            bid1, bid_vol1 = map(float, bids[0][:2]) if bids else (0.0, 0.0)
-            ask1, ask_vol1 = map(float, asks[0][:2]) if asks else (0.0, 0.0)
             timestamp = int(data.get("ts", time.time() * 1000))
 
-            snapshot = MarketSnapshot(
-                exchange=self.exchange_name,
-                symbol=symbol,
-                raw_symbol=raw_symbol,
-                bid1=bid1,
-                ask1=ask1,
-                bid_vol1=bid_vol1,
-                ask_vol1=ask_vol1,
-                timestamp=timestamp
-            )
-
-            if self.queue:
-                await self.queue.put(snapshot)
+            # depth_step0 每次推送完整深度，买盘字段名为 buys
+            book = self.get_book(symbol, raw_symbol)
+            book.apply_snapshot(data["tick"].get("buys", []), data["tick"].get("asks", []), timestamp=timestamp)
+            await self.emit_book(book)
+        elif data.get("event_rep") == "subed":
+            # 订阅回执：{"event_rep":"subed","channel":"market_btcusdt_depth_step0","cb_id":"btcusdt","status":"ok"}
+            if data.get("status") == "ok":
+                self.confirm_topics([data.get("cb_id")])
+            else:
+                self.reject_topics([data.get("cb_id")], data.get("status"))
         else:
-            self.log(f"未知消息格式: {data}", level="DEBUG")
+            self.log_throttled("unhandled", "未知消息格式: {}", data, level="DEBUG")
 
     # run由基类统一管理，不再重写
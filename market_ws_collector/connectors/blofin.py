@@ -1,5 +1,4 @@
-import asyncio
-import json
+import re
 import time
 import websockets
 
@@ -33,28 +32,29 @@ class Connector(BaseAsyncConnector):
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.upper()
 
-    def build_sub_msg(self, symbol: str) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
         return {
             "op": "subscribe",
             "args": [
                 {
                     "channel": "tickers",
                     "instType": "CONTRACT",
-                    "instId": symbol
-                }
+                    "instId": req.symbol
+                } for req in batch
             ]
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["op"] = "unsubscribe"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url)
         self.log(f"✅ BloFin WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        for req in self.subscriptions:
-            msg = self.build_sub_msg(req.symbol)
-            await self.ws.send(json.dumps(msg))
-            self.log(f"📨 已订阅: tickers → {req.symbol}")
-            await asyncio.sleep(0.1)
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         if "arg" in data and "data" in data:
@@ -82,5 +82,15 @@ class Connector(BaseAsyncConnector):
                 timestamp=ts
             )
 
-            if self.queue:
-                await self.queue.put(snapshot)
+            await self.emit(snapshot)
+        elif data.get("event") == "subscribe":
+            self.confirm_topics([data.get("arg", {}).get("instId")])
+        elif data.get("event") == "error":
+            # 错误回执可能带 arg；不带时与 OKX 一样从 msg 里找 instId
+            msg = data.get("msg") or data.get("code")
+            symbol = data.get("arg", {}).get("instId")
+            match = None if symbol else re.search(r"instId:([\w-]+)", str(msg))
+            if symbol or match:
+                self.reject_topics([symbol or match.group(1)], msg)
+            else:
+                self.log(f"❌ 错误回执: {data}", level="WARNING")
@@ -1,5 +1,3 @@
-import asyncio
-import json
 import time
 import websockets
 
@@ -28,22 +26,25 @@ class Connector(BaseAsyncConnector):
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.replace("-", "").upper()
 
-    def build_sub_msg(self) -> dict:
-        args = [f"tickers.{req.symbol}" for req in self.subscriptions]
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
+        args = [f"tickers.{req.symbol}" for req in batch]
         return {
+            "req_id": str(req_id),
             "op": "subscribe",
             "args": args
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["op"] = "unsubscribe"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url)
         self.log(f"✅ Bybit WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        msg = self.build_sub_msg()
-        await self.ws.send(json.dumps(msg))
-        self.log(f"📨 已发送订阅: {msg}")
-        await asyncio.sleep(0.1)
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         if "data" in data and "topic" in data:
@@ -71,5 +72,9 @@ class Connector(BaseAsyncConnector):
                 timestamp=ts
             )
 
-            if self.queue:
-                await self.queue.put(snapshot)
+            await self.emit(snapshot)
+        elif data.get("op") == "subscribe":
+            if data.get("success"):
+                self.confirm_request(data.get("req_id"))
+            else:
+                self.reject_request(data.get("req_id"), data.get("ret_msg"))
@@ -0,0 +1,114 @@
+# connectors/capture.py
+#
+# 原始帧录制文件（每个连接一个 .cap 文件），用于离线回放 / 解析基准：
+#   文件头：MAGIC(8) + 头长度(uint32) + 头 JSON（exchange / label / compression / symbols / 开始时间）
+#   每帧：接收时间 monotonic 纳秒(int64) + 帧长度(uint32) + 类型(uint8，0=文本 1=二进制 2=会话标记) + 帧内容
+#   会话标记：每次建立连接时写一条（内容为 JSON），回放遇到它时像重连一样重置解压上下文和订单簿
+# 所有整数小端；帧内容是 websocket 收到的原样数据（压缩帧不解压），追加写入，进程崩溃最多丢最后一段缓冲
+
+import json
+import os
+import struct
+import time
+
+MAGIC = b"MWSCAP01"
+_HEADER_LEN = struct.Struct("<I")
+_FRAME = struct.Struct("<qIB")
+TEXT = 0
+BINARY = 1
+SESSION = 2
+
+
+class SessionStart:
+    # read_frames 返回的会话标记（代替帧内容）
+    __slots__ = ("info",)
+
+    def __init__(self, info: dict):
+        self.info = info
+
+
+class CaptureFormatError(Exception):
+    pass
+
+
+class FrameWriter:
+    def __init__(self, path: str, header: dict, max_bytes: int = None, buffer_size: int = 1 << 20):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.frames = 0
+        self.bytes = 0
+        self.full = False           # 达到 max_bytes 后停止录制
+        self._file = open(path, "ab", buffering=buffer_size)
+        if self._file.tell() == 0:
+            # 新文件才写文件头；已有文件继续追加（同一连接多次启动）
+            header = dict(header, started_ms=time.time_ns() // 1_000_000, started_ns=time.monotonic_ns())
+            body = json.dumps(header, ensure_ascii=False).encode("utf-8")
+            self._file.write(MAGIC + _HEADER_LEN.pack(len(body)) + body)
+        self.bytes = self._file.tell()
+
+    def write(self, recv_ns: int, raw, kind: int = None):
+        if self.full or self._file.closed:
+            return
+        if isinstance(raw, str):
+            kind, raw = TEXT, raw.encode("utf-8")
+        elif kind is None:
+            kind = BINARY
+        size = _FRAME.size + len(raw)
+        if self.max_bytes and self.bytes + size > self.max_bytes:
+            self.full = True
+            self._file.flush()
+            return
+        self._file.write(_FRAME.pack(recv_ns, len(raw), kind))
+        self._file.write(raw)
+        self.frames += kind != SESSION
+        self.bytes += size
+
+    def write_session(self, recv_ns: int, info: dict = None):
+        # 新连接开始：之后的帧与之前的会话不共享解压上下文 / 序列号
+        info = dict(info or {}, started_ms=time.time_ns() // 1_000_000)
+        self.write(recv_ns, json.dumps(info, ensure_ascii=False).encode("utf-8"), kind=SESSION)
+
+    def flush(self):
+        if not self._file.closed:
+            self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def stats(self) -> dict:
+        return {"path": self.path, "frames": self.frames, "bytes": self.bytes, "full": self.full}
+
+
+def read_header(f) -> dict:
+    magic = f.read(len(MAGIC))
+    if magic != MAGIC:
+        raise CaptureFormatError(f"不是录制文件（文件头 {magic!r}）")
+    (length,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+    return json.loads(f.read(length))
+
+
+def read_frames(f):
+    # 逐帧返回 (recv_ns, raw)；raw 为 str（文本帧）、bytes（二进制帧）或 SessionStart（会话标记）
+    # 末尾不完整的帧（写入时进程退出）直接忽略
+    size = _FRAME.size
+    while True:
+        head = f.read(size)
+        if len(head) < size:
+            return
+        recv_ns, length, kind = _FRAME.unpack(head)
+        raw = f.read(length)
+        if len(raw) < length:
+            return
+        if kind == SESSION:
+            yield recv_ns, SessionStart(json.loads(raw))
+        else:
+            yield recv_ns, (raw.decode("utf-8") if kind == TEXT else raw)
+
+
+def load_capture(path: str):
+    # 一次读入整个文件：(header, [(recv_ns, raw), ...])
+    with open(path, "rb") as f:
+        header = read_header(f)
+        return header, list(read_frames(f))
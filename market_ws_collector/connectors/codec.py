@@ -0,0 +1,138 @@
+# connectors/codec.py
+
+import json
+import time
+import zlib
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # 可选依赖
+    msgspec = None
+
+
+def available_backends() -> list:
+    backends = ["json"]
+    if orjson is not None:
+        backends.append("orjson")
+    if msgspec is not None:
+        backends.append("msgspec")
+    return backends
+
+
+def make_decoder(backend: str = "auto", message_type=None):
+    # 返回 decode(bytes | str) → 对象；bytes 直接解析，不经过中间 str
+    # message_type: msgspec.Struct 类型（或 Union），连接器可据此按自身 payload 结构做强类型解码
+    if message_type is not None:
+        if msgspec is None:
+            raise ImportError("强类型解码需要 msgspec：pip install msgspec")
+        return msgspec.json.Decoder(message_type).decode
+
+    if backend == "auto":
+        backend = "orjson" if orjson is not None else "msgspec" if msgspec is not None else "json"
+
+    if backend == "orjson":
+        if orjson is None:
+            raise ImportError("orjson 未安装：pip install orjson")
+        return orjson.loads
+    if backend == "msgspec":
+        if msgspec is None:
+            raise ImportError("msgspec 未安装：pip install msgspec")
+        return msgspec.json.Decoder().decode
+    if backend == "json":
+        return json.loads  # 标准库同样接受 UTF-8 bytes
+    raise ValueError(f"未知的 JSON 解码后端: {backend}")
+
+
+# 各压缩格式对应的 zlib wbits：gzip 头（31）、zlib 头（15）、raw deflate 无头（-15）
+WBITS = {
+    "gzip": 31,
+    "zlib": 15,
+    "deflate": -15,
+}
+
+
+class DecompressionError(Exception):
+    pass
+
+
+def preview(raw, limit: int = 200) -> str:
+    # 日志里只打印 payload 开头一段
+    text = repr(raw[:limit])
+    return text if len(raw) <= limit else f"{text}...（共 {len(raw)} 字节）"
+
+
+class FrameDecompressor:
+    # 每个连接一个实例：
+    # streaming=False：每帧是独立的完整压缩流（多数交易所），直接按 wbits 一次性解压，
+    #                 省掉 gzip 模块的 Python 层开销和 bytes.decode
+    # streaming=True： 整条连接共用一个压缩上下文（context takeover），复用同一个 decompressobj
+    def __init__(self, compression: str = None, streaming: bool = False):
+        if compression is not None and compression not in WBITS:
+            raise ValueError(f"未知的压缩格式: {compression}")
+        self.compression = compression
+        self.wbits = WBITS.get(compression)
+        self.streaming = streaming
+        self._obj = None
+
+        # 指标
+        self.frames = 0
+        self.errors = 0
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+        self.reset()
+
+    def reset(self):
+        # 重连后压缩上下文必须重建
+        if self.streaming and self.wbits is not None:
+            self._obj = zlib.decompressobj(self.wbits)
+
+    def decompress(self, raw: bytes) -> bytes:
+        if self.wbits is None:
+            return raw
+
+        start = time.perf_counter_ns()
+        try:
+            if self.streaming:
+                out = self._obj.decompress(raw)
+                # 压缩流在帧内结束（例如 gzip 多 member）：重建上下文继续解剩余部分
+                while self._obj.eof:
+                    rest = self._obj.unused_data
+                    self._obj = zlib.decompressobj(self.wbits)
+                    if not rest:
+                        break
+                    out += self._obj.decompress(rest)
+            else:
+                out = zlib.decompress(raw, self.wbits)
+        except zlib.error as e:
+            self.errors += 1
+            self.reset()
+            raise DecompressionError(f"{self.compression} 解压失败: {e}") from e
+
+        elapsed = time.perf_counter_ns() - start
+        self.frames += 1
+        self.compressed_bytes += len(raw)
+        self.decompressed_bytes += len(out)
+        self.total_ns += elapsed
+        if elapsed > self.max_ns:
+            self.max_ns = elapsed
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "compression": self.compression,
+            "frames": self.frames,
+            "errors": self.errors,
+            "compressed_bytes": self.compressed_bytes,
+            "decompressed_bytes": self.decompressed_bytes,
+            "ratio": round(self.decompressed_bytes / self.compressed_bytes, 2) if self.compressed_bytes else 0.0,
+            "avg_us": round(self.total_ns / self.frames / 1000, 2) if self.frames else 0.0,
+            "max_us": round(self.max_ns / 1000, 2),
+        }
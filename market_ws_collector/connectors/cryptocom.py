@@ -1,4 +1,3 @@
-import asyncio
 import json
 import time
 import websockets
@@ -35,12 +34,21 @@ class Connector(BaseAsyncConnector):
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.replace("-", "_").upper()
 
-    def build_sub_msg(self, symbol: str, req_id: int) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
         return {
             "id": req_id,
             "method": "subscribe",
             "params": {
-                "channels": [f"ticker.{symbol}"]
+                "channels": [f"ticker.{req.symbol}" for req in batch]
+            }
+        }
+
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        return {
+            "id": req_id,
+            "method": "unsubscribe",
+            "params": {
+                "channels": [f"ticker.{req.symbol}" for req in batch]
             }
         }
 
@@ -49,16 +57,12 @@ class Connector(BaseAsyncConnector):
         self.log(f"✅ Crypto.com WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        for i, req in enumerate(self.subscriptions):
-            msg = self.build_sub_msg(req.symbol, i + 1)
-            await self.ws.send(json.dumps(msg))
-            self.log(f"📨 已订阅 ticker.{req.symbol}")
-            await asyncio.sleep(0.1)
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         # ❤️ 处理 heartbeat
         if data.get("method") == "public/heartbeat":
-            self.log(f"🔁 收到 heartbeat, {data}")
+            self.log_throttled("heartbeat", "🔁 收到 heartbeat, {}", data)
             heartbeat_id = data.get("id")
             if heartbeat_id:
                 response = {
@@ -66,7 +70,15 @@ class Connector(BaseAsyncConnector):
                     "method": "public/respond-heartbeat"
                 }
                 await self.ws.send(json.dumps(response))
-                self.log(f"🔁 回复 heartbeat id={heartbeat_id}")
+                self.log_throttled("heartbeat_reply", "🔁 回复 heartbeat id={}", heartbeat_id)
+            return
+
+        # 📬 订阅回执
+        if data.get("method") == "subscribe" and "result" not in data:
+            if data.get("code") == 0:
+                self.confirm_request(data.get("id"))
+            else:
+                self.reject_request(data.get("id"), data.get("message") or data.get("code"))
             return
 
         # ✅ 处理 ticker 数据推送
@@ -98,5 +110,4 @@ class Connector(BaseAsyncConnector):
                 timestamp=timestamp
             )
 
-            if self.queue:
-                await self.queue.put(snapshot)
+            await self.emit(snapshot)
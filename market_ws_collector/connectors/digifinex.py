@@ -35,22 +35,25 @@ class Connector(BaseAsyncConnector):
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.upper().replace("-", "").replace("_", "") + "PERP"
 
-    def build_sub_msg(self) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
         return {
             "event": "ticker.subscribe",
-            "id": 1,
-            "instrument_ids": self.formatted_symbols
+            "id": req_id,
+            "instrument_ids": [req.symbol for req in batch]
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["event"] = "ticker.unsubscribe"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url)
         self.log(f"✅ Digifinex WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        msg = self.build_sub_msg()
-        await self.ws.send(json.dumps(msg))
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
         await self.ws.send(json.dumps({"id": 99, "event": "server.ping"}))
-        self.log(f"📨 已发送订阅请求: {msg}")
 
     async def handle_message(self, data):
         if data.get("event") == "ticker.update" and "data" in data:
@@ -77,5 +80,10 @@ class Connector(BaseAsyncConnector):
                 timestamp=timestamp
             )
 
-            if self.queue:
-                await self.queue.put(snapshot)
+            await self.emit(snapshot)
+        elif isinstance(data.get("result"), dict) and "status" in data["result"]:
+            # 订阅回执：{"id":1,"result":{"status":"success"},"error":null}
+            if data.get("error"):
+                self.reject_request(data.get("id"), data["error"])
+            else:
+                self.confirm_request(data.get("id"))
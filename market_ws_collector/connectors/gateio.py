@@ -35,14 +35,20 @@ class Connector(BaseAsyncConnector):
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.replace("-", "_").upper()
 
-    def build_sub_msg(self, symbol: str) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
         return {
+            "id": req_id,
             "time": int(time.time()),
             "channel": "futures.book_ticker",
             "event": "subscribe",
-            "payload": [symbol]
+            "payload": [req.symbol for req in batch]
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["event"] = "unsubscribe"
+        return msg
+
     async def keep_alive(self):
         self.log("🔄 启动 Gate.io 心跳任务")
         while True:
@@ -51,7 +57,7 @@ class Connector(BaseAsyncConnector):
                 "channel": "futures.ping"
             }
             await self.ws.send(json.dumps(ping_msg))
-            self.log(f"Sent Gate.io ping: {ping_msg}")
+            self.log_throttled("heartbeat", "Sent Gate.io ping: {}", ping_msg)
             await asyncio.sleep(10)
 
     async def connect(self):
@@ -59,11 +65,7 @@ class Connector(BaseAsyncConnector):
         self.log(f"✅ Gate.io WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        for req in self.subscriptions:
-            msg = self.build_sub_msg(req.symbol)
-            await self.ws.send(json.dumps(msg))
-            self.log(f"📨 已订阅: futures.book_ticker → {req.symbol}")
-            await asyncio.sleep(0.1)
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         if data.get("channel") == "futures.book_ticker" and data.get("event") == "update":
@@ -88,7 +90,11 @@ class Connector(BaseAsyncConnector):
                 timestamp=timestamp
             )
 
-            if self.queue:
-                await self.queue.put(snapshot)
+            await self.emit(snapshot)
+        elif data.get("event") == "subscribe":
+            if data.get("error"):
+                self.reject_request(data.get("id"), data["error"].get("message", data["error"]))
+            else:
+                self.confirm_request(data.get("id"))
         else:
-            self.log(f"❗️ 未处理的消息: {data}", level="DEBUG")
\ No newline at end of file
+            self.log_throttled("unhandled", "❗️ 未处理的消息: {}", data, level="DEBUG")
\ No newline at end of file
@@ -4,7 +4,6 @@ from connectors.base import BaseAsyncConnector
 from config import DEFAULT_SYMBOLS, WS_ENDPOINTS
 from models.base import SubscriptionRequest, MarketSnapshot
 import websockets
-import asyncio
 
 
 class Connector(BaseAsyncConnector):
@@ -29,31 +28,35 @@ class Connector(BaseAsyncConnector):
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.lower().replace("-", "")
 
-    def build_sub_msg(self, symbol: str) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
+        # Huobi 每条消息只能订阅一个 topic
+        symbol = batch[0].symbol
         return {
             "sub": f"market.{symbol}.ticker",
             "id": symbol
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        symbol = batch[0].symbol
+        return {
+            "unsub": f"market.{symbol}.ticker",
+            "id": f"unsub-{symbol}"
+        }
+
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url)
         self.log(f"✅ Huobi WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        for req in self.subscriptions:
-            msg = self.build_sub_msg(req.symbol)
-            await self.ws.send(json.dumps(msg))
-            self.log(f"📨 已订阅: market.{req.symbol}.ticker")
-            await asyncio.sleep(0.05)
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         # ping 处理
         if "ping" in data:
-            self.log(data, level="DEBUG")
             pong_msg = {"pong": data["ping"]}
             await self.ws.send(json.dumps(pong_msg))
             
-            self.log(f"🔁 收到 ping → 已发送 pong: {pong_msg}")
+            self.log_throttled("ping", "🔁 收到 ping → 已发送 pong: {}", pong_msg)
             return
 
         # ticker 数据处理
@@ -80,8 +83,11 @@ class Connector(BaseAsyncConnector):
                 timestamp=timestamp
             )
 
-            if self.queue:
-                await self.queue.put(snapshot)
+            await self.emit(snapshot)
             return
+        elif "subbed" in data:
+            self.confirm_topics([data.get("id")])
+        elif data.get("status") == "error" and not str(data.get("id", "")).startswith("unsub-"):
+            self.reject_topics([data.get("id")], data.get("err-msg"))
         else:
-            self.log(f"❗️ 未处理的消息: {data}", level="DEBUG")
+            self.log_throttled("unhandled", "❗️ 未处理的消息: {}", data, level="DEBUG")
@@ -1,5 +1,4 @@
 import asyncio
-import json
 import re
 import time
 import websockets
@@ -45,14 +44,20 @@ class Connector(BaseAsyncConnector):
         self.ws = await websockets.connect(self.ws_url)
         self.log(f"✅ {self.exchange_name} WebSocket 已连接 → {self.ws_url}")
 
-    async def subscribe(self):
-        msg = {
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
+        return {
             "event": "subscribe",
             "feed": "ticker",
-            "product_ids": [req.symbol for req in self.subscriptions]
+            "product_ids": [req.symbol for req in batch]
         }
-        await self.ws.send(json.dumps(msg))
-        self.log(f"📨 Kraken Futures 已订阅: {[req.symbol for req in self.subscriptions]}")
+
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["event"] = "unsubscribe"
+        return msg
+
+    async def subscribe(self):
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         if data.get("feed") == "ticker" and "product_id" in data:
@@ -85,8 +90,11 @@ class Connector(BaseAsyncConnector):
                 timestamp=timestamp
             )
 
-            if self.queue:
-                await self.queue.put(snapshot)
+            await self.emit(snapshot)
 
+        elif data.get("event") == "subscribed" and data.get("feed") == "ticker":
+            self.confirm_topics(data.get("product_ids", []))
+        elif data.get("event") == "error":
+            self.log(f"❌ 错误回执: {data}", level="WARNING")
         else:
-            self.log(f"❗️ 未处理的消息: {data}", level="DEBUG")
+            self.log_throttled("unhandled", "❗️ 未处理的消息: {}", data, level="DEBUG")
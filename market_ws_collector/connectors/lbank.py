@@ -1,11 +1,10 @@
-import asyncio
 import datetime
 import json
 import time
 import websockets
 
 from config import DEFAULT_SYMBOLS, WS_ENDPOINTS
-from models.base import MarketSnapshot, SubscriptionRequest
+from models.base import SubscriptionRequest
 from connectors.base import BaseAsyncConnector
 
 class Connector(BaseAsyncConnector):
@@ -35,24 +34,26 @@ class Connector(BaseAsyncConnector):
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.lower().replace("-", "_")
 
-    def build_sub_msg(self, symbol: str) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
+        # 每条消息只能订阅一个 pair
         return {
             "action": "subscribe",
             "subscribe": "depth",
-            "depth": "1",
-            "pair": symbol
+            "depth": str(self.book_depth) if self.book_queue is not None else "1",   # 只要一档时少收数据
+            "pair": batch[0].symbol
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["action"] = "unsubscribe"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url)
         self.log(f"✅ LBank WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        for req in self.subscriptions:
-            msg = self.build_sub_msg(req.symbol)
-            await self.ws.send(json.dumps(msg))
-            self.log(f"📨 已订阅 depth:{req.symbol}")
-            await asyncio.sleep(0.1)
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         # ping { "action":"ping", "ping":"0ca8f854-7ba7-4341-9d86-d3327e52804e" }
@@ -62,14 +63,14 @@ class Connector(BaseAsyncConnector):
                 "action": "pong"
             }
             await self.ws.send(json.dumps(pong_msg))
-            self.log(f"🔁 收到 ping: {data}，回复 pong: {pong_msg}")
+            self.log_throttled("ping", "🔁 收到 ping: {}，回复 pong: {}", data, pong_msg)
 
             ping_msg = {
                 "ping": f"{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}",
                 "action": "ping"
             }
             await self.ws.send(json.dumps(ping_msg))
-            self.log(f"🔁 主动发送心跳: {ping_msg}")
+            self.log_throttled("heartbeat", "🔁 主动发送心跳: {}", ping_msg)
             return
     
         if "depth" in data and "pair" in data:
@@ -77,25 +78,11 @@ class Connector(BaseAsyncConnector):
             symbol = data["pair"]
             raw_symbol = self.symbol_map.get(symbol, symbol.upper())
 
-            bids = tick.get("bids", [])
-            asks = tick.get("asks", [])
-
-            bid1, bid_vol1 = map(float, bids[0][:2]) if bids else (0.0, 0.0)
-            ask1, ask_vol1 = map(float, asks[0][:2]) if asks else (0.0, 0.0)
             timestamp = int(time.time() * 1000)
 
-            snapshot = MarketSnapshot(
-                exchange=self.exchange_name,
-                symbol=symbol,
-                raw_symbol=raw_symbol,
-                bid1=bid1,
-                ask1=ask1,
-                bid_vol1=bid_vol1,
-                ask_vol1=ask_vol1,
-                timestamp=timestamp
-            )
-
-            if self.queue:
-                await self.queue.put(snapshot)
+            # depth 每次推送完整的前 N 档
+            book = self.get_book(symbol, raw_symbol)
+            book.apply_snapshot(tick.get("bids", []), tick.get("asks", []), timestamp=timestamp)
+            await self.emit_book(book)
         else:
-            self.log(f"❗️ 未处理的消息: {data}", level="DEBUG")
+            self.log_throttled("unhandled", "❗️ 未处理的消息: {}", data, level="DEBUG")
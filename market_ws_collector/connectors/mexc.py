@@ -1,7 +1,5 @@
         
-import json
 import time
-import asyncio
 import websockets
 
 from models.base import SubscriptionRequest, MarketSnapshot
@@ -35,17 +33,23 @@ class Connector(BaseAsyncConnector):
         )
         self.log(f"✅ MEXC WebSocket 已连接 → {self.ws_url}")
 
-    async def subscribe(self):
-        for req in self.subscriptions:
-            msg = {
-                "method": req.channel,
-                "param": {
-                    "symbol": req.symbol
-                }
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
+        # 每条消息只能订阅一个 symbol
+        req = batch[0]
+        return {
+            "method": req.channel,
+            "param": {
+                "symbol": req.symbol
             }
-            await self.ws.send(json.dumps(msg))
-            self.log(f"📨 已订阅: {req.channel} → {req.symbol}")
-            await asyncio.sleep(0.05)
+        }
+
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["method"] = msg["method"].replace("sub.", "unsub.", 1)
+        return msg
+
+    async def subscribe(self):
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.replace("-", "_").upper()
@@ -78,8 +82,7 @@ class Connector(BaseAsyncConnector):
                 total_volume=total_volume,
                 timestamp=timestamp
             )
-            if self.queue:
-                await self.queue.put(snapshot)
+            await self.emit(snapshot)
 
         else:
-            self.log(f"未知消息格式: {data}", level="WARNING")
+            self.log_throttled("unhandled", "未知消息格式: {}", data, level="WARNING")
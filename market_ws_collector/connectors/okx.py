@@ -1,5 +1,4 @@
-import asyncio
-import json
+import re
 import time
 
 import websockets
@@ -36,24 +35,26 @@ class Connector(BaseAsyncConnector):
     def format_symbol(self, generic_symbol: str) -> str:
         return generic_symbol.upper()
 
-    def build_sub_msg(self) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
         return {
             "op": "subscribe",
             "args": [
                 {"channel": "tickers", "instId": req.symbol}
-                for req in self.subscriptions
+                for req in batch
             ]
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["op"] = "unsubscribe"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url)
         self.log(f"✅ OKX WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        msg = self.build_sub_msg()
-        await self.ws.send(json.dumps(msg))
-        self.log(f"📨 已订阅: {[req.symbol for req in self.subscriptions]}")
-        await asyncio.sleep(0.2)
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         if "arg" in data and "data" in data:
@@ -81,7 +82,15 @@ class Connector(BaseAsyncConnector):
                 timestamp=timestamp
             )
 
-            if self.queue:
-                await self.queue.put(snapshot)
+            await self.emit(snapshot)
+        elif data.get("event") == "subscribe":
+            self.confirm_topics([data.get("arg", {}).get("instId")])
+        elif data.get("event") == "error":
+            msg = data.get("msg", "")
+            match = re.search(r"instId:([\w-]+)", msg)
+            if match:
+                self.reject_topics([match.group(1)], msg)
+            else:
+                self.log(f"❌ 错误回执: {data}", level="WARNING")
         else:
-            self.log(f"❗️ 未处理的消息: {data}", level="DEBUG")
+            self.log_throttled("unhandled", "❗️ 未处理的消息: {}", data, level="DEBUG")
@@ -1,10 +1,8 @@
-import asyncio
-import json
 import time
 import websockets
 
 from config import DEFAULT_SYMBOLS, WS_ENDPOINTS
-from models.base import MarketSnapshot, SubscriptionRequest
+from models.base import SubscriptionRequest
 from connectors.base import BaseAsyncConnector
 
 class Connector(BaseAsyncConnector):
@@ -35,22 +33,23 @@ class Connector(BaseAsyncConnector):
         base, _ = symbol.upper().split("-")
         return f"{base}-USD-SWAP-LIN"
 
-    def build_sub_msg(self, symbol: str) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
         return {
             "op": "subscribe",
-            "args": [f"depth:{symbol}"]
+            "args": [f"depth:{req.symbol}" for req in batch]
         }
 
+    def build_unsub_msg(self, batch: list, req_id: int) -> dict:
+        msg = self.build_sub_msg(batch, req_id)
+        msg["op"] = "unsubscribe"
+        return msg
+
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url, ping_interval=None)
         self.log(f"✅ OX.FUN WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        for req in self.subscriptions:
-            msg = self.build_sub_msg(req.symbol)
-            await self.ws.send(json.dumps(msg))
-            self.log(f"📨 已订阅: depth → {req.symbol}")
-            await asyncio.sleep(0.2)
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
         if data.get("table") == "depth" and "data" in data:
@@ -58,25 +57,19 @@ class Connector(BaseAsyncConnector):
             symbol = tick.get("marketCode")
             raw_symbol = self.symbol_map.get(symbol, symbol)
 
-            bids = tick.get("bids", [])
-            asks = tick.get("asks", [])
-
-            bid1, bid_vol1 = map(float, bids[0]) if bids else (0.0, 0.0)
-            ask1, ask_vol1 = map(float, asks[0]) if asks else (0.0, 0.0)
             timestamp = int(tick.get("timestamp", time.time() * 1000))
 
-            snapshot = MarketSnapshot(
-                exchange=self.exchange_name,
-                symbol=symbol,
-                raw_symbol=raw_symbol,
-                bid1=bid1,
-                ask1=ask1,
-                bid_vol1=bid_vol1,
-                ask_vol1=ask_vol1,
-                timestamp=timestamp
-            )
-
-            if self.queue:
-                await self.queue.put(snapshot)
+            # depth 每次推送完整深度，seqNum 递增
+            seq = tick.get("seqNum")
+            book = self.get_book(symbol, raw_symbol)
+            if book.apply_snapshot(tick.get("bids", []), tick.get("asks", []),
+                                   seq=int(seq) if seq is not None else None, timestamp=timestamp):
+                await self.emit_book(book)
+        elif data.get("event") == "subscribe":
+            symbol = str(data.get("channel", "")).partition(":")[2]
+            if data.get("success"):
+                self.confirm_topics([symbol])
+            else:
+                self.reject_topics([symbol], data.get("message"))
         else:
-            self.log(f"❗️ 未处理的消息: {data}", level="DEBUG")
+            self.log_throttled("unhandled", "❗️ 未处理的消息: {}", data, level="DEBUG")
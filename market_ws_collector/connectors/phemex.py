@@ -1,10 +1,8 @@
-import asyncio
-import json
 import time
 import websockets
 
 from config import DEFAULT_SYMBOLS, WS_ENDPOINTS
-from models.base import SubscriptionRequest, MarketSnapshot
+from models.base import SubscriptionRequest
 from connectors.base import BaseAsyncConnector
 
 
@@ -32,11 +30,12 @@ class Connector(BaseAsyncConnector):
         base, _ = symbol.upper().split("-")
         return f"{base}USD"
 
-    def build_sub_msg(self, symbol: str, idx: int) -> dict:
+    def build_sub_msg(self, batch: list, req_id: int) -> dict:
+        # orderbook.subscribe 每条消息只能带一个 symbol
         return {
-            "id": idx,
+            "id": req_id,
             "method": "orderbook.subscribe",
-            "params": [symbol]
+            "params": [batch[0].symbol]
         }
 
     async def connect(self):
@@ -44,16 +43,20 @@ class Connector(BaseAsyncConnector):
         self.log(f"✅ Phemex WebSocket 已连接 → {self.ws_url}")
 
     async def subscribe(self):
-        for i, req in enumerate(self.subscriptions):
-            msg = self.build_sub_msg(req.symbol, i + 1)
-            await self.ws.send(json.dumps(msg))
-            self.log(f"📨 已订阅: orderbook.subscribe → {req.symbol}")
-            await asyncio.sleep(0.2)
+        await self.send_subscriptions(self.subscriptions, self.build_sub_msg)
 
     async def handle_message(self, data):
+        # 订阅回执：{"error":null,"id":1,"result":{"status":"success"}}
+        if "id" in data and "result" in data:
+            if data.get("error"):
+                self.reject_request(data["id"], data["error"])
+            else:
+                self.confirm_request(data["id"])
+            return
+
         # 忽略非行情推送
         if "symbol" not in data or "book" not in data:
-            self.log(f"❗️ 未处理的消息: {data}", level="DEBUG")
+            self.log_throttled("unhandled", "❗️ 未处理的消息: {}", data, level="DEBUG")
             return
 
         symbol = data.get("symbol")
@@ -65,26 +68,13 @@ class Connector(BaseAsyncConnector):
 
         # self.log(f"📊 {self.exchange_name} {raw_symbol} 行情数据: {data}", level="DEBUG")
 
-        bid1, bid_vol1 = (0.0, 0.0)
-        ask1, ask_vol1 = (0.0, 0.0)
-
-        if bids:
-            bid1 = bids[0][0] 
-            bid_vol1 = bids[0][1] 
-        if asks:
-            ask1 = asks[0][0]
-            ask_vol1 = asks[0][1]
-
-        snapshot = MarketSnapshot(
-            exchange=self.exchange_name,
-            symbol=symbol,
-            raw_symbol=raw_symbol,
-            bid1=bid1,
-            ask1=ask1,
-            bid_vol1=bid_vol1,
-            ask_vol1=ask_vol1,
-            timestamp=timestamp
-        )
-
-        if self.queue:
-            await self.queue.put(snapshot)
+        # 订阅后先推 type=snapshot，之后是 type=incremental（数量为 0 表示删除该档）
+        # sequence 只保证递增、不保证连续，只能用来丢弃过期消息
+        book = self.get_book(symbol, raw_symbol)
+        seq = data.get("sequence")
+        if data.get("type") == "snapshot":
+            applied = book.apply_snapshot(bids, asks, seq=seq, timestamp=timestamp)
+        else:
+            applied = book.apply_delta(bids, asks, seq=seq, timestamp=timestamp)
+        if applied:
+            await self.emit_book(book)
@@ -0,0 +1,102 @@
+# connectors/reconnect.py
+
+import random
+import time
+
+
+class StaleDataError(Exception):
+    pass
+
+
+class ReconnectPolicy:
+    # 重连策略（每个连接一个实例）：
+    # - 指数退避 + 随机抖动，避免大面积断线后所有连接同时重连
+    # - 连续失败次数（重试预算）在连接健康运行 healthy_after 秒后清零
+    # - 预算耗尽后冷却 cooldown 秒再继续（cooldown=None 则停止重连）
+    # - stale_after：连续这么多秒收不到任何数据就主动断开重连（None 表示不检测）
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0, multiplier: float = 2.0,
+                 jitter: float = 0.5, max_retries: int = 10, healthy_after: float = 60.0,
+                 cooldown: float = 300.0, stale_after: float = None):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.max_retries = max_retries
+        self.healthy_after = healthy_after
+        self.cooldown = cooldown
+        self.stale_after = stale_after
+
+        self.failures = 0               # 当前连续失败次数
+        self._session_start = None
+        self._first_message_at = None
+        self._down_since = None
+
+        # 指标
+        self.sessions = 0
+        self.reconnects = 0
+        self.stale_reconnects = 0
+        self.total_downtime = 0.0
+        self.last_downtime = 0.0
+        self.last_ttfm = None           # 重连后收到第一条消息的耗时（秒）
+        self.max_ttfm = 0.0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.max_retries is not None and self.failures >= self.max_retries
+
+    def next_delay(self) -> float:
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** max(0, self.failures - 1))
+        return delay * (1 - self.jitter * random.random())
+
+    def reset_budget(self):
+        self.failures = 0
+
+    def on_connected(self):
+        now = time.monotonic()
+        if self._down_since is not None:
+            self.reconnects += 1
+            self.last_downtime = now - self._down_since
+            self.total_downtime += self.last_downtime
+            self._down_since = None
+        self.sessions += 1
+        self._session_start = now
+        self._first_message_at = None
+
+    def on_message(self, now: float):
+        # 只在每次会话的第一条消息时调用
+        self._first_message_at = now
+        if self.reconnects and self._session_start is not None:
+            self.last_ttfm = now - self._session_start
+            self.max_ttfm = max(self.max_ttfm, self.last_ttfm)
+
+    def on_disconnected(self, stale: bool = False):
+        now = time.monotonic()
+        # 首次连接成功之前的失败不计入停机时间
+        if self._down_since is None and self.sessions:
+            self._down_since = now
+        if stale:
+            self.stale_reconnects += 1
+
+        # 收到过数据并且稳定运行足够久：视为健康会话，预算清零
+        healthy = (
+            self._session_start is not None
+            and self._first_message_at is not None
+            and now - self._session_start >= self.healthy_after
+        )
+        self.failures = 0 if healthy else self.failures + 1
+        self._session_start = None
+
+    def stats(self) -> dict:
+        downtime = self.total_downtime
+        if self._down_since is not None and self.sessions:
+            downtime += time.monotonic() - self._down_since
+        return {
+            "sessions": self.sessions,
+            "reconnects": self.reconnects,
+            "stale_reconnects": self.stale_reconnects,
+            "failures": self.failures,
+            "downtime_sec": round(downtime, 1),
+            "last_downtime_sec": round(self.last_downtime, 2),
+            "last_ttfm_sec": None if self.last_ttfm is None else round(self.last_ttfm, 3),
+            "max_ttfm_sec": round(self.max_ttfm, 3),
+        }
@@ -0,0 +1,168 @@
+# connectors/subscription.py
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    # 令牌桶限速：平均每秒 rate 个令牌，最多攒 burst 个（允许连上后先快速发出一批）
+    # 每个连接一个实例，跨重连保留，重连风暴时同样受限
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self._at = time.monotonic()
+        self.waited = 0.0          # 累计等待令牌的时间（秒）
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._at) * self.rate)
+        self._at = now
+
+    async def acquire(self, n: int = 1):
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= n:
+                self.tokens -= n
+                return
+            wait = (n - self.tokens) / self.rate
+            self.waited += wait
+            await asyncio.sleep(wait)
+
+    def try_acquire(self, n: int = 1) -> bool:
+        # 不等待：有令牌就取走并返回 True
+        self._refill(time.monotonic())
+        if self.tokens >= n:
+            self.tokens -= n
+            return True
+        return False
+
+
+PENDING = "pending"     # 已发送订阅，尚未确认
+ACKED = "acked"         # 交易所确认，或已收到该 topic 的行情
+REJECTED = "rejected"   # 交易所明确拒绝（symbol 不存在等），不再重试
+STALE = "stale"         # 确认过但超过阈值没有行情，已重新订阅，等待恢复
+
+
+class SubscriptionTracker:
+    # 按 topic（通用 symbol，如 BTC-USDT）记录订阅状态和最近一次收到行情的时间
+    # 每次（重新）连接调用 start 重置；收到某 topic 的行情（touch）即视为确认
+    def __init__(self):
+        self.status = {}            # topic → PENDING / ACKED / REJECTED / STALE
+        self.pending = set()
+        self.unconfirmed = set()    # 状态不是 ACKED 的 topic，touch 时据此判断是否要改状态
+        self.last_update = {}       # topic → 最近一次行情的 monotonic 时间
+        self.reasons = {}           # topic → 拒绝原因
+        self.attempts = {}          # topic → 连续重新订阅次数（收到行情后清零）
+        self._subscribed_at = {}    # topic → 最近一次（重新）订阅的时间
+        self.messages = 0           # 本轮发送的订阅消息数
+        self._started_at = None
+        self.sent_sec = None        # 发完所有订阅消息的耗时
+        self.fully_subscribed_sec = None
+
+        # 累计指标（跨重连）
+        self.resubscribes = 0
+        self.recovered = 0
+
+    def start(self, topics):
+        now = time.monotonic()
+        self.status = {topic: PENDING for topic in topics}
+        self.pending = set(self.status)
+        self.unconfirmed = set(self.status)
+        self.reasons = {}
+        self.attempts = {}
+        self._subscribed_at = {}
+        self.messages = 0
+        self._started_at = now
+        self.sent_sec = None
+        self.fully_subscribed_sec = None
+        if not self.pending:
+            self.fully_subscribed_sec = 0.0
+
+    def sent(self, messages: int = 1):
+        self.messages += messages
+
+    def all_sent(self):
+        if self._started_at is not None:
+            self.sent_sec = time.monotonic() - self._started_at
+
+    def touch(self, topic, now: float):
+        # 每条行情调用：记录时间，未确认的 topic 顺便确认
+        self.last_update[topic] = now
+        if topic in self.unconfirmed:
+            self._confirm(topic)
+
+    def ack(self, topic):
+        # 交易所的订阅回执：只确认 pending 的 topic；STALE 必须等到真正收到行情才算恢复
+        if self.status.get(topic) == PENDING:
+            self._confirm(topic)
+
+    def _confirm(self, topic):
+        if topic not in self.status:
+            return
+        self.status[topic] = ACKED
+        self.unconfirmed.discard(topic)
+        self.reasons.pop(topic, None)
+        if self.attempts.pop(topic, 0):
+            self.recovered += 1
+        self._resolve(topic)
+
+    def reject(self, topic, reason):
+        state = self.status.get(topic)
+        if state is None or (state == ACKED and topic in self.last_update):
+            return      # 已经收到过行情，说明拒绝针对的是别的请求
+        self.status[topic] = REJECTED
+        self.unconfirmed.add(topic)
+        self.reasons[topic] = reason
+        self._resolve(topic)
+
+    def _resolve(self, topic):
+        if topic in self.pending:
+            self.pending.discard(topic)
+            if not self.pending:
+                self.fully_subscribed_sec = time.monotonic() - self._started_at
+
+    def find_silent(self, now: float, silent_after: float, max_attempts: int = 3) -> list:
+        # 超过 silent_after 秒没有行情的 topic（自订阅 / 上次重新订阅起算）：标记为 STALE 并返回
+        # 连续重新订阅 max_attempts 次仍无行情的不再返回（多半已下架或无成交）
+        silent = []
+        for topic, state in self.status.items():
+            if state == REJECTED or self.attempts.get(topic, 0) >= max_attempts:
+                continue
+            since = max(self.last_update.get(topic, 0.0), self._subscribed_at.get(topic, self._started_at))
+            if now - since > silent_after:
+                silent.append(topic)
+
+        for topic in silent:
+            self.status[topic] = STALE
+            self.unconfirmed.add(topic)
+            self.attempts[topic] = self.attempts.get(topic, 0) + 1
+            self._subscribed_at[topic] = now
+            self._resolve(topic)
+        self.resubscribes += len(silent)
+        return silent
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        counts = {PENDING: 0, ACKED: 0, REJECTED: 0, STALE: 0}
+        for state in self.status.values():
+            counts[state] += 1
+        stale = sorted(t for t, s in self.status.items() if s == STALE)
+        ages = [now - self.last_update[t] for t in self.status if t in self.last_update]
+        return {
+            "topics": len(self.status),
+            "acked": counts[ACKED],
+            "pending": counts[PENDING],
+            "rejected": counts[REJECTED],
+            "stale": counts[STALE],
+            "messages": self.messages,
+            "sent_sec": None if self.sent_sec is None else round(self.sent_sec, 3),
+            "fully_subscribed_sec": (None if self.fully_subscribed_sec is None
+                                     else round(self.fully_subscribed_sec, 3)),
+            "resubscribes": self.resubscribes,
+            "recovered": self.recovered,
+            "max_silence_sec": round(max(ages), 1) if ages else None,
+            "pending_sample": sorted(self.pending)[:5],
+            "stale_sample": stale[:5],
+            "rejected_sample": dict(sorted(self.reasons.items())[:5]),
+        }
@@ -9,18 +9,43 @@ from connectors import (
 
 )
 
-from config import DEFAULT_SYMBOLS
+from config import DEFAULT_SYMBOLS, SYMBOLS_FILE, CONNECTIONS_PER_EXCHANGE, MAX_TOPICS_PER_CONNECTION
+from config import RECONNECT_POLICY, STALE_DATA_SECONDS, CAPTURE_FRAMES, CAPTURE_DIR, CAPTURE_MAX_BYTES
+from connectors.reconnect import ReconnectPolicy
 import asyncio
 
 import json
+import os
 import time
 import importlib
 
 
 
+SKIP_EXCHANGES = ["bitrue"]
+
+
+def parse_shard_spec(spec: str):
+    # "okx" → ("okx", 0, 1)；"binance:1/3" → binance 的第 2 份（共 3 份）symbol
+    exchange, _, part = spec.partition(":")
+    if not part:
+        return exchange, 0, 1
+    index, _, count = part.partition("/")
+    index, count = int(index), int(count)
+    if not 0 <= index < count:
+        raise ValueError(f"无效的分片写法: {spec}")
+    return exchange, index, count
+
+
+def load_symbols(symbols_file: str = SYMBOLS_FILE) -> dict:
+    with open(symbols_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 class ExchangeManager:
-    def __init__(self, queue):
+    def __init__(self, queue, top_cache=None, exchanges=None, symbols_file: str = SYMBOLS_FILE, book_queue=None):
         self.queue = queue
+        self.top_cache = top_cache  # 可选：TopOfBookCache，连接器同时写入最新盘口
+        self.book_queue = book_queue  # 可选：深度频道的连接器额外输出 BookSnapshot
         self.connectors = [
             # ascendex.Connector(exchange="ascendex", queue=queue),
             # binance.Connector(exchange="binance", queue=queue),  # ✅ 添加 Binance
@@ -58,37 +83,63 @@ class ExchangeManager:
             # 你可以继续添加 binance、bybit 等其他交易所
         ]
 
-        self.load_connectors() # 加载所有交易所连接器
+        self.load_connectors(exchanges, symbols_file) # 加载所有交易所连接器
 
-    def load_connectors(self):
-    
-        with open("../selector/top100_exchange_symbols.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
+        for conn in self.connectors:
+            conn.top_cache = top_cache
+            conn.book_queue = book_queue
 
-        print(data.keys())  # 显示所有的交易所名
+    def load_connectors(self, exchanges=None, symbols_file: str = SYMBOLS_FILE):
+        # exchanges: None 表示加载文件里的全部交易所；否则为分片写法列表，如 ["okx", "binance:0/2"]
+        data = load_symbols(symbols_file)
 
+        print(data.keys())  # 显示所有的交易所名
 
-        skip_exchanges = ["bitrue"]
-        
+        if exchanges is None:
+            plan = [(exchange, 0, 1) for exchange in data.keys() if exchange not in SKIP_EXCHANGES]
+        else:
+            plan = [parse_shard_spec(spec) for spec in exchanges]
 
-        for exchange in data.keys():
-            if exchange in skip_exchanges:
+        for exchange, part, parts in plan:
+            if exchange not in data:
+                print(f"⚠️ {symbols_file} 中没有交易所: {exchange}")
                 continue
             if exchange not in globals():
                 print(f"⚠️ exchange 模块未导入: {exchange}")
                 continue
 
+            symbols = data[exchange][part::parts]
             try:
-                connector = globals()[exchange].Connector(
+                group = globals()[exchange].Connector.create_group(
                     exchange=exchange,
-                    symbols=data[exchange],
-                    queue=self.queue
+                    symbols=symbols,
+                    queue=self.queue,
+                    connections=CONNECTIONS_PER_EXCHANGE.get(exchange, CONNECTIONS_PER_EXCHANGE.get("default", 1)),
+                    max_topics=MAX_TOPICS_PER_CONNECTION.get(exchange),
                 )
-                self.connectors.append(connector)
-                print(f"✅ 成功添加交易所: {exchange}（symbol 数量: {len(data[exchange])}）")
+                stale_after = STALE_DATA_SECONDS.get(exchange, STALE_DATA_SECONDS.get("default"))
+                for conn in group:
+                    conn.reconnect = ReconnectPolicy(stale_after=stale_after, **RECONNECT_POLICY)
+                    if CAPTURE_FRAMES:
+                        # 分片时同一交易所可能在多个进程里，文件名带上分片编号
+                        suffix = f"-{part}of{parts}" if parts > 1 else ""
+                        conn.start_capture(os.path.join(CAPTURE_DIR, f"{conn.label}{suffix}.cap"), CAPTURE_MAX_BYTES)
+                self.connectors.extend(group)
+                print(f"✅ 成功添加交易所: {exchange}（symbol 数量: {len(symbols)}，连接数: {len(group)}）")
             except Exception as e:
                 print(f"❌ 构建 {exchange}.Connector 时出错: {e}")
-            
+
+    def queue_stats(self) -> dict:
+        # 只有 BoundedSnapshotQueue 提供丢弃 / 合并计数
+        return self.queue.stats() if hasattr(self.queue, "stats") else {}
+
+    def decompression_stats(self) -> dict:
+        return {conn.label: conn.decompressor.stats()
+                for conn in self.connectors if conn.decompressor.compression}
+
+    def connection_stats(self) -> dict:
+        # 每个连接的收包速率，用于调整 CONNECTIONS_PER_EXCHANGE
+        return {conn.label: conn.message_stats() for conn in self.connectors}
 
     async def run_all(self):
         tasks = [asyncio.create_task(conn.run()) for conn in self.connectors]
@@ -0,0 +1,92 @@
+# dispatcher/queues.py
+
+import asyncio
+from collections import defaultdict
+
+from models.base import MarketSnapshotBatch
+
+POLICIES = ("block", "drop_oldest", "conflate")
+
+
+class BoundedSnapshotQueue(asyncio.Queue):
+    # 有界行情队列，满了之后的处理策略：
+    #   block       生产者（连接器）等待，不丢数据
+    #   drop_oldest 丢弃队头最旧的数据，生产者永不阻塞
+    #   conflate    同一 (exchange, symbol) 只保留最新一条，队列里已有的直接原地覆盖；
+    #               不同 key 的数量超过 maxsize 时生产者等待
+    def __init__(self, maxsize: int = 0, policy: str = "block"):
+        if policy not in POLICIES:
+            raise ValueError(f"未知的队列策略: {policy}，可选 {POLICIES}")
+        super().__init__(maxsize)
+        self.policy = policy
+
+        # 指标（按交易所）
+        self.dropped = defaultdict(int)
+        self.conflated = defaultdict(int)
+        self.high_water = 0
+
+    # asyncio.Queue 的存取钩子：conflate 模式下队列里只放 key，最新值存在 _latest
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self._latest = {}
+
+    def _put(self, item):
+        if self.policy == "conflate":
+            key = (item.exchange, item.symbol)
+            self._latest[key] = item
+            self._queue.append(key)
+        else:
+            self._queue.append(item)
+        if len(self._queue) > self.high_water:
+            self.high_water = len(self._queue)
+
+    def _get(self):
+        item = self._queue.popleft()
+        if self.policy == "conflate":
+            return self._latest.pop(item)
+        return item
+
+    async def put(self, item):
+        if self.policy == "block":
+            return await super().put(item)
+        if self.policy == "drop_oldest":
+            return self.put_nowait(item)
+
+        # conflate：批量帧拆开逐条合并
+        for snapshot in (item if isinstance(item, MarketSnapshotBatch) else (item,)):
+            if not self._conflate(snapshot):
+                await super().put(snapshot)
+
+    def put_nowait(self, item):
+        if self.policy == "drop_oldest":
+            while self.full():
+                self._drop_oldest()
+        elif self.policy == "conflate":
+            for snapshot in (item if isinstance(item, MarketSnapshotBatch) else (item,)):
+                if not self._conflate(snapshot):
+                    super().put_nowait(snapshot)
+            return
+        super().put_nowait(item)
+
+    def _conflate(self, snapshot) -> bool:
+        key = (snapshot.exchange, snapshot.symbol)
+        if key in self._latest:
+            self._latest[key] = snapshot
+            self.conflated[snapshot.exchange] += 1
+            return True
+        return False
+
+    def _drop_oldest(self):
+        old = self.get_nowait()
+        self.task_done()
+        self.dropped[old.exchange] += len(old) if isinstance(old, MarketSnapshotBatch) else 1
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "maxsize": self.maxsize,
+            "depth": self.qsize(),
+            "high_water": self.high_water,
+            "dropped": dict(self.dropped),
+            "conflated": dict(self.conflated),
+        }
@@ -0,0 +1,250 @@
+# dispatcher/sharding.py
+
+import asyncio
+import math
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import SYMBOLS_FILE, LOG_ECHO_STDOUT, LOG_LEVELS
+from dispatcher.manager import SKIP_EXCHANGES, ExchangeManager, load_symbols
+from models.base import MarketSnapshotBatch
+from utils.logger import setup_log_pipeline
+
+# 子进程 → 主进程的消息：("ticks", [MarketSnapshotBatch, ...]) / ("stats", {...})
+
+
+def auto_shard_plan(symbols: dict, workers: int, skip=SKIP_EXCHANGES) -> list:
+    # 按 symbol 数量均衡：symbol 特别多的交易所拆成几份，再贪心分给当前负载最小的子进程
+    counts = {ex: len(syms) for ex, syms in symbols.items() if ex not in skip and syms}
+    if not counts or workers <= 0:
+        return []
+    target = math.ceil(sum(counts.values()) / workers)
+
+    units = []
+    for exchange, count in counts.items():
+        parts = min(workers, max(1, math.ceil(count / target)))
+        for i in range(parts):
+            spec = exchange if parts == 1 else f"{exchange}:{i}/{parts}"
+            units.append((len(range(i, count, parts)), spec))
+    units.sort(reverse=True)
+
+    plan = [[] for _ in range(workers)]
+    loads = [0] * workers
+    for size, spec in units:
+        shard = loads.index(min(loads))
+        plan[shard].append(spec)
+        loads[shard] += size
+    return [specs for specs in plan if specs]
+
+
+async def _forward_ticks(queue, conn, sender, stats, batch_ms, batch_size):
+    # 把本进程连接器产生的行情按交易所打包，每 batch_ms 或攒够 batch_size 条发给主进程
+    loop = asyncio.get_running_loop()
+    batches = {}
+    pending = 0
+    deadline = time.monotonic() + batch_ms / 1000
+
+    while True:
+        timeout = max(0.0, deadline - time.monotonic())
+        try:
+            items = [await asyncio.wait_for(queue.get(), timeout)]
+            while not queue.empty() and len(items) < batch_size:
+                items.append(queue.get_nowait())
+        except asyncio.TimeoutError:
+            items = []
+
+        for item in items:
+            batch = batches.get(item.exchange)
+            if batch is None:
+                batch = batches[item.exchange] = MarketSnapshotBatch(item.exchange)
+                # 整批沿用最早一条的时间戳，跨进程传输计入排队延迟
+                batch.recv_ns, batch.recv_ms, batch.parsed_ns = item.recv_ns, item.recv_ms, item.parsed_ns
+            for snapshot in (item if isinstance(item, MarketSnapshotBatch) else (item,)):
+                batch.append(snapshot.symbol, snapshot.bid1, snapshot.ask1, snapshot.timestamp,
+                             bid_vol1=snapshot.bid_vol1, ask_vol1=snapshot.ask_vol1,
+                             raw_symbol=snapshot.raw_symbol)
+                pending += 1
+            queue.task_done()
+
+        if pending >= batch_size or time.monotonic() >= deadline:
+            if batches:
+                payload = pickle.dumps(("ticks", list(batches.values())), pickle.HIGHEST_PROTOCOL)
+                await loop.run_in_executor(sender, conn.send_bytes, payload)
+                stats["ticks"] += pending
+                stats["batches"] += 1
+                stats["bytes"] += len(payload)
+            batches = {}
+            pending = 0
+            deadline = time.monotonic() + batch_ms / 1000
+
+
+async def _report_stats(shard_id, specs, manager, conn, sender, stats, interval_sec, parent_pid):
+    loop = asyncio.get_running_loop()
+    last_wall, last_cpu, last_ticks = time.monotonic(), time.process_time(), 0
+    while True:
+        await asyncio.sleep(interval_sec)
+        if os.getppid() != parent_pid:
+            print(f"⚠️ 分片 {shard_id} 的主进程已退出，子进程结束")
+            os._exit(0)
+
+        now, cpu = time.monotonic(), time.process_time()
+        elapsed = now - last_wall
+        report = {
+            "shard": shard_id,
+            "pid": os.getpid(),
+            "exchanges": specs,
+            "connectors": len(manager.connectors),
+            "cpu_pct": round((cpu - last_cpu) / elapsed * 100, 1),
+            "ticks": stats["ticks"],
+            "ticks_per_sec": round((stats["ticks"] - last_ticks) / elapsed, 1),
+            "batches": stats["batches"],
+            "bytes": stats["bytes"],
+            "decompression": manager.decompression_stats(),
+            "connections": manager.connection_stats(),
+        }
+        last_wall, last_cpu, last_ticks = now, cpu, stats["ticks"]
+        payload = pickle.dumps(("stats", report), pickle.HIGHEST_PROTOCOL)
+        await loop.run_in_executor(sender, conn.send_bytes, payload)
+
+
+async def _run_shard(shard_id, specs, conn, symbols_file, batch_ms, batch_size, stats_interval, parent_pid):
+    queue = asyncio.Queue(maxsize=batch_size * 10)
+    manager = ExchangeManager(queue=queue, exchanges=specs, symbols_file=symbols_file)
+    sender = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"shard-{shard_id}-send")
+    stats = {"ticks": 0, "batches": 0, "bytes": 0}
+    await asyncio.gather(
+        manager.run_all(),
+        _forward_ticks(queue, conn, sender, stats, batch_ms, batch_size),
+        _report_stats(shard_id, specs, manager, conn, sender, stats, stats_interval, parent_pid),
+    )
+
+
+def _shard_main(shard_id, specs, conn, symbols_file, batch_ms, batch_size, stats_interval, parent_pid):
+    # 子进程入口：start() 在主进程任何线程 / 事件循环创建之前 fork，这里从干净的状态起自己的日志线程和事件循环
+    setup_log_pipeline("./log", echo_stdout=LOG_ECHO_STDOUT, levels=LOG_LEVELS)
+    try:
+        asyncio.run(_run_shard(shard_id, specs, conn, symbols_file, batch_ms, batch_size,
+                               stats_interval, parent_pid))
+    except KeyboardInterrupt:
+        pass
+
+
+class ShardedExchangeManager:
+    # 连接器分到多个子进程运行（各自的事件循环、各自的 GIL），
+    # 行情按批通过 Pipe 发回主进程，再放入同一个行情队列，对下游透明
+    def __init__(self, queue, top_cache=None, workers: int = 2, plan: list = None,
+                 symbols_file: str = SYMBOLS_FILE, batch_ms: int = 20, batch_size: int = 2000,
+                 stats_interval: int = 10):
+        self.queue = queue
+        self.top_cache = top_cache
+        self.symbols_file = symbols_file
+        self.plan = plan or auto_shard_plan(load_symbols(symbols_file), workers)
+        self.batch_ms = batch_ms
+        self.batch_size = batch_size
+        self.stats_interval = stats_interval
+
+        self._processes = []
+        self._conns = []
+        self._readers = None
+
+        # 指标
+        self.shard_reports = {}     # shard → 子进程最近一次上报的统计
+        self.received_ticks = [0] * len(self.plan)
+        self.received_batches = [0] * len(self.plan)
+
+        for shard_id, specs in enumerate(self.plan):
+            print(f"🧩 分片 {shard_id}: {specs}")
+
+    def start(self):
+        # 使用 fork：子进程直接继承已导入的模块和配置（spawn / forkserver 会重新执行 main.py 顶层代码）
+        # 必须在 asyncio.run 和任何线程（日志、写盘、绘图）启动之前同步调用，见 main.start_shards
+        ctx = multiprocessing.get_context("fork")
+        parent_pid = os.getpid()
+        for shard_id, specs in enumerate(self.plan):
+            recv_conn, send_conn = ctx.Pipe(duplex=False)
+            process = ctx.Process(
+                target=_shard_main,
+                args=(shard_id, specs, send_conn, self.symbols_file, self.batch_ms,
+                      self.batch_size, self.stats_interval, parent_pid),
+                name=f"shard-{shard_id}",
+                daemon=True,
+            )
+            process.start()
+            send_conn.close()
+            self._processes.append(process)
+            self._conns.append(recv_conn)
+        self._readers = ThreadPoolExecutor(max_workers=max(1, len(self._conns)), thread_name_prefix="shard-recv")
+
+    async def _read_shard(self, shard_id, conn):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                payload = await loop.run_in_executor(self._readers, conn.recv_bytes)
+            except EOFError:
+                print(f"❌ 分片 {shard_id} 已退出（exitcode={self._processes[shard_id].exitcode}）")
+                return
+            kind, body = pickle.loads(payload)
+            if kind == "stats":
+                self.shard_reports[shard_id] = body
+                continue
+
+            for batch in body:
+                if self.top_cache is not None:
+                    self.top_cache.update(batch)
+                self.received_ticks[shard_id] += len(batch)
+                await self.queue.put(batch)
+            self.received_batches[shard_id] += 1
+
+    def attach_queue(self, queue):
+        # 子进程先于事件循环启动，行情队列在 main() 里创建后再挂上
+        self.queue = queue
+
+    async def run_all(self):
+        if not self._processes:
+            raise RuntimeError("分片子进程未启动：需在事件循环外先调用 start()")
+        await asyncio.gather(*(self._read_shard(i, conn) for i, conn in enumerate(self._conns)))
+
+    def queue_stats(self) -> dict:
+        return self.queue.stats() if hasattr(self.queue, "stats") else {}
+
+    def decompression_stats(self) -> dict:
+        merged = {}
+        for report in self.shard_reports.values():
+            for exchange, st in report.get("decompression", {}).items():
+                merged[f"{exchange}@{report['shard']}"] = st
+        return merged
+
+    def connection_stats(self) -> dict:
+        merged = {}
+        for report in self.shard_reports.values():
+            for label, st in report.get("connections", {}).items():
+                merged[f"{label}@{report['shard']}"] = st
+        return merged
+
+    def shard_stats(self) -> list:
+        stats = []
+        for shard_id, specs in enumerate(self.plan):
+            report = self.shard_reports.get(shard_id, {})
+            process = self._processes[shard_id] if shard_id < len(self._processes) else None
+            stats.append({
+                "shard": shard_id,
+                "exchanges": specs,
+                "alive": bool(process and process.is_alive()),
+                "cpu_pct": report.get("cpu_pct", 0.0),
+                "ticks_per_sec": report.get("ticks_per_sec", 0.0),
+                "received_ticks": self.received_ticks[shard_id],
+                "received_batches": self.received_batches[shard_id],
+            })
+        return stats
+
+    def shutdown(self):
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            process.join(timeout=5)
+        if self._readers:
+            self._readers.shutdown(wait=False, cancel_futures=True)
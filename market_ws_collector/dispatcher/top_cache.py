@@ -0,0 +1,74 @@
+# dispatcher/top_cache.py
+
+import asyncio
+
+from models.base import MarketSnapshotBatch
+
+
+class TopOfBookCache:
+    # 每个 (exchange, raw_symbol) 只保存最新一条盘口，连接器直接原地覆盖（O(1)）
+    # 全局版本号每次更新 +1；慢消费者按版本号读取最新状态，不用排空积压的队列
+    def __init__(self):
+        self._entries = {}      # (exchange, raw_symbol) → MarketSnapshot
+        self._versions = {}     # (exchange, raw_symbol) → 最近一次更新时的版本号
+        self._by_symbol = {}    # raw_symbol → {exchange: MarketSnapshot}
+        self._waiter = None
+        self.version = 0
+
+    def update(self, snapshot):
+        if isinstance(snapshot, MarketSnapshotBatch):
+            for item in snapshot:
+                self._update_one(item)
+        else:
+            self._update_one(snapshot)
+
+        # 唤醒所有等待者
+        if self._waiter is not None:
+            if not self._waiter.done():
+                self._waiter.set_result(self.version)
+            self._waiter = None
+
+    def _update_one(self, snapshot):
+        symbol = snapshot.raw_symbol or snapshot.symbol
+        key = (snapshot.exchange, symbol)
+        self.version += 1
+        self._entries[key] = snapshot
+        self._versions[key] = self.version
+        exchanges = self._by_symbol.get(symbol)
+        if exchanges is None:
+            exchanges = self._by_symbol[symbol] = {}
+        exchanges[snapshot.exchange] = snapshot
+
+    async def wait_for_change(self, since: int, timeout: float = None) -> int:
+        # 等到版本号超过 since，返回当前版本号；超时抛 asyncio.TimeoutError
+        if self.version > since:
+            return self.version
+        if self._waiter is None:
+            self._waiter = asyncio.get_running_loop().create_future()
+        await asyncio.wait_for(asyncio.shield(self._waiter), timeout)
+        return self.version
+
+    def changed_since(self, since: int) -> list:
+        # 版本号 since 之后更新过的盘口（每个 key 只返回最新一条）
+        return [self._entries[key] for key, v in self._versions.items() if v > since]
+
+    async def updates(self, since: int = 0):
+        # 异步迭代：async for version, snapshots in cache.updates(): ...
+        # 每次返回自上次以来变化过的盘口，处理得慢时中间的版本自动合并
+        while True:
+            version = await self.wait_for_change(since)
+            yield version, self.changed_since(since)
+            since = version
+
+    def get(self, exchange: str, symbol: str):
+        return self._entries.get((exchange, symbol))
+
+    def symbol_view(self, symbol: str) -> dict:
+        # {exchange: MarketSnapshot}
+        return dict(self._by_symbol.get(symbol, {}))
+
+    def symbols(self) -> list:
+        return list(self._by_symbol.keys())
+
+    def __len__(self):
+        return len(self._entries)
@@ -2,10 +2,26 @@ import asyncio
 import datetime
 import os
 import shutil
-from collections import defaultdict
+import time
+from config import TICK_BUFFER_BYTES, PLOT_WINDOW_MINUTES, ARBITRAGE_MIN_SPREAD_PCT, ARBITRAGE_MAX_QUOTE_AGE_MS, PLOT_WORKERS, CSV_WRITER_THREAD, PARQUET_SINK, LOG_LEVELS, LOG_ECHO_STDOUT
+from config import SNAPSHOT_QUEUE_MAXSIZE, SNAPSHOT_QUEUE_POLICY, WRITE_QUEUE_MAXSIZE, SHARD_WORKERS, SHARD_PLAN, SYMBOLS_FILE
+from config import SHM_BOOK, SHM_BOOK_NAME
+from config import LATENCY_TRACKING, LATENCY_REPORT_SEC, LATENCY_REPORT_FILE, LATENCY_CSV_COLUMNS
+from config import ORDER_BOOKS, ORDER_BOOK_QUEUE_MAXSIZE, ORDER_BOOK_DEPTH, TAKER_FEES, DEPTH_ARBITRAGE_MIN_PROFIT
 from dispatcher.manager import ExchangeManager
-from utils.csv_utils import CSVManager, WriteTask, writer_worker
-from utils.plot_arbitrage import plot_arbitrage_snapshot
+from dispatcher.queues import BoundedSnapshotQueue
+from dispatcher.sharding import ShardedExchangeManager
+from dispatcher.top_cache import TopOfBookCache
+from models.base import MarketSnapshotBatch
+from utils.arbitrage_monitor import ArbitrageMonitor
+from utils.logger import clean_log_dir, setup_log_pipeline, shutdown_log_pipeline
+from utils.depth_arbitrage import DepthArbitrageEngine
+from utils.csv_utils import CSVManager, ThreadedCSVManager, WriteTask, batch_writer_worker, drain_write_queue, LATENCY_HEADERS
+from utils.latency import LatencyRecorder, format_latency_line, write_latency_report
+from utils.parquet_sink import ParquetSink, parquet_worker
+from utils.render_pool import RenderPool
+from utils.shm_book import ShmBookWriter
+from utils.tick_store import TickStore
 
 # 🧹 启动前清空输出目录
 output_dir = "snapshots"
@@ -15,65 +31,229 @@ os.makedirs(output_dir, exist_ok=True)
 
 # 全局缓存
 active_symbols = set()
-symbol_exchange_data = defaultdict(lambda: defaultdict(lambda: {'times': [], 'bid': [], 'ask': []}))
+tick_store = TickStore(max_bytes_per_series=TICK_BUFFER_BYTES)  # 每个 (symbol, exchange) 定长 ring buffer
+top_cache = TopOfBookCache()  # 每个 (exchange, symbol) 最新盘口，连接器直接写入
+arbitrage_monitor = ArbitrageMonitor(
+    min_spread_pct=ARBITRAGE_MIN_SPREAD_PCT,
+    max_age_ms=ARBITRAGE_MAX_QUOTE_AGE_MS,
+)
+latency_recorder = LatencyRecorder() if LATENCY_TRACKING else None
+latest_books = {}  # (exchange, symbol) → 最新 BookSnapshot（前 N 档）
+depth_engine = DepthArbitrageEngine(
+    fees=TAKER_FEES,
+    depth=ORDER_BOOK_DEPTH,
+    min_profit=DEPTH_ARBITRAGE_MIN_PROFIT,
+    max_age_ms=ARBITRAGE_MAX_QUOTE_AGE_MS,
+)
 
-async def consume_snapshots(snapshot_queue: asyncio.Queue, write_queue: asyncio.Queue):
-    while True:
-        snapshot = await snapshot_queue.get()
-        symbol = snapshot.raw_symbol
-        exchange = snapshot.exchange
-        bid1 = snapshot.bid1
-        ask1 = snapshot.ask1
-        timestamp = datetime.datetime.now()
-
-        # ✅ 跟踪活跃 symbol
-        active_symbols.add(symbol)
-
-        # ✅ 更新数据缓存
-        data = symbol_exchange_data[symbol][exchange]
-        if isinstance(data, dict):
-            data['times'].append(timestamp)
-            data['bid'].append(bid1)
-            data['ask'].append(ask1)
+async def process_snapshot(snapshot, write_queue: asyncio.Queue, parquet_sink: ParquetSink = None,
+                           shm_book: ShmBookWriter = None, dequeue_ns: int = None):
+    # ⚡ 实时套利监控（先于其他处理，降低事件延迟）
+    arbitrage_monitor.on_snapshot(snapshot)
+
+    symbol = snapshot.raw_symbol
+    exchange = snapshot.exchange
+    bid1 = snapshot.bid1
+    ask1 = snapshot.ask1
+    timestamp = datetime.datetime.now()
+    ts_ms = int(timestamp.timestamp() * 1000)
+
+    # ✅ 跟踪活跃 symbol
+    active_symbols.add(symbol)
+
+    # ✅ 更新数据缓存
+    tick_store.append(symbol, exchange, ts_ms, bid1, ask1, snapshot.bid_vol1, snapshot.ask_vol1)
+
+    # 🧠 共享内存盘口表（可选）
+    if shm_book:
+        shm_book.publish_snapshot(snapshot, ts_ms)
+
+    # 📦 列式 Parquet 输出（可选）
+    if parquet_sink:
+        parquet_sink.append(snapshot, ts_ms)
+
+    # ⏱️ 可选：每行附带延迟列
+    latency_cols = []
+    if LATENCY_CSV_COLUMNS:
+        if snapshot.recv_ns is not None:
+            parsed_ns = snapshot.parsed_ns or snapshot.recv_ns
+            latency_cols = [snapshot.timestamp, snapshot.recv_ms, (parsed_ns - snapshot.recv_ns) // 1000,
+                            ((dequeue_ns or parsed_ns) - parsed_ns) // 1000]
         else:
-            print(f"❌ 数据错误: {type(data)}")
-            snapshot_queue.task_done()
-            continue
+            latency_cols = [snapshot.timestamp, "", "", ""]  # 没有接收时间戳：留空占位，列数与表头一致
+
+    # ⬇️ 写入 CSV 队列
+    await write_queue.put(WriteTask("exchange", exchange, [
+        timestamp.isoformat(), symbol, bid1, ask1, snapshot.bid_vol1, snapshot.ask_vol1, *latency_cols
+    ]))
+    await write_queue.put(WriteTask("symbol", symbol, [
+        timestamp.isoformat(), exchange, bid1, ask1, snapshot.bid_vol1, snapshot.ask_vol1, *latency_cols
+    ]))
 
-        # ⬇️ 写入 CSV 队列
-        await write_queue.put(WriteTask("exchange", exchange, [
-            timestamp.isoformat(), symbol, bid1, ask1, snapshot.bid_vol1, snapshot.ask_vol1
-        ]))
-        await write_queue.put(WriteTask("symbol", symbol, [
-            timestamp.isoformat(), exchange, bid1, ask1, snapshot.bid_vol1, snapshot.ask_vol1
-        ]))
+async def consume_snapshots(snapshot_queue: asyncio.Queue, write_queue: asyncio.Queue, parquet_sink: ParquetSink = None,
+                            shm_book: ShmBookWriter = None):
+    while True:
+        item = await snapshot_queue.get()
+        dequeue_ns = time.monotonic_ns()
+
+        # 📦 批量帧在这里展开
+        snapshots = item if isinstance(item, MarketSnapshotBatch) else (item,)
+        for snapshot in snapshots:
+            await process_snapshot(snapshot, write_queue, parquet_sink, shm_book, dequeue_ns)
+            if latency_recorder:
+                latency_recorder.record(snapshot, dequeue_ns, time.monotonic_ns())
 
         snapshot_queue.task_done()
 
-async def periodic_plot_task(interval_sec: int):
+async def consume_books(book_queue: asyncio.Queue):
+    while True:
+        book = await book_queue.get()
+        latest_books[(book.exchange, book.symbol)] = book
+        # 📚 按深度重算与该交易所相关的套利组合
+        depth_engine.on_book(book)
+        book_queue.task_done()
+
+async def periodic_plot_task(render_pool: RenderPool, interval_sec: int):
+    while True:
+        await asyncio.sleep(interval_sec)
+        if render_pool.busy:
+            render_pool.skip_cycle()  # 上一轮未画完，不再切片
+            continue
+        jobs = render_pool.build_jobs(tick_store, list(active_symbols), PLOT_WINDOW_MINUTES)
+        if jobs:
+            render_pool.submit_cycle(jobs, f'{output_dir}/image')
+
+async def log_spread_events():
+    async for event in arbitrage_monitor.stream():
+        print(f"💰 {event.symbol} {event.spread_pct:.3f}% Buy {event.buy_exchange} @ {event.min_ask} → "
+              f"Sell {event.sell_exchange} @ {event.max_bid} ({event.latency_us:.0f}µs)")
+
+async def log_depth_events():
+    async for event in depth_engine.stream():
+        print(f"📚💰 {event.symbol} 可成交 {event.quantity:g} 扣费后 {event.spread_pct:.3f}% 利润 {event.profit:.2f} | "
+              f"Buy {event.buy_exchange} @ {event.vwap_buy:.6g} → Sell {event.sell_exchange} @ {event.vwap_sell:.6g} "
+              f"({event.latency_us:.0f}µs)")
+
+async def log_connector_stats(manager: ExchangeManager, write_queue: asyncio.Queue, interval_sec: int = 60):
+    while True:
+        await asyncio.sleep(interval_sec)
+        qs = manager.queue_stats()
+        if qs:
+            print(f"📥 行情队列 [{qs['policy']}] 当前 {qs['depth']}/{qs['maxsize']} 峰值 {qs['high_water']} "
+                  f"丢弃 {qs['dropped']} 合并 {qs['conflated']} | 写队列 {write_queue.qsize()}/{write_queue.maxsize}")
+        for label, st in manager.connection_stats().items():
+            rc = st["reconnect"]
+            print(f"🔌 [{label}] {st['topics']} 个 topic，{st['frames_per_sec']} 帧/s，累计 {st['frames']} 帧 "
+                  f"{st['bytes'] / 1024 / 1024:.1f}MB | 重连 {rc['reconnects']} 次（假死 {rc['stale_reconnects']}）"
+                  f"停机 {rc['downtime_sec']}s 首包 {rc['last_ttfm_sec']}s")
+            sub = st["subscription"]
+            if sub["pending"]:
+                print(f"   ⏳ 订阅确认 {sub['acked']}/{sub['topics']}，未确认: {sub['pending_sample']}")
+            elif sub["fully_subscribed_sec"] is not None:
+                print(f"   ✅ {sub['topics']} 个 topic 订阅完成，{sub['messages']} 条消息，"
+                      f"耗时 {sub['fully_subscribed_sec']}s，最长静默 {sub['max_silence_sec']}s")
+            if sub["stale"] or sub["rejected"]:
+                print(f"   ⚠️ 静默 {sub['stale']} 个 {sub['stale_sample']}（累计重订 {sub['resubscribes']} 次，"
+                      f"恢复 {sub['recovered']}）| 被拒 {sub['rejected']} 个 {sub['rejected_sample']}")
+            books = st.get("books")
+            if books:
+                print(f"   📚 订单簿 {books['books']} 本，未同步 {books['unsynced']}，增量 {books['deltas']} 条，"
+                      f"丢包 {books['gaps']} 过期 {books['stale']} 交叉 {books['crossed']} "
+                      f"快照超时 {books['resync_timeouts']}")
+        for st in getattr(manager, "shard_stats", list)():
+            print(f"🧩 分片 {st['shard']} {'运行中' if st['alive'] else '已退出'} CPU {st['cpu_pct']}% "
+                  f"{st['ticks_per_sec']} ticks/s 累计 {st['received_ticks']} {st['exchanges']}")
+        print(f"📒 最新盘口缓存 {len(top_cache)} 个 (exchange, symbol)，版本 {top_cache.version}")
+        if latest_books:
+            ds = depth_engine.stats()
+            print(f"📚 最新深度 {len(latest_books)} 个 (exchange, symbol) | 深度套利 {ds['symbols']} 个 symbol，"
+                  f"{ds['books']} 次计算，平均 {ds['avg_eval_us']}µs，事件 {ds['events']}")
+        for exchange, st in manager.decompression_stats().items():
+            print(f"🗜️ [{exchange}] {st['compression']} {st['frames']} 帧 "
+                  f"{st['compressed_bytes'] / 1024:.0f}KB → {st['decompressed_bytes'] / 1024:.0f}KB "
+                  f"(x{st['ratio']}) 平均 {st['avg_us']}µs 最长 {st['max_us']}µs 失败 {st['errors']}")
+
+async def log_latency_stats(interval_sec: int, report_file: str):
     while True:
         await asyncio.sleep(interval_sec)
-        current_symbols = list(active_symbols)
-        for symbol in current_symbols:
-            symbol_data = symbol_exchange_data.get(symbol)
-            if symbol_data:
-                plot_arbitrage_snapshot(symbol, symbol_data, f'{output_dir}/image')
-
-async def main():
-    snapshot_queue = asyncio.Queue()
-    write_queue = asyncio.Queue()
-    csv_manager = CSVManager(output_dir)
-    manager = ExchangeManager(queue=snapshot_queue)
+        report = latency_recorder.report()
+        for exchange, stages in sorted(report["window"].items()):
+            print(format_latency_line(exchange, stages))
+        try:
+            write_latency_report(report_file, report)
+        except OSError as e:
+            print(f"⚠️ 延迟统计写入失败: {e}")
+
+def start_shards(symbols_file: str = SYMBOLS_FILE):
+    # 🧩 同步步骤：分片子进程必须在 asyncio.run 之前、任何线程启动之前 fork
+    if SHARD_WORKERS <= 0:
+        return None
+    clean_log_dir("./log")  # 子进程各自写日志，先清空，main() 里不再清
+    shards = ShardedExchangeManager(None, top_cache=top_cache, workers=SHARD_WORKERS,
+                                    plan=SHARD_PLAN, symbols_file=symbols_file)
+    shards.start()
+    return shards
+
+async def main(symbols_file: str = SYMBOLS_FILE, monitor=None, shards: ShardedExchangeManager = None):
+    # monitor(manager, snapshot_queue, write_queue)：可选的额外协程（压测采样等，见 benchmarks/loadtest.py）
+    # shards：分片模式下由 start_shards() 预先启动好的子进程
+    if SHARD_WORKERS > 0 and shards is None:
+        raise RuntimeError("分片模式需先在事件循环外调用 start_shards()")
+    # 🖼️ 绘图放到子进程，不阻塞事件循环；必须最先 fork，此时日志线程、写盘线程都还没启动
+    render_pool = RenderPool(max_workers=PLOT_WORKERS)
+    render_pool.start()
+    # 📝 清空旧日志，启动后台日志线程（需在创建连接器之前）
+    setup_log_pipeline("./log", echo_stdout=LOG_ECHO_STDOUT, levels=LOG_LEVELS, clean=shards is None)
+    # 📏 有界队列：下游跟不上时按策略处理，内存不再无限增长
+    snapshot_queue = BoundedSnapshotQueue(maxsize=SNAPSHOT_QUEUE_MAXSIZE, policy=SNAPSHOT_QUEUE_POLICY)
+    write_queue = asyncio.Queue(maxsize=WRITE_QUEUE_MAXSIZE)
+    # 📚 深度队列：同一 (exchange, symbol) 只保留最新一本（分片模式下不输出）
+    book_queue = (BoundedSnapshotQueue(maxsize=ORDER_BOOK_QUEUE_MAXSIZE, policy="conflate")
+                  if ORDER_BOOKS and shards is None else None)
+    if shards is not None:
+        # 🧩 连接器分到多个子进程，解析 / 解压不再争用主进程的 GIL
+        manager = shards
+        manager.attach_queue(snapshot_queue)
+    else:
+        manager = ExchangeManager(queue=snapshot_queue, top_cache=top_cache, symbols_file=symbols_file,
+                                  book_queue=book_queue)
+    # 💾 默认在独立线程里写盘，磁盘抖动不影响行情接收
+    extra_headers = LATENCY_HEADERS if LATENCY_CSV_COLUMNS else None
+    csv_manager = (ThreadedCSVManager(output_dir, extra_headers=extra_headers) if CSV_WRITER_THREAD
+                   else CSVManager(output_dir, extra_headers))
+    parquet_sink = ParquetSink(output_dir) if PARQUET_SINK else None
+    shm_book = ShmBookWriter(SHM_BOOK_NAME, symbols_file) if SHM_BOOK else None
 
+    tasks = [parquet_worker(parquet_sink)] if parquet_sink else []
+    if latency_recorder:
+        tasks.append(log_latency_stats(LATENCY_REPORT_SEC, LATENCY_REPORT_FILE))
+    if book_queue is not None:
+        tasks += [consume_books(book_queue), log_depth_events()]
+    if monitor:
+        tasks.append(monitor(manager, snapshot_queue, write_queue))
     try:
         await asyncio.gather(
             manager.run_all(),
-            consume_snapshots(snapshot_queue, write_queue),
-            writer_worker(write_queue, csv_manager, flush_interval=5),
-            periodic_plot_task(60),  # ⏱ 自动获取 symbol，每 60 秒绘图
+            consume_snapshots(snapshot_queue, write_queue, parquet_sink, shm_book),
+            batch_writer_worker(write_queue, csv_manager, flush_interval=5),  # 🧃 批量写 CSV
+            periodic_plot_task(render_pool, 60),  # ⏱ 自动获取 symbol，每 60 秒绘图
+            log_spread_events(),
+            log_connector_stats(manager, write_queue),
+            *tasks,
         )
     finally:
-        csv_manager.close_all()
+        drained = await drain_write_queue(write_queue, csv_manager)  # 排空写队列后关闭文件
+        await asyncio.get_running_loop().run_in_executor(None, csv_manager.close_all)
+        if drained:
+            print(f"🧃 关闭前写入写队列中剩余的 {drained} 行")
+        render_pool.shutdown()
+        if parquet_sink:
+            parquet_sink.close()
+        if shm_book:
+            shm_book.close()
+        if shards is not None:
+            manager.shutdown()
+        shutdown_log_pipeline()  # 写完队列里剩余的日志
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(shards=start_shards()))
@@ -1,5 +1,7 @@
 # import datetime
 from datetime import datetime
+
+
 class SubscriptionRequest:
     def __init__(self, symbol, channel="ticker", depth_level=0):
         self.symbol = symbol
@@ -8,6 +10,14 @@ class SubscriptionRequest:
 
 
 class MarketSnapshot:
+    # __slots__：不带 __dict__，每个 tick 更省内存、属性访问更快
+    __slots__ = (
+        "exchange", "symbol", "raw_symbol", "bid1", "ask1",
+        "bid_vol1", "ask_vol1", "total_volume", "timestamp",
+        "_timestamp_iso", "_timestamp_hms",
+        "recv_ns", "recv_ms", "parsed_ns",
+    )
+
     def __init__(
         self,
         exchange,
@@ -29,9 +39,25 @@ class MarketSnapshot:
         self.ask_vol1 = ask_vol1            # 卖一量
         self.total_volume = total_volume    # 总成交量（可选）
         self.timestamp = timestamp          # 毫秒级时间戳
-        self.timestamp_iso = self.to_iso(timestamp)  # ISO 格式时间
-        self.timestamp_hms = self.to_hms(timestamp)
+        self._timestamp_iso = None          # 格式化时间在首次访问时才计算
+        self._timestamp_hms = None
+        # 延迟统计用的本地时间戳，由 BaseAsyncConnector.emit 填写
+        self.recv_ns = None                 # 收到所在帧的 monotonic 纳秒
+        self.recv_ms = None                 # 收到所在帧的墙钟毫秒（与交易所时间戳比较）
+        self.parsed_ns = None               # 解析完成（emit）的 monotonic 纳秒
 
+    @property
+    def timestamp_iso(self) -> str:
+        # ISO 格式时间
+        if self._timestamp_iso is None:
+            self._timestamp_iso = self.to_iso(self.timestamp)
+        return self._timestamp_iso
+
+    @property
+    def timestamp_hms(self) -> str:
+        if self._timestamp_hms is None:
+            self._timestamp_hms = self.to_hms(self.timestamp)
+        return self._timestamp_hms
 
     def to_iso(self, ts_ms: int) -> str:
         try:
@@ -44,3 +70,38 @@ class MarketSnapshot:
             return datetime.fromtimestamp(ts_ms / 1000).strftime("%H:%M:%S")
         except:
             return ""
+
+
+# 批量形式的行情：一帧里带多个 symbol 的交易所（如 BitMEX quote）整帧入队一次，
+# 每个 symbol 只存一个数值元组，消费端再展开成 MarketSnapshot
+class MarketSnapshotBatch:
+    __slots__ = ("exchange", "symbols", "raw_symbols", "_rows", "recv_ns", "recv_ms", "parsed_ns")
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.symbols = []
+        self.raw_symbols = []
+        self._rows = []             # (bid1, ask1, bid_vol1, ask_vol1, timestamp)
+        self.recv_ns = None         # 整批共用一组时间戳（同 MarketSnapshot）
+        self.recv_ms = None
+        self.parsed_ns = None
+
+    def append(self, symbol, bid1, ask1, timestamp, bid_vol1=None, ask_vol1=None, raw_symbol=None):
+        self.symbols.append(symbol)
+        self.raw_symbols.append(raw_symbol)
+        self._rows.append((bid1, ask1, bid_vol1, ask_vol1, timestamp))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        exchange = self.exchange
+        for symbol, raw_symbol, (bid1, ask1, bid_vol1, ask_vol1, timestamp) in zip(
+            self.symbols, self.raw_symbols, self._rows
+        ):
+            snapshot = MarketSnapshot(exchange, symbol, bid1, ask1, timestamp,
+                                      bid_vol1=bid_vol1, ask_vol1=ask_vol1, raw_symbol=raw_symbol)
+            snapshot.recv_ns = self.recv_ns
+            snapshot.recv_ms = self.recv_ms
+            snapshot.parsed_ns = self.parsed_ns
+            yield snapshot
@@ -0,0 +1,288 @@
+# models/orderbook.py
+#
+# L2 订单簿：深度频道的连接器按 symbol 维护一本，快照 / 增量都写进来，
+# 再按需导出前 N 档的 BookSnapshot（可算给定滑点下的可成交量、VWAP）
+
+from bisect import bisect_left
+
+import numpy as np
+
+from models.base import MarketSnapshot
+
+
+class _Ladder:
+    # 单边价格档位：keys 升序（卖盘为价格，买盘为负价格），prices / sizes 与 keys 一一对应
+    # 查找 O(log n)；插入 / 删除是 list 的内存移动，几百档以内远快于平衡树
+    __slots__ = ("descending", "keys", "prices", "sizes")
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self.keys = []
+        self.prices = []
+        self.sizes = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.keys.clear()
+        self.prices.clear()
+        self.sizes.clear()
+
+    def load(self, levels):
+        # 整边替换（快照）；数量为 0 的档位丢弃
+        sign = -1.0 if self.descending else 1.0
+        rows = sorted((sign * float(p), float(p), float(s)) for p, s, *_ in levels if float(s) > 0)
+        self.keys = [r[0] for r in rows]
+        self.prices = [r[1] for r in rows]
+        self.sizes = [r[2] for r in rows]
+
+    def set(self, price: float, size: float):
+        # 增量：数量为 0 表示删除该档
+        key = -price if self.descending else price
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            if size > 0:
+                self.sizes[i] = size
+            else:
+                del self.keys[i], self.prices[i], self.sizes[i]
+        elif size > 0:
+            self.keys.insert(i, key)
+            self.prices.insert(i, price)
+            self.sizes.insert(i, size)
+
+    def truncate(self, levels: int):
+        if len(self.keys) > levels:
+            del self.keys[levels:], self.prices[levels:], self.sizes[levels:]
+
+    def best(self):
+        return (self.prices[0], self.sizes[0]) if self.keys else (None, None)
+
+    def top(self, n: int) -> np.ndarray:
+        # (n, 2) 数组：价格、数量，按优先级排列
+        out = np.empty((min(n, len(self.keys)), 2), dtype=np.float64)
+        out[:, 0] = self.prices[:n]
+        out[:, 1] = self.sizes[:n]
+        return out
+
+
+class OrderBook:
+    # 序列号检查：
+    #   seq 不大于当前 seq 的消息视为过期 / 重复，直接忽略
+    #   交易所提供 prev_seq（上一条的序列号）时必须与当前 seq 相等，否则判定丢包，需要重新同步
+    # 未同步（还没收到快照 / 丢包后）期间的增量先缓存，收到快照后把 seq 更新的部分补上
+    # max_levels 只适合纯快照推送；增量维护的订单簿截断后，深处的档位会在上层被删后缺失
+    def __init__(self, exchange: str, symbol: str, raw_symbol: str = None, max_levels: int = None,
+                 buffer_limit: int = 1000):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.raw_symbol = raw_symbol or symbol
+        self.max_levels = max_levels
+        self.bids = _Ladder(descending=True)
+        self.asks = _Ladder(descending=False)
+        self.seq = None
+        self.timestamp = None
+        self.synced = False         # 收到快照之后才为 True；检测到丢包时置 False
+        self.resync_requested = False   # 连接器已请求快照 / 重新订阅，收到快照后清除
+        self.resync_at = None           # 最近一次请求的 monotonic 时间，用于超时重试
+        self.buffer_limit = buffer_limit
+        self._buffer = []           # 未同步期间收到的增量 (bids, asks, seq, prev_seq, timestamp)
+
+        # 指标
+        self.snapshots = 0
+        self.deltas = 0
+        self.stale = 0
+        self.gaps = 0
+        self.crossed = 0
+        self.resync_timeouts = 0
+
+    def resync_due(self, now: float, timeout: float) -> bool:
+        # 未同步，且还没请求过快照或上次请求 timeout 秒内没有回复（回复丢失）时返回 True
+        if self.synced:
+            return False
+        return not self.resync_requested or now - self.resync_at >= timeout
+
+    def mark_resync_requested(self, now: float):
+        if self.resync_requested:
+            self.resync_timeouts += 1
+        self.resync_requested = True
+        self.resync_at = now
+
+    def apply_snapshot(self, bids, asks, seq=None, timestamp=None) -> bool:
+        if seq is not None and self.seq is not None and self.synced and seq <= self.seq:
+            self.stale += 1
+            return False
+        self.bids.load(bids)
+        self.asks.load(asks)
+        self._trim()
+        self.seq = seq
+        self.timestamp = timestamp
+        self.synced = True
+        self.resync_requested = False
+        self.snapshots += 1
+        buffered, self._buffer = self._buffer, []
+        for bids, asks, d_seq, d_prev, d_ts in buffered:
+            if seq is not None and d_seq is not None and d_seq <= seq:
+                continue    # 已包含在快照里
+            if self.seq == seq and d_prev is not None and seq is not None:
+                # 快照之后的第一条增量：prev_seq 不晚于快照即可（可能早于快照）
+                if d_prev > seq:
+                    self.invalidate()
+                    break
+                d_prev = None
+            if not self.apply_delta(bids, asks, d_seq, d_prev, d_ts) and not self.synced:
+                break
+        self._check_crossed()
+        return True
+
+    def apply_delta(self, bids, asks, seq=None, prev_seq=None, timestamp=None) -> bool:
+        # 返回 False 表示本条没有应用；self.synced 为 False 时调用方应重新订阅 / 请求快照
+        if not self.synced:
+            if len(self._buffer) < self.buffer_limit:
+                self._buffer.append((bids, asks, seq, prev_seq, timestamp))
+            return False
+        if seq is not None and self.seq is not None:
+            if seq <= self.seq:
+                self.stale += 1
+                return False
+            if prev_seq is not None and prev_seq != self.seq:
+                self.gaps += 1
+                self.synced = False
+                return False
+        for p, s, *_ in bids:
+            self.bids.set(float(p), float(s))
+        for p, s, *_ in asks:
+            self.asks.set(float(p), float(s))
+        self._trim()
+        if seq is not None:
+            self.seq = seq
+        self.timestamp = timestamp
+        self.deltas += 1
+        self._check_crossed()
+        return True
+
+    def invalidate(self):
+        # 外部发现不一致（例如校验和不符）时调用，等待下一次快照
+        self.synced = False
+        self.gaps += 1
+
+    def clear(self):
+        # 断线重连后序列号可能从头开始，整本丢弃
+        self.bids.clear()
+        self.asks.clear()
+        self.seq = None
+        self.synced = False
+        self.resync_requested = False
+        self._buffer = []
+
+    def _trim(self):
+        if self.max_levels:
+            self.bids.truncate(self.max_levels)
+            self.asks.truncate(self.max_levels)
+
+    def _check_crossed(self):
+        if self.bids.keys and self.asks.keys and self.bids.prices[0] >= self.asks.prices[0]:
+            self.crossed += 1
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def to_market_snapshot(self, timestamp=None) -> MarketSnapshot:
+        # 一档行情（原有 CSV / 套利监控 / 绘图链路使用）
+        bid1, bid_vol1 = self.bids.best()
+        ask1, ask_vol1 = self.asks.best()
+        return MarketSnapshot(
+            exchange=self.exchange,
+            symbol=self.symbol,
+            raw_symbol=self.raw_symbol,
+            bid1=bid1 or 0.0,
+            ask1=ask1 or 0.0,
+            bid_vol1=bid_vol1 or 0.0,
+            ask_vol1=ask_vol1 or 0.0,
+            timestamp=timestamp if timestamp is not None else self.timestamp,
+        )
+
+    def to_snapshot(self, depth: int = 10) -> "BookSnapshot":
+        return BookSnapshot(self.exchange, self.symbol, self.bids.top(depth), self.asks.top(depth),
+                            self.timestamp, raw_symbol=self.raw_symbol, seq=self.seq)
+
+    def stats(self) -> dict:
+        return {
+            "bid_levels": len(self.bids),
+            "ask_levels": len(self.asks),
+            "seq": self.seq,
+            "synced": self.synced,
+            "snapshots": self.snapshots,
+            "deltas": self.deltas,
+            "stale": self.stale,
+            "gaps": self.gaps,
+            "crossed": self.crossed,
+            "buffered": len(self._buffer),
+        }
+
+
+class BookSnapshot:
+    # 前 N 档深度：bids / asks 为 (n, 2) float64 数组（价格、数量），按优先级排列
+    __slots__ = (
+        "exchange", "symbol", "raw_symbol", "bids", "asks", "timestamp", "seq",
+        "recv_ns", "recv_ms", "parsed_ns",
+    )
+
+    def __init__(self, exchange, symbol, bids: np.ndarray, asks: np.ndarray, timestamp,
+                 raw_symbol=None, seq=None):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.raw_symbol = raw_symbol
+        self.bids = bids
+        self.asks = asks
+        self.timestamp = timestamp
+        self.seq = seq
+        self.recv_ns = None         # 同 MarketSnapshot，由 BaseAsyncConnector.emit_book 填写
+        self.recv_ms = None
+        self.parsed_ns = None
+
+    @property
+    def bid1(self):
+        return float(self.bids[0, 0]) if len(self.bids) else 0.0
+
+    @property
+    def ask1(self):
+        return float(self.asks[0, 0]) if len(self.asks) else 0.0
+
+    def _side(self, side: str) -> np.ndarray:
+        # side: "buy" 吃卖盘，"sell" 吃买盘
+        return self.asks if side == "buy" else self.bids
+
+    def executable_size(self, side: str, slippage_pct: float) -> float:
+        # 相对最优价滑点不超过 slippage_pct（%）时可成交的数量
+        levels = self._side(side)
+        if not len(levels):
+            return 0.0
+        best = levels[0, 0]
+        if side == "buy":
+            mask = levels[:, 0] <= best * (1 + slippage_pct / 100)
+        else:
+            mask = levels[:, 0] >= best * (1 - slippage_pct / 100)
+        return float(levels[mask, 1].sum())
+
+    def vwap(self, side: str, quantity: float):
+        # 吃掉 quantity 的成交均价；深度不够时返回 None
+        levels = self._side(side)
+        if quantity <= 0 or not len(levels):
+            return None
+        cum = np.cumsum(levels[:, 1])
+        if cum[-1] < quantity:
+            return None
+        i = int(np.searchsorted(cum, quantity))
+        filled_before = cum[i - 1] if i else 0.0
+        notional = float((levels[:i, 0] * levels[:i, 1]).sum()) + levels[i, 0] * (quantity - filled_before)
+        return notional / quantity
+
+    def top_of_book(self):
+        # (bid1, bid_vol1, ask1, ask_vol1)
+        bid1, bid_vol1 = (float(self.bids[0, 0]), float(self.bids[0, 1])) if len(self.bids) else (0.0, 0.0)
+        ask1, ask_vol1 = (float(self.asks[0, 0]), float(self.asks[0, 1])) if len(self.asks) else (0.0, 0.0)
+        return bid1, bid_vol1, ask1, ask_vol1
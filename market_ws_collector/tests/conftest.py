@@ -0,0 +1,19 @@
+# tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+# 和 main.py 一样以 market_ws_collector 为根目录导入 connectors / utils
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import setup_log_pipeline, shutdown_log_pipeline  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def log_pipeline(tmp_path):
+    # 连接器日志写到临时目录，不碰 ./log
+    setup_log_pipeline(str(tmp_path / "log"), echo_stdout=False)
+    yield
+    shutdown_log_pipeline()
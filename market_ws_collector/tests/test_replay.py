@@ -0,0 +1,54 @@
+# tests/test_replay.py
+#
+# fixtures/okx_tickers.cap 由 benchmarks/frames.py 生成（1 个会话标记 + 20 帧 OKX tickers）：
+#   write_capture("okx", "tests/fixtures/okx_tickers.cap", count=20, interval_ms=100, seed=7)
+# 解析逻辑有意改变行情字段时，需要同步更新 OKX_DIGEST
+
+import asyncio
+import json
+import os
+
+from connectors.capture import SessionStart, load_capture
+from utils.replay import build_connector, replay_file, replay_frames
+
+OKX_CAPTURE = os.path.join(os.path.dirname(__file__), "fixtures", "okx_tickers.cap")
+OKX_DIGEST = "b4df4b276919160884a53eb4352122a48eb427a6"
+
+
+class _ListQueue:
+    def __init__(self):
+        self.items = []
+
+    async def put(self, item):
+        self.items.append(item)
+
+
+def test_replay_file_digest():
+    result = asyncio.run(replay_file(OKX_CAPTURE))
+    assert result.exchange == "okx"
+    assert result.frames == 20
+    assert result.snapshots == 20
+    assert result.errors == 0
+    assert result.sent == 0
+    assert result.digest == OKX_DIGEST
+
+
+def test_replay_snapshots_match_frames():
+    header, frames = load_capture(OKX_CAPTURE)
+    assert isinstance(frames[0][1], SessionStart)
+    tickers = [json.loads(raw)["data"][0] for _, raw in frames if not isinstance(raw, SessionStart)]
+
+    conn = build_connector(header)
+    conn.queue = _ListQueue()
+    asyncio.run(replay_frames(conn, frames))
+
+    snapshots = conn.queue.items
+    assert len(snapshots) == len(tickers)
+    for snapshot, ticker in zip(snapshots, tickers):
+        assert snapshot.exchange == "okx"
+        assert snapshot.raw_symbol == "BTC-USDT"
+        assert snapshot.bid1 == float(ticker["bidPx"])
+        assert snapshot.ask1 == float(ticker["askPx"])
+        assert snapshot.bid_vol1 == float(ticker["bidSz"])
+        assert snapshot.ask_vol1 == float(ticker["askSz"])
+        assert snapshot.recv_ns is not None
@@ -0,0 +1,186 @@
+# utils/arbitrage_monitor.py
+
+import asyncio
+import heapq
+import time
+
+
+class SpreadEvent:
+    def __init__(self, symbol, max_bid, min_ask, spread_pct, sell_exchange, buy_exchange, timestamp, latency_us):
+        self.symbol = symbol                # raw_symbol，例如 BTC-USDT
+        self.max_bid = max_bid              # 全市场最高买一
+        self.min_ask = min_ask              # 全市场最低卖一
+        self.spread_pct = spread_pct        # (max_bid - min_ask) / min_ask * 100
+        self.sell_exchange = sell_exchange  # 在此交易所卖出（最高买一）
+        self.buy_exchange = buy_exchange    # 在此交易所买入（最低卖一）
+        self.timestamp = timestamp          # 触发事件的 tick 的交易所毫秒时间戳
+        self.latency_us = latency_us        # 连接器收到该帧（snapshot.recv_ns）→ 产生事件 的耗时（微秒），含排队
+
+    def __repr__(self):
+        return (f"SpreadEvent({self.symbol} {self.spread_pct:.4f}% "
+                f"Buy {self.buy_exchange}@{self.min_ask} → Sell {self.sell_exchange}@{self.max_bid})")
+
+
+# 单个 symbol 的跨交易所最优价：两个带版本号的堆，旧报价惰性出堆，更新 O(log E)
+class _SymbolBook:
+    def __init__(self):
+        self.quotes = {}        # exchange → (bid, ask, version, recv_ns)
+        self.bid_heap = []      # (-bid, version, exchange)
+        self.ask_heap = []      # (ask, version, exchange)
+        self.version = 0
+        self.last_emitted = None
+
+    def update(self, exchange, bid, ask, recv_ns):
+        self.version += 1
+        v = self.version
+        self.quotes[exchange] = (bid, ask, v, recv_ns)
+        # 空盘口（价格为 0）不参与比较
+        if bid and bid > 0:
+            heapq.heappush(self.bid_heap, (-bid, v, exchange))
+        if ask and ask > 0:
+            heapq.heappush(self.ask_heap, (ask, v, exchange))
+
+        # 过期条目过多时重建，防止堆无限增长
+        limit = 4 * len(self.quotes) + 16
+        if len(self.bid_heap) > limit or len(self.ask_heap) > limit:
+            self._rebuild()
+
+    def _rebuild(self):
+        self.bid_heap = [(-q[0], q[2], ex) for ex, q in self.quotes.items() if q[0] and q[0] > 0]
+        self.ask_heap = [(q[1], q[2], ex) for ex, q in self.quotes.items() if q[1] and q[1] > 0]
+        heapq.heapify(self.bid_heap)
+        heapq.heapify(self.ask_heap)
+
+    def _top(self, heap, now_ns, max_age_ns):
+        while heap:
+            _, v, ex = heap[0]
+            q = self.quotes.get(ex)
+            if q is not None and q[2] == v:
+                if max_age_ns is None or now_ns - q[3] <= max_age_ns:
+                    return ex
+            heapq.heappop(heap)
+        return None
+
+    def best(self, now_ns, max_age_ns=None):
+        sell_ex = self._top(self.bid_heap, now_ns, max_age_ns)
+        buy_ex = self._top(self.ask_heap, now_ns, max_age_ns)
+        if sell_ex is None or buy_ex is None:
+            return None
+        return self.quotes[sell_ex][0], self.quotes[buy_ex][1], sell_ex, buy_ex
+
+
+class ArbitrageMonitor:
+    def __init__(self, min_spread_pct: float = 0.0, max_age_ms: int = None, queue_size: int = 1000):
+        self.min_spread_pct = min_spread_pct
+        self.max_age_ns = None if max_age_ms is None else max_age_ms * 1_000_000
+        self.queue_size = queue_size
+
+        self._books = {}
+        self._callbacks = []
+        self._subscribers = []
+
+        # 计数器
+        self.ticks = 0
+        self.events = 0
+        self.dropped_events = 0
+        self._rate_start = time.monotonic()
+        self._rate_ticks = 0
+        self._rate_events = 0
+        self.ticks_per_sec = 0.0
+        self.events_per_sec = 0.0
+
+    def add_callback(self, callback):
+        # callback(event) 在 on_snapshot 内同步调用，需保持轻量
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self._callbacks.remove(callback)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    async def stream(self):
+        # 异步迭代：async for event in monitor.stream(): ...
+        queue = self.subscribe()
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(queue)
+
+    def best(self, symbol: str):
+        book = self._books.get(symbol)
+        if book is None:
+            return None
+        return book.best(time.monotonic_ns(), self.max_age_ns)
+
+    def on_snapshot(self, snapshot, recv_ns: int = None):
+        # 以连接器收帧时的 monotonic 时间为起点，报价年龄和检测延迟都从这里算
+        recv_ns = recv_ns or getattr(snapshot, "recv_ns", None) or time.monotonic_ns()
+        self.ticks += 1
+        self._rate_ticks += 1
+
+        symbol = snapshot.raw_symbol or snapshot.symbol
+        book = self._books.get(symbol)
+        if book is None:
+            book = self._books[symbol] = _SymbolBook()
+        book.update(snapshot.exchange, snapshot.bid1, snapshot.ask1, recv_ns)
+
+        event = self._check(symbol, book, snapshot, recv_ns)
+        self._update_rates()
+        return event
+
+    def _check(self, symbol, book, snapshot, recv_ns):
+        best = book.best(recv_ns, self.max_age_ns)
+        if best is None:
+            return None
+        max_bid, min_ask, sell_ex, buy_ex = best
+
+        # 最优价与交易所组合都未变化时不重复推送
+        if best == book.last_emitted:
+            return None
+        spread_pct = (max_bid - min_ask) / min_ask * 100
+        if spread_pct < self.min_spread_pct:
+            book.last_emitted = None
+            return None
+        book.last_emitted = best
+
+        latency_us = (time.monotonic_ns() - recv_ns) / 1000
+        event = SpreadEvent(symbol, max_bid, min_ask, spread_pct, sell_ex, buy_ex, snapshot.timestamp, latency_us)
+        self.events += 1
+        self._rate_events += 1
+
+        for callback in self._callbacks:
+            callback(event)
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.dropped_events += 1
+        return event
+
+    def _update_rates(self):
+        now = time.monotonic()
+        elapsed = now - self._rate_start
+        if elapsed >= 1.0:
+            self.ticks_per_sec = self._rate_ticks / elapsed
+            self.events_per_sec = self._rate_events / elapsed
+            self._rate_ticks = 0
+            self._rate_events = 0
+            self._rate_start = now
+
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self._books),
+            "ticks": self.ticks,
+            "events": self.events,
+            "dropped_events": self.dropped_events,
+            "ticks_per_sec": round(self.ticks_per_sec, 1),
+            "events_per_sec": round(self.events_per_sec, 1),
+        }
@@ -1,15 +1,31 @@
 # utils/csv_utils.py
 
+import io
 import os
 import csv
 import asyncio
+import queue
+import threading
 import time
+from collections import defaultdict
+
+CSV_HEADERS = {
+    "exchange": ["timestamp", "symbol", "bid", "ask", "bid_vol", "ask_vol"],
+    "symbol": ["timestamp", "exchange", "bid", "ask", "bid_vol", "ask_vol"],
+}
+# 可选的延迟列：交易所时间戳、本地接收墙钟毫秒、解析耗时、排队耗时（微秒）
+LATENCY_HEADERS = ["exchange_ts", "recv_ts", "parse_us", "queue_us"]
 
 class CSVManager:
-    def __init__(self, output_root: str):
+    def __init__(self, output_root: str, extra_headers: list = None):
         self.output_root = output_root
+        self.headers = {category: headers + list(extra_headers or []) for category, headers in CSV_HEADERS.items()}
         self.writers = {}
         self.files = {}
+        self.pending = defaultdict(list)   # (category, key) → 待写入的已序列化文本块
+        self._buffer = io.StringIO()
+        self._serializer = csv.writer(self._buffer)
+        self.last_flush_ms = 0.0
         self._init_directories()
 
     def _init_directories(self):
@@ -38,24 +54,106 @@ class CSVManager:
         return self.writers[category][key]
 
     def write(self, category: str, key: str, row: list):
-        headers = {
-            "exchange": ["timestamp", "symbol", "bid", "ask", "bid_vol", "ask_vol"],
-            "symbol": ["timestamp", "exchange", "bid", "ask", "bid_vol", "ask_vol"],
-        }[category]
-        writer = self._get_writer(category, key, headers)
+        writer = self._get_writer(category, key, self.headers[category])
         writer.writerow(row)
 
+    def write_rows(self, category: str, key: str, rows: list):
+        # 一组行一次性序列化，缓存到 flush 时再整体写入文件
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._serializer.writerows(rows)
+        self.pending[(category, key)].append(self._buffer.getvalue())
+
     def flush_all(self):
+        # 每个文件一次 write + flush
+        start = time.perf_counter()
+        for (category, key), chunks in self.pending.items():
+            if not chunks:
+                continue
+            self._get_writer(category, key, self.headers[category])
+            f = self.files[category][key]
+            f.write("".join(chunks))
+            chunks.clear()
         for category_files in self.files.values():
             for f in category_files.values():
                 f.flush()
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    async def wait_ready(self, commands: int = 1):
+        # 同步写入没有内部队列，随时可写
+        return
 
     def close_all(self):
+        self.flush_all()
         for category_files in self.files.values():
             for f in category_files.values():
                 f.close()
 
 
+class ThreadedCSVManager:
+    # 所有 open/write/flush/close 都在单独的写线程里执行，事件循环只做入队
+    def __init__(self, output_root: str, max_pending: int = 10000, extra_headers: list = None):
+        self._manager = CSVManager(output_root, extra_headers)
+        self._commands = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self.dropped = 0   # 关闭后才提交的命令
+        self._thread = threading.Thread(target=self._run, name="csv-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def last_flush_ms(self) -> float:
+        return self._manager.last_flush_ms
+
+    @property
+    def pending(self) -> int:
+        return self._commands.qsize()
+
+    def _run(self):
+        while True:
+            command, args = self._commands.get()
+            if command is None:
+                break
+            try:
+                getattr(self._manager, command)(*args)
+            except Exception as e:
+                print(f"❌ CSV 写线程异常: {command} | {e}")
+        self._manager.close_all()
+
+    def _submit(self, command: str, *args):
+        # 只做非阻塞入队：事件循环上的调用方必须先 await wait_ready，队列满说明漏了背压
+        if self._closed:
+            self.dropped += 1
+            print(f"⚠️ CSV 写线程已关闭，丢弃 {command}（累计 {self.dropped} 次）")
+            return
+        try:
+            self._commands.put_nowait((command, args))
+        except queue.Full:
+            raise RuntimeError(f"CSV 写队列已满，提交 {command} 前需先 await wait_ready()") from None
+
+    def write(self, category: str, key: str, row: list):
+        self._submit("write", category, key, row)
+
+    def write_rows(self, category: str, key: str, rows: list):
+        self._submit("write_rows", category, key, rows)
+
+    def flush_all(self):
+        self._submit("flush_all")
+
+    async def wait_ready(self, commands: int = 1):
+        # 背压：写线程积压时让出事件循环，等到能放下 commands 条命令，而不是阻塞或丢数据
+        needed = min(commands, self._commands.maxsize)
+        while self._commands.maxsize - self._commands.qsize() < needed:
+            await asyncio.sleep(0.005)
+
+    def close_all(self):
+        # 关闭时排空队列：哨兵排在所有已提交命令之后；会阻塞到写线程结束，事件循环里要放到 executor 执行
+        if self._closed:
+            return
+        self._closed = True
+        self._commands.put((None, ()))
+        self._thread.join()
+
+
 class WriteTask:
     def __init__(self, category: str, key: str, row: list):
         self.category = category
@@ -69,6 +167,7 @@ async def writer_worker(write_queue: asyncio.Queue, csv_manager: CSVManager, flu
     while True:
         try:
             task = await asyncio.wait_for(write_queue.get(), timeout=flush_interval)
+            await csv_manager.wait_ready()
             csv_manager.write(task.category, task.key, task.row)
             write_queue.task_done()
         except asyncio.TimeoutError:
@@ -76,6 +175,115 @@ async def writer_worker(write_queue: asyncio.Queue, csv_manager: CSVManager, flu
 
         # 定时刷新逻辑
         if time.time() - last_flush >= flush_interval:
+            await csv_manager.wait_ready()
             csv_manager.flush_all()
             last_flush = time.time()
             print(f"🧃 CSV flushed at {time.strftime('%H:%M:%S')}")
+
+
+class WriterStats:
+    def __init__(self):
+        self.rows = 0
+        self.batches = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._window_rows = 0
+        self._window_start = time.time()
+
+    def add_batch(self, rows: int):
+        self.rows += rows
+        self.batches += 1
+        self._window_rows += rows
+
+    def add_flush(self, elapsed_ms: float):
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+    def rows_per_sec(self) -> float:
+        # 自上次调用以来的写入速率
+        now = time.time()
+        elapsed = now - self._window_start
+        rate = self._window_rows / elapsed if elapsed > 0 else 0.0
+        self._window_rows = 0
+        self._window_start = now
+        return rate
+
+
+def _group_rows(tasks) -> dict:
+    groups = defaultdict(list)
+    for task in tasks:
+        groups[(task.category, task.key)].append(task.row)
+    return groups
+
+
+async def _write_groups(csv_manager, groups: dict):
+    # 逐组等到写线程有空位再提交；写完的组从 groups 移除，中途被取消时调用方可以接着写剩下的
+    while groups:
+        await csv_manager.wait_ready()
+        (category, key), rows = next(iter(groups.items()))
+        csv_manager.write_rows(category, key, rows)
+        del groups[(category, key)]
+
+
+async def drain_write_queue(write_queue: asyncio.Queue, csv_manager) -> int:
+    # 关闭前把写队列里剩余的 WriteTask 全部交给 csv_manager，之后再 close_all
+    tasks = []
+    while True:
+        try:
+            tasks.append(write_queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+        write_queue.task_done()
+    await _write_groups(csv_manager, _group_rows(tasks))
+    return len(tasks)
+
+
+async def batch_writer_worker(write_queue: asyncio.Queue, csv_manager: CSVManager, flush_interval: int = 5,
+                              batch_size: int = 5000, batch_ms: int = 50, stats: WriterStats = None):
+    stats = stats or WriterStats()
+    last_flush = time.time()
+
+    while True:
+        batch = []
+        try:
+            batch.append(await asyncio.wait_for(write_queue.get(), timeout=flush_interval))
+        except asyncio.TimeoutError:
+            pass  # 超时无新任务，也要检查是否需要 flush
+
+        # 批量取出：最多 batch_size 条或等待 batch_ms 毫秒
+        if batch:
+            groups = None
+            try:
+                deadline = time.monotonic() + batch_ms / 1000
+                while len(batch) < batch_size:
+                    try:
+                        batch.append(write_queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        try:
+                            batch.append(await asyncio.wait_for(write_queue.get(), timeout=remaining))
+                        except asyncio.TimeoutError:
+                            break
+
+                groups = _group_rows(batch)
+                await _write_groups(csv_manager, groups)
+            except asyncio.CancelledError:
+                # 关闭时已从队列取出、还没提交的行照样交给 csv_manager，由 close_all 写盘
+                await _write_groups(csv_manager, _group_rows(batch) if groups is None else groups)
+                raise
+            for _ in batch:
+                write_queue.task_done()
+            stats.add_batch(len(batch))
+
+        # 定时刷新逻辑
+        if time.time() - last_flush >= flush_interval:
+            await csv_manager.wait_ready()
+            csv_manager.flush_all()
+            stats.add_flush(csv_manager.last_flush_ms)  # 线程模式下为上一次 flush 的耗时
+            last_flush = time.time()
+            print(f"🧃 CSV flushed at {time.strftime('%H:%M:%S')} | "
+                  f"{stats.rows_per_sec():.0f} rows/s | flush {stats.last_flush_ms:.1f}ms | 累计 {stats.rows} 行")
@@ -0,0 +1,253 @@
+# utils/depth_arbitrage.py
+#
+# 按深度计算可成交的跨交易所套利：在 A 吃卖盘买入、在 B 吃买盘卖出，
+# 两边同时沿档位往深处走，直到边际卖价（扣费后）不再高于边际买价（含费后），
+# 得到最大盈利数量、两边的成交均价（VWAP）和扣费后的价差 / 利润。
+#
+# 每个交易所的档位在收到 BookSnapshot 时预先算好含费价格、累计数量、累计金额并缓存，
+# 比较时按 (买方交易所, 卖方交易所) 广播成矩阵一次算完，不逐档循环
+
+import asyncio
+import time
+
+import numpy as np
+
+
+class DepthOpportunity:
+    def __init__(self, symbol, buy_exchange, sell_exchange, quantity, vwap_buy, vwap_sell,
+                 spread_pct, profit, timestamp, latency_us):
+        self.symbol = symbol                # raw_symbol，例如 BTC-USDT
+        self.buy_exchange = buy_exchange    # 吃卖盘买入的交易所
+        self.sell_exchange = sell_exchange  # 吃买盘卖出的交易所
+        self.quantity = quantity            # 最大盈利数量（基础币）
+        self.vwap_buy = vwap_buy            # 买入均价（含手续费）
+        self.vwap_sell = vwap_sell          # 卖出均价（扣手续费）
+        self.spread_pct = spread_pct        # (vwap_sell - vwap_buy) / vwap_buy * 100
+        self.profit = profit                # 扣费后利润（计价币）
+        self.timestamp = timestamp          # 触发计算的深度的毫秒时间戳
+        self.latency_us = latency_us        # 收到深度 → 算出结果 的耗时（微秒）
+
+    def __repr__(self):
+        return (f"DepthOpportunity({self.symbol} {self.quantity:g} @ {self.spread_pct:.4f}% "
+                f"Buy {self.buy_exchange}@{self.vwap_buy:g} → Sell {self.sell_exchange}@{self.vwap_sell:g} "
+                f"profit {self.profit:.2f})")
+
+
+def walk_ladders(ask_px, ask_cum, ask_notional, bid_px, bid_cum, bid_notional):
+    # 所有 (买方 a, 卖方 b) 组合一次算完：
+    #   ask_px (A, N)：买方各交易所卖盘含费价格，升序，不足 N 档用 inf 填充
+    #   ask_cum / ask_notional (A, N+1)：累计数量 / 累计含费金额，首列为 0，填充档位不再增加
+    #   bid_px (B, M)：卖方各交易所买盘扣费价格，降序，不足用 -inf 填充；bid_cum / bid_notional 同上
+    # 返回 (quantity, cost, revenue)，形状 (A, B)
+    #
+    # 最大盈利数量：吃到第 i 档卖盘时边际买价不超过 ask_px[i]，卖方价格高于 ask_px[i] 的买盘共 V_i，
+    # 因此 min(ask_cum[i+1], V_i) 以内每一单位都盈利；边际价格单调，取所有 i 的最大值即为交叉点
+    A, N = ask_px.shape
+    B, M = bid_px.shape
+    above = (bid_px[None, :, None, :] > ask_px[:, None, :, None]).sum(axis=-1)        # (A, B, N)
+    volume = np.take_along_axis(np.broadcast_to(bid_cum[None], (A, B, M + 1)), above, axis=2)
+    quantity = np.minimum(ask_cum[:, None, 1:], volume).max(axis=-1)                   # (A, B)
+
+    # 数量落在第 k 档：金额 = 前 k 档累计金额 + 第 k 档价格 × 剩余数量
+    rows_a = np.arange(A)[:, None]
+    cols_b = np.arange(B)[None, :]
+    k_ask = np.minimum((ask_cum[:, None, 1:] < quantity[..., None]).sum(axis=-1), N - 1)
+    k_bid = np.minimum((bid_cum[None, :, 1:] < quantity[..., None]).sum(axis=-1), M - 1)
+    filled = quantity > 0
+    with np.errstate(invalid="ignore"):
+        cost = np.where(filled, ask_notional[rows_a, k_ask]
+                        + ask_px[rows_a, k_ask] * (quantity - ask_cum[rows_a, k_ask]), 0.0)
+        revenue = np.where(filled, bid_notional[cols_b, k_bid]
+                           + bid_px[cols_b, k_bid] * (quantity - bid_cum[cols_b, k_bid]), 0.0)
+    return quantity, cost, revenue
+
+
+class _SymbolLadders:
+    # 单个 symbol 各交易所的缓存档位，每个交易所一行；新交易所出现时扩容
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.rows = {}              # exchange → 行号
+        self.exchanges = []
+        self.recv_ns = np.empty(0, dtype=np.int64)
+        self.ask_px = np.empty((0, depth))
+        self.ask_cum = np.empty((0, depth + 1))
+        self.ask_notional = np.empty((0, depth + 1))
+        self.bid_px = np.empty((0, depth))
+        self.bid_cum = np.empty((0, depth + 1))
+        self.bid_notional = np.empty((0, depth + 1))
+
+    def _row(self, exchange) -> int:
+        row = self.rows.get(exchange)
+        if row is None:
+            row = self.rows[exchange] = len(self.exchanges)
+            self.exchanges.append(exchange)
+            d = self.depth
+            self.recv_ns = np.append(self.recv_ns, 0)
+            self.ask_px = np.vstack([self.ask_px, np.full((1, d), np.inf)])
+            self.bid_px = np.vstack([self.bid_px, np.full((1, d), -np.inf)])
+            for name in ("ask_cum", "ask_notional", "bid_cum", "bid_notional"):
+                setattr(self, name, np.vstack([getattr(self, name), np.zeros((1, d + 1))]))
+        return row
+
+    def _fill(self, px, cum, notional, row, levels: np.ndarray, pad: float, fee_factor: float):
+        n = min(len(levels), self.depth)
+        price = levels[:n, 0] * fee_factor
+        size = levels[:n, 1]
+        px[row, :n] = price
+        px[row, n:] = pad
+        cum[row, 1:n + 1] = np.cumsum(size)
+        cum[row, n + 1:] = cum[row, n]
+        notional[row, 1:n + 1] = np.cumsum(price * size)
+        notional[row, n + 1:] = notional[row, n]
+
+    def update(self, exchange, bids: np.ndarray, asks: np.ndarray, fee_pct: float, recv_ns: int) -> int:
+        row = self._row(exchange)
+        fee = fee_pct / 100
+        self._fill(self.ask_px, self.ask_cum, self.ask_notional, row, asks, np.inf, 1 + fee)
+        self._fill(self.bid_px, self.bid_cum, self.bid_notional, row, bids, -np.inf, 1 - fee)
+        self.recv_ns[row] = recv_ns
+        return row
+
+    def live(self, now_ns: int, max_age_ns) -> np.ndarray:
+        if max_age_ns is None:
+            return np.ones(len(self.exchanges), dtype=bool)
+        return now_ns - self.recv_ns <= max_age_ns
+
+
+class DepthArbitrageEngine:
+    # 每收到一本 BookSnapshot 调用 on_book：只重算与该交易所相关的 2 × (E-1) 个组合，
+    # 取利润最大的一组；利润达到 min_profit 且与上次推送不同才产生事件
+    def __init__(self, fees: dict = None, depth: int = 10, min_profit: float = 0.0,
+                 max_age_ms: int = None, queue_size: int = 1000):
+        self.fees = fees or {}          # exchange → taker 费率（%），未列出的用 "default"
+        self.depth = depth
+        self.min_profit = min_profit
+        self.max_age_ns = None if max_age_ms is None else max_age_ms * 1_000_000
+        self.queue_size = queue_size
+
+        self._symbols = {}
+        self._last_emitted = {}
+        self._subscribers = []
+
+        # 计数器
+        self.books = 0
+        self.events = 0
+        self.dropped_events = 0
+        self.eval_ns = 0
+
+    def fee(self, exchange: str) -> float:
+        return self.fees.get(exchange, self.fees.get("default", 0.0))
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    async def stream(self):
+        # 异步迭代：async for event in engine.stream(): ...
+        queue = self.subscribe()
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(queue)
+
+    def on_book(self, book, recv_ns: int = None):
+        start_ns = time.monotonic_ns()
+        recv_ns = recv_ns or book.recv_ns or start_ns
+        self.books += 1
+
+        symbol = book.raw_symbol or book.symbol
+        ladders = self._symbols.get(symbol)
+        if ladders is None:
+            ladders = self._symbols[symbol] = _SymbolLadders(self.depth)
+        row = ladders.update(book.exchange, book.bids, book.asks, self.fee(book.exchange), recv_ns)
+        if len(ladders.exchanges) < 2:
+            return None
+
+        live = ladders.live(start_ns, self.max_age_ns)
+        L = ladders
+        one = slice(row, row + 1)
+        # 本交易所买入 × 其他交易所卖出
+        q_buy, c_buy, r_buy = walk_ladders(L.ask_px[one], L.ask_cum[one], L.ask_notional[one],
+                                           L.bid_px, L.bid_cum, L.bid_notional)
+        # 其他交易所买入 × 本交易所卖出
+        q_sell, c_sell, r_sell = walk_ladders(L.ask_px, L.ask_cum, L.ask_notional,
+                                              L.bid_px[one], L.bid_cum[one], L.bid_notional[one])
+        profit_buy = np.where(live, r_buy[0] - c_buy[0], -np.inf)
+        profit_sell = np.where(live, r_sell[:, 0] - c_sell[:, 0], -np.inf)
+        profit_buy[row] = profit_sell[row] = -np.inf
+
+        i_buy = int(np.argmax(profit_buy))
+        i_sell = int(np.argmax(profit_sell))
+        if not np.isfinite(max(profit_buy[i_buy], profit_sell[i_sell])):
+            return None     # 其他交易所的深度都已过期
+        if profit_buy[i_buy] >= profit_sell[i_sell]:
+            buy_row, sell_row = row, i_buy
+            q, cost, revenue = q_buy[0, i_buy], c_buy[0, i_buy], r_buy[0, i_buy]
+        else:
+            buy_row, sell_row = i_sell, row
+            q, cost, revenue = q_sell[i_sell, 0], c_sell[i_sell, 0], r_sell[i_sell, 0]
+        self.eval_ns += time.monotonic_ns() - start_ns
+
+        profit = float(revenue - cost)
+        if q <= 0 or profit < self.min_profit:
+            self._last_emitted.pop(symbol, None)
+            return None
+        key = (buy_row, sell_row, float(q), profit)
+        if self._last_emitted.get(symbol) == key:
+            return None
+        self._last_emitted[symbol] = key
+
+        vwap_buy = float(cost / q)
+        vwap_sell = float(revenue / q)
+        event = DepthOpportunity(
+            symbol, L.exchanges[buy_row], L.exchanges[sell_row], float(q), vwap_buy, vwap_sell,
+            (vwap_sell - vwap_buy) / vwap_buy * 100, profit, book.timestamp,
+            (time.monotonic_ns() - recv_ns) / 1000,
+        )
+        self.events += 1
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.dropped_events += 1
+        return event
+
+    def pairs(self, symbol: str) -> list:
+        # 当前所有 (买方, 卖方) 组合的可成交结果，按利润从高到低；用于排查 / 展示
+        L = self._symbols.get(symbol)
+        if L is None or len(L.exchanges) < 2:
+            return []
+        live = L.live(time.monotonic_ns(), self.max_age_ns)
+        q, cost, revenue = walk_ladders(L.ask_px, L.ask_cum, L.ask_notional,
+                                        L.bid_px, L.bid_cum, L.bid_notional)
+        results = []
+        for a, b in zip(*np.nonzero(q > 0)):
+            if a == b or not (live[a] and live[b]):
+                continue
+            vwap_buy, vwap_sell = cost[a, b] / q[a, b], revenue[a, b] / q[a, b]
+            results.append({
+                "buy_exchange": L.exchanges[a],
+                "sell_exchange": L.exchanges[b],
+                "quantity": float(q[a, b]),
+                "vwap_buy": float(vwap_buy),
+                "vwap_sell": float(vwap_sell),
+                "spread_pct": float((vwap_sell - vwap_buy) / vwap_buy * 100),
+                "profit": float(revenue[a, b] - cost[a, b]),
+            })
+        results.sort(key=lambda r: r["profit"], reverse=True)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self._symbols),
+            "books": self.books,
+            "events": self.events,
+            "dropped_events": self.dropped_events,
+            "avg_eval_us": round(self.eval_ns / self.books / 1000, 1) if self.books else 0.0,
+        }
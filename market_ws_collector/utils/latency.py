@@ -0,0 +1,164 @@
+# utils/latency.py
+#
+# 端到端延迟统计：交易所时间戳 → 收到帧 → 解析完成 → 出队 → 交给输出
+# 各阶段的时间戳由 BaseAsyncConnector（recv_ns / recv_ms / parsed_ns）和 main.consume_snapshots（出队 / 输出）打上，
+# 本地各阶段用 time.monotonic_ns()；交易所 → 接收只能用墙钟（含网络延迟和两边的时钟偏差）
+
+import json
+import os
+import time
+
+STAGES = ("exchange", "parse", "queue", "sink", "total")
+STAGE_NAMES = {
+    "exchange": "交易所→接收",
+    "parse": "解析",
+    "queue": "排队",
+    "sink": "输出",
+    "total": "接收→输出",
+}
+
+
+class LatencyHistogram:
+    # HDR 风格的对数-线性分桶（单位微秒）：
+    #   小于 2^bits 的值每微秒一格；之后每翻一倍再线性分 2^(bits-1) 格，相对误差约 1 / 2^(bits-1)
+    # 记录 O(1)，占用固定（默认 bits=6 → 最大 1 小时约 900 格）
+    def __init__(self, bits: int = 6, max_us: int = 3_600_000_000):
+        self.bits = bits
+        self.sub = 1 << bits
+        self.half = self.sub >> 1
+        self.max_us = max_us
+        self.counts = [0] * (self._index(max_us) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        if value < self.sub:
+            return value
+        shift = value.bit_length() - self.bits
+        return self.sub + (shift - 1) * self.half + ((value >> shift) - self.half)
+
+    def _value(self, index: int) -> float:
+        # 桶的中点
+        if index < self.sub:
+            return index
+        shift = (index - self.sub) // self.half + 1
+        low = ((index - self.sub) % self.half + self.half) << shift
+        return low + (1 << shift) / 2
+
+    def record(self, value_us):
+        value = int(value_us)
+        if value < 0:
+            value = 0
+        elif value > self.max_us:
+            value = self.max_us
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        target = max(1, int(round(self.count * pct / 100)))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(max(self._value(i), self.min), self.max)
+        return float(self.max)
+
+    def summary(self) -> dict:
+        # 单位微秒
+        return {
+            "count": self.count,
+            "min": self.min or 0,
+            "mean": round(self.total / self.count, 1) if self.count else 0.0,
+            "p50": round(self.percentile(50), 1),
+            "p90": round(self.percentile(90), 1),
+            "p99": round(self.percentile(99), 1),
+            "p999": round(self.percentile(99.9), 1),
+            "max": self.max,
+        }
+
+
+class LatencyRecorder:
+    # 每个交易所每个阶段一个直方图；report() 返回上一个周期的统计并清零，同时并入累计值
+    def __init__(self):
+        self.window = {}        # exchange → {stage: LatencyHistogram}
+        self.cumulative = {}
+        self.missing = 0        # 没有接收时间戳的行情（例如不经过 receive_loop）
+        self._window_start = time.time()
+
+    def _hists(self, table: dict, exchange: str) -> dict:
+        hists = table.get(exchange)
+        if hists is None:
+            hists = table[exchange] = {stage: LatencyHistogram() for stage in STAGES}
+        return hists
+
+    def record(self, snapshot, dequeue_ns: int, sink_ns: int):
+        recv_ns = snapshot.recv_ns
+        if recv_ns is None:
+            self.missing += 1
+            return
+        hists = self._hists(self.window, snapshot.exchange)
+        if snapshot.recv_ms and snapshot.timestamp:
+            hists["exchange"].record((snapshot.recv_ms - snapshot.timestamp) * 1000)
+        parsed_ns = snapshot.parsed_ns or recv_ns
+        hists["parse"].record((parsed_ns - recv_ns) // 1000)
+        hists["queue"].record((dequeue_ns - parsed_ns) // 1000)
+        hists["sink"].record((sink_ns - dequeue_ns) // 1000)
+        hists["total"].record((sink_ns - recv_ns) // 1000)
+
+    def report(self) -> dict:
+        now = time.time()
+        window = {}
+        for exchange, hists in self.window.items():
+            total = self._hists(self.cumulative, exchange)
+            for stage, hist in hists.items():
+                total[stage].merge(hist)
+            window[exchange] = {stage: hist.summary() for stage, hist in hists.items()}
+        report = {
+            "generated_at": now,
+            "window_sec": round(now - self._window_start, 1),
+            "missing": self.missing,
+            "window": window,
+            "cumulative": {
+                exchange: {stage: hist.summary() for stage, hist in hists.items()}
+                for exchange, hists in self.cumulative.items()
+            },
+        }
+        self.window = {}
+        self._window_start = now
+        return report
+
+
+def format_latency_line(exchange: str, stages: dict) -> str:
+    def ms(us):
+        return f"{us / 1000:.1f}"
+    parts = [f"{STAGE_NAMES[stage]} {ms(stages[stage]['p50'])}/{ms(stages[stage]['p99'])}" for stage in STAGES]
+    return (f"⏱️ [{exchange}] p50/p99(ms) " + " | ".join(parts)
+            + f" | 最长 {ms(stages['total']['max'])}ms ({stages['total']['count']} 条)")
+
+
+def write_latency_report(path: str, report: dict):
+    # 先写临时文件再替换，读取方不会读到半个文件
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
@@ -1,4 +1,13 @@
+import datetime
 import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(message)s"
 
 def get_logger(name="market_ws"):
     logger = logging.getLogger(name)
@@ -9,3 +18,151 @@ def get_logger(name="market_ws"):
         handler.setFormatter(formatter)
         logger.addHandler(handler)
     return logger
+
+
+def clean_log_dir(log_dir: str = "./log"):
+    # 如果 log 目录不存在，创建它
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+        print(f"✅ 创建 log 目录：{log_dir}")
+        return
+
+    for filename in os.listdir(log_dir):
+        filepath = os.path.join(log_dir, filename)
+        if os.path.isfile(filepath):
+            os.remove(filepath)
+            print(f"🗑️ 已删除文件：{filepath}")
+
+
+class _ExchangeRouter(logging.Handler):
+    # 运行在 QueueListener 线程里：按 logger 名（交易所）分发到各自的日志文件，可选回显到 stdout
+    def __init__(self, log_dir: str, echo_stdout: bool, log_dt: str = None):
+        super().__init__()
+        self.log_dir = log_dir
+        self.log_dt = log_dt or datetime.datetime.now().strftime('%m%d_%H%M%S')
+        self.formatter = logging.Formatter(LOG_FORMAT)
+        self.files = {}
+        self.echo = None
+        if echo_stdout:
+            self.echo = logging.StreamHandler(sys.stdout)
+            self.echo.setFormatter(logging.Formatter("%(message)s"))
+
+    def _file_for(self, name):
+        handler = self.files.get(name)
+        if handler is None:
+            path = os.path.join(self.log_dir, f"log_{name}_{self.log_dt}.txt")
+            handler = self.files[name] = logging.FileHandler(path, encoding='utf-8')
+            handler.setFormatter(self.formatter)
+        return handler
+
+    def emit(self, record):
+        self._file_for(record.name).handle(record)
+        if self.echo:
+            self.echo.handle(record)
+
+    def close(self):
+        for handler in self.files.values():
+            handler.close()
+        self.files.clear()
+        super().close()
+
+
+_IMMUTABLE_ARGS = (str, int, float, bool, bytes, type(None))
+
+
+class _RawQueueHandler(logging.handlers.QueueHandler):
+    # 默认 prepare 会在调用方（事件循环）里 format 整条日志；这里原样入队，格式化交给 QueueListener 线程。
+    # 只有参数是可变对象、出队前可能被改掉时，才先把 args 合并进 msg
+    def prepare(self, record):
+        args = record.args
+        if args:
+            values = args.values() if isinstance(args, dict) else args
+            if not all(isinstance(value, _IMMUTABLE_ARGS) for value in values):
+                record.msg = record.getMessage()
+                record.args = None
+        return record
+
+
+class LogPipeline:
+    # 连接器只把 LogRecord 放进队列（QueueHandler），格式化和写文件都在后台线程完成
+    def __init__(self, log_dir: str = "./log", echo_stdout: bool = True, levels: dict = None, log_dt: str = None):
+        os.makedirs(log_dir, exist_ok=True)
+        self.log_dir = log_dir
+        self.echo_stdout = echo_stdout
+        self.levels = dict(levels or {})
+        self.queue = queue.SimpleQueue()
+        self.router = _ExchangeRouter(log_dir, echo_stdout, log_dt)
+        self.listener = logging.handlers.QueueListener(self.queue, self.router)
+        self.listener.start()
+
+    def level_for(self, name: str) -> int:
+        level = self.levels.get(name, self.levels.get("default", "INFO"))
+        return logging.getLevelName(level) if isinstance(level, str) else level
+
+    def get_logger(self, name: str) -> logging.Logger:
+        logger = logging.getLogger(name)
+        logger.setLevel(self.level_for(name))
+        logger.propagate = False
+        # 同名 logger 重复创建（重连 / 多连接）时不重复挂 handler
+        for handler in list(logger.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                if handler.queue is self.queue:
+                    return logger
+                logger.removeHandler(handler)
+        logger.addHandler(_RawQueueHandler(self.queue))
+        return logger
+
+    def stop(self):
+        self.listener.stop()   # 先把队列里剩余的日志写完
+        self.router.close()
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def setup_log_pipeline(log_dir: str = "./log", echo_stdout: bool = True, levels: dict = None,
+                       clean: bool = False) -> LogPipeline:
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.stop()
+        if clean:
+            clean_log_dir(log_dir)
+        _pipeline = LogPipeline(log_dir, echo_stdout, levels)
+        return _pipeline
+
+
+def get_exchange_logger(name: str) -> logging.Logger:
+    # 未显式初始化时使用默认配置
+    if _pipeline is None:
+        setup_log_pipeline()
+    return _pipeline.get_logger(name)
+
+
+def shutdown_log_pipeline():
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.stop()
+            _pipeline = None
+
+
+class LogThrottle:
+    # 高频日志（心跳、未处理消息）按 key 限流：每个周期最多输出一条，其余只计数
+    def __init__(self, interval_sec: float = 60.0):
+        self.interval = interval_sec
+        self.counts = {}        # key → 累计次数
+        self._last = {}         # key → 上次输出时间
+        self._suppressed = {}   # key → 上次输出后被省略的条数
+
+    def allow(self, key):
+        # 返回 None 表示本条不输出；否则返回自上次输出以来省略的条数
+        self.counts[key] = self.counts.get(key, 0) + 1
+        now = time.monotonic()
+        last = self._last.get(key)
+        if last is not None and now - last < self.interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return None
+        self._last[key] = now
+        return self._suppressed.pop(key, 0)
@@ -0,0 +1,229 @@
+# utils/parquet_sink.py
+
+import asyncio
+import os
+import threading
+import time
+from collections import defaultdict
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow 为可选依赖，只有启用 Parquet 输出时才需要
+    pa = None
+    pq = None
+
+DAY_MS = 86_400_000
+
+# exchange / date 体现在分区目录里（hive 风格），文件内不重复存储
+COLUMNS = ["ts", "recv_ts", "symbol", "raw_symbol", "bid", "ask", "bid_vol", "ask_vol"]
+
+
+def snapshot_schema():
+    return pa.schema([
+        ("ts", pa.int64()),          # 交易所毫秒时间戳
+        ("recv_ts", pa.int64()),     # 本地接收毫秒时间戳
+        ("symbol", pa.dictionary(pa.int32(), pa.string())),
+        ("raw_symbol", pa.dictionary(pa.int32(), pa.string())),
+        ("bid", pa.float64()),
+        ("ask", pa.float64()),
+        ("bid_vol", pa.float64()),
+        ("ask_vol", pa.float64()),
+    ])
+
+
+class _PartitionFile:
+    def __init__(self, path, schema, compression):
+        self.path = path
+        self.writer = pq.ParquetWriter(path, schema, compression=compression)
+        self.opened_at = time.time()
+        self.bytes = 0      # 已写入的 Arrow（未压缩）字节数，用于滚动判断
+        self.rows = 0
+
+    def close(self):
+        self.writer.close()
+
+
+class ParquetSink:
+    def __init__(self, output_root: str, batch_rows: int = 20_000, roll_bytes: int = 256 * 1024 * 1024,
+                 roll_seconds: int = 3600, compression: str = "zstd", max_retry_rows: int = None):
+        if pa is None:
+            raise ImportError("ParquetSink 需要 pyarrow：pip install pyarrow")
+        self.root = os.path.join(output_root, "parquet")
+        self.batch_rows = batch_rows
+        self.roll_bytes = roll_bytes
+        self.roll_seconds = roll_seconds
+        self.compression = compression
+        self.max_retry_rows = max_retry_rows or batch_rows * 10   # 写失败后最多保留多少行等待重试
+        self.schema = snapshot_schema()
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()   # 关闭时可能与后台 flush 并发
+        self._buffers = {}          # (day, exchange) → {column: [...]}
+        self._pending = 0
+        self._files = {}            # (day, exchange) → _PartitionFile
+        self._file_seq = defaultdict(int)
+        self._day_names = {}
+        self.ready = asyncio.Event()
+
+        # 指标
+        self.rows = 0
+        self.row_groups = 0
+        self.files = 0
+        self.failed_flushes = 0
+        self.dropped_rows = 0
+
+    def _day_name(self, day: int) -> str:
+        name = self._day_names.get(day)
+        if name is None:
+            name = self._day_names[day] = time.strftime("%Y-%m-%d", time.gmtime(day * DAY_MS / 1000))
+        return name
+
+    def append(self, snapshot, recv_ms: int):
+        key = (recv_ms // DAY_MS, snapshot.exchange)
+        with self._lock:
+            cols = self._buffers.get(key)
+            if cols is None:
+                cols = self._buffers[key] = {name: [] for name in COLUMNS}
+            cols["ts"].append(snapshot.timestamp)
+            cols["recv_ts"].append(recv_ms)
+            cols["symbol"].append(snapshot.symbol)
+            cols["raw_symbol"].append(snapshot.raw_symbol)
+            cols["bid"].append(snapshot.bid1)
+            cols["ask"].append(snapshot.ask1)
+            cols["bid_vol"].append(snapshot.bid_vol1)
+            cols["ask_vol"].append(snapshot.ask_vol1)
+            self._pending += 1
+        if self._pending >= self.batch_rows:
+            self.ready.set()
+
+    def _to_batch(self, cols: dict):
+        arrays = []
+        for field in self.schema:
+            values = cols[field.name]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def _open(self, key):
+        day, exchange = key
+        directory = os.path.join(self.root, f"date={self._day_name(day)}", f"exchange={exchange}")
+        os.makedirs(directory, exist_ok=True)
+        self._file_seq[key] += 1
+        name = f"part-{time.strftime('%H%M%S')}-{self._file_seq[key]:04d}.parquet"
+        self.files += 1
+        return _PartitionFile(os.path.join(directory, name), self.schema, self.compression)
+
+    def flush(self):
+        # 可在线程中调用：锁内只交换缓冲区，编码和写盘在锁外
+        with self._flush_lock:
+            with self._lock:
+                buffers, self._buffers = self._buffers, {}
+                self._pending = 0
+            try:
+                self._write(buffers)
+            except Exception:
+                self._restore(buffers)   # _write 只留下没写成功的分区
+                raise
+
+    def _restore(self, buffers: dict):
+        # 写失败的行放回缓冲区，排在新数据之前，下次 flush 重试；积压超过上限则丢弃并计数
+        self.failed_flushes += 1
+        rows = sum(len(cols["ts"]) for cols in buffers.values())
+        if rows > self.max_retry_rows:
+            self.dropped_rows += rows
+            print(f"⚠️ Parquet 写入持续失败，丢弃 {rows} 行（累计 {self.dropped_rows} 行）")
+            return
+        with self._lock:
+            for key, cols in buffers.items():
+                newer = self._buffers.get(key)
+                if newer is not None:
+                    for name in COLUMNS:
+                        cols[name].extend(newer[name])
+                self._buffers[key] = cols
+            self._pending += rows
+
+    def _write(self, buffers: dict):
+        now = time.time()
+        for key in list(buffers):
+            batch = self._to_batch(buffers[key])
+            part = self._files.get(key)
+            if part is None:
+                part = self._files[key] = self._open(key)
+            try:
+                part.writer.write_batch(batch)   # 每次 flush 写成一个 row group
+            except Exception:
+                # 写了一半的文件不再续写，重试时新开一个
+                del self._files[key]
+                try:
+                    part.close()
+                except Exception:
+                    pass
+                raise
+            del buffers[key]
+            part.bytes += batch.nbytes
+            part.rows += batch.num_rows
+            self.rows += batch.num_rows
+            self.row_groups += 1
+
+        # 按大小、时间滚动文件；跨天的旧分区直接关闭
+        today = int(now * 1000) // DAY_MS
+        for key, part in list(self._files.items()):
+            if part.bytes >= self.roll_bytes or now - part.opened_at >= self.roll_seconds or key[0] < today:
+                del self._files[key]
+                part.close()
+
+    def close(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"❌ Parquet 关闭时写入失败，未写入 {self._pending} 行: {e}")
+        with self._flush_lock:
+            for part in self._files.values():
+                part.close()
+            self._files.clear()
+
+    def stats(self) -> dict:
+        return {
+            "rows": self.rows,
+            "row_groups": self.row_groups,
+            "files": self.files,
+            "pending": self._pending,
+            "failed_flushes": self.failed_flushes,
+            "dropped_rows": self.dropped_rows,
+        }
+
+
+async def parquet_worker(sink: ParquetSink, flush_interval: int = 10):
+    # 攒够 batch_rows 或到达时间间隔就在线程里 flush，不阻塞事件循环
+    while True:
+        try:
+            await asyncio.wait_for(sink.ready.wait(), timeout=flush_interval)
+        except asyncio.TimeoutError:
+            pass
+        sink.ready.clear()
+        try:
+            await asyncio.to_thread(sink.flush)
+        except Exception as e:
+            # 写盘失败（磁盘满、异常值等）只影响 Parquet 输出，不能停掉整个采集器
+            print(f"❌ Parquet 写入失败（第 {sink.failed_flushes} 次），{sink.stats()['pending']} 行待重试: {e}")
+
+
+def load_parquet(output_root: str, date: str = None, exchanges: list = None, columns: list = None):
+    # 给 notebook 用：按日期 / 交易所读取数据为 pandas DataFrame
+    if pq is None:
+        raise ImportError("load_parquet 需要 pyarrow：pip install pyarrow")
+    filters = []
+    if date:
+        filters.append(("date", "=", date))
+    if exchanges:
+        filters.append(("exchange", "in", list(exchanges)))
+    table = pq.read_table(
+        os.path.join(output_root, "parquet"),
+        columns=columns,
+        filters=filters or None,
+        partitioning="hive",
+    )
+    return table.to_pandas()
@@ -2,7 +2,9 @@ import os
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 from itertools import cycle
-from collections import defaultdict
+
+from utils.spread_engine import compute_spread
+from utils.tick_store import as_window, ms_to_datetime64
 
 # 🎨 自动分配交易所颜色
 _color_palette = cycle([
@@ -17,6 +19,16 @@ def get_color_for_exchange(exchange: str):
         _exchange_color_map[exchange] = next(_color_palette)
     return _exchange_color_map[exchange]
 
+def collect_windows(symbol_data: dict, cutoff_ms: int, columns=('times', 'bid', 'ask')) -> dict:
+    # 从 tick 缓存切出绘图窗口，只保留有数据的交易所和需要的列
+    windows = {}
+    for exchange, data in symbol_data.items():
+        window = as_window(data, cutoff_ms)
+        if not len(window['times']):
+            continue
+        windows[exchange] = {name: window[name] for name in columns}
+    return windows
+
 def plot_arbitrage_snapshot(symbol: str, symbol_data: dict, output_dir: str = "image", window_minutes: int = 1):
     if not symbol_data:
         print(f"⚠️ 无数据可绘制: {symbol}")
@@ -24,74 +36,45 @@ def plot_arbitrage_snapshot(symbol: str, symbol_data: dict, output_dir: str = "i
 
     now = datetime.now()
     cutoff = now - timedelta(minutes=window_minutes)
+    windows = collect_windows(symbol_data, int(cutoff.timestamp() * 1000))
+    return render_arbitrage_chart(symbol, windows, output_dir, window_minutes, now)
+
+def render_arbitrage_chart(symbol: str, windows: dict, output_dir: str = "image", window_minutes: int = 1,
+                           now: datetime = None, colors: dict = None):
+    # windows: {exchange: {'times', 'bid', 'ask'}}，已按时间窗口切好；可在子进程中调用
+    # colors 由主进程传入，保证各子进程里同一交易所颜色一致
+    now = now or datetime.now()
+    colors = colors or {}
     os.makedirs(output_dir, exist_ok=True)
     fig, axs = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
-    spread_percent_list = []
-    spread_time_list = []
-    spread_meta = []
-
-    # 📈 子图1：Bid/Ask 曲线（按秒过滤）
-    second_groups = defaultdict(lambda: defaultdict(lambda: {'bid': None, 'ask': None}))
-    for exchange, data in symbol_data.items():
-        times = data['times']
-        bids = data['bid']
-        asks = data['ask']
-        filtered = [(t, b, a) for t, b, a in zip(times, bids, asks) if t >= cutoff]
-        if not filtered:
-            continue
-        filtered_times, filtered_bids, filtered_asks = zip(*filtered)
 
-        color = get_color_for_exchange(exchange)
-        axs[0].plot(filtered_times, filtered_asks, label=f"{exchange} Ask", color=color, alpha=0.7, linestyle='-')
-        axs[0].plot(filtered_times, filtered_bids, label=f"{exchange} Bid", color=color, alpha=1.0, linestyle='--')
-
-        # 填充秒级聚合容器
-        for t, b, a in filtered:
-            t_sec = t.replace(microsecond=0)
-            second_groups[t_sec][exchange] = {'bid': b, 'ask': a}
+    # 📈 子图1：Bid/Ask 曲线
+    for exchange, window in windows.items():
+        filtered_times = ms_to_datetime64(window['times'])
+        color = colors.get(exchange) or get_color_for_exchange(exchange)
+        axs[0].plot(filtered_times, window['ask'], label=f"{exchange} Ask", color=color, alpha=0.7, linestyle='-')
+        axs[0].plot(filtered_times, window['bid'], label=f"{exchange} Bid", color=color, alpha=1.0, linestyle='--')
 
     axs[0].legend()
     axs[0].set_ylabel("Price")
     axs[0].set_title(f"{symbol} Exchange Depth (Last {window_minutes} min)")
 
-    # 📊 子图2：按秒级时间聚合套利分析
-    for t_sec in sorted(second_groups.keys()):
-        bid_list, ask_list, bid_ex, ask_ex = [], [], [], []
-
-        for exchange, values in second_groups[t_sec].items():
-            bid = values['bid']
-            ask = values['ask']
-            bid_list.append(bid)
-            ask_list.append(ask)
-            bid_ex.append(exchange)
-            ask_ex.append(exchange)
-
-        if not bid_list or not ask_list:
-            continue
-        max_bid = max(bid_list)
-        min_ask = min(ask_list)
-        if min_ask == 0:
-            continue
-        spread = (max_bid - min_ask) / min_ask * 100
-        sell_ex = bid_ex[bid_list.index(max_bid)]
-        buy_ex = ask_ex[ask_list.index(min_ask)]
-
-        spread_percent_list.append(spread)
-        spread_time_list.append(t_sec)
-        spread_meta.append((sell_ex, buy_ex))
+    # 📊 子图2：按秒级网格对齐后的套利分析（向量化计算）
+    result = compute_spread(windows, grid_ms=1000)
+    spread_times = ms_to_datetime64(result.times)
 
-    axs[1].plot(spread_time_list, spread_percent_list, color="black", label="Arbitrage %")
+    axs[1].plot(spread_times, result.spread_pct, color="black", label="Arbitrage %")
     axs[1].set_ylabel("Spread (%)")
     axs[1].set_title("Taker-Taker Arbitrage Opportunity (Per Second)")
     axs[1].legend()
 
-    if spread_percent_list:
-        max_idx = spread_percent_list.index(max(spread_percent_list))
-        axs[1].scatter(spread_time_list[max_idx], spread_percent_list[max_idx], color="red", zorder=5)
-        sell, buy = spread_meta[max_idx]
-        txt = f"{spread_percent_list[max_idx]:.2f}% Buy {buy} → Sell {sell}"
+    best = result.best()
+    if best:
+        max_idx, spread, buy, sell = best
+        axs[1].scatter(spread_times[max_idx], spread, color="red", zorder=5)
+        txt = f"{spread:.2f}% Buy {buy} → Sell {sell}"
         axs[1].annotate(txt,
-                        (spread_time_list[max_idx], spread_percent_list[max_idx]),
+                        (spread_times[max_idx], spread),
                         xytext=(10, -15), textcoords='offset points',
                         arrowprops=dict(arrowstyle="->", color="red"), fontsize=10)
 
@@ -103,5 +86,6 @@ def plot_arbitrage_snapshot(symbol: str, symbol_data: dict, output_dir: str = "i
     chart_name = f"{symbol}_arbitrage_{window_minutes}min_{timestamp_str}.png"
     chart_path = os.path.join(output_dir, chart_name)
     plt.savefig(chart_path)
-    plt.close()
+    plt.close(fig)
     print(f"✅ 图像已保存到: {chart_path}")
+    return chart_path
@@ -3,6 +3,8 @@ import datetime
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
 
+from utils.tick_store import as_window, ms_to_datetime64
+
 def is_price_valid(prices):
     return all(p > 0 for p in prices)
 
@@ -17,17 +19,17 @@ def plot_symbol_interactive(symbol, exchanges, cutoff, output_folder="imgs"):
     )
 
     plotted = False
+    cutoff_ms = int(cutoff.timestamp() * 1000)
 
     # 绘制价格数据
     for idx, (exchange, data) in enumerate(exchanges.items()):
-        filtered_data = [
-            (t, b, a) for t, b, a in zip(data['times'], data['bid'], data['ask']) if t >= cutoff
-        ]
-        if not filtered_data:
+        window = as_window(data, cutoff_ms)
+        if not len(window['times']):
             print(f"⏭️ Skipping {symbol} ({exchange}): No data within cutoff.")
             continue
 
-        times, bids, asks = zip(*filtered_data)
+        times = ms_to_datetime64(window['times'])
+        bids, asks = window['bid'], window['ask']
         if not is_price_valid(bids) or not is_price_valid(asks):
             continue
 
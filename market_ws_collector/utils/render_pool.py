@@ -0,0 +1,151 @@
+# utils/render_pool.py
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from utils.plot_arbitrage import collect_windows, get_color_for_exchange
+
+
+def _init_worker():
+    # 子进程只做离屏渲染
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _warmup():
+    from utils import plot_arbitrage  # noqa: F401  预先导入 matplotlib，避免首轮渲染变慢
+    return True
+
+
+def _render_job(symbol, windows, output_dir, window_minutes, now_ts, colors):
+    from utils.plot_arbitrage import render_arbitrage_chart
+
+    start = time.perf_counter()
+    path = render_arbitrage_chart(symbol, windows, output_dir, window_minutes,
+                                  datetime.fromtimestamp(now_ts), colors)
+    return symbol, path, time.perf_counter() - start
+
+
+class RenderPool:
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._executor = self._create_executor()
+        self._busy = False
+        self._task = None
+
+        # 指标
+        self.cycles = 0
+        self.skipped = 0
+        self.failed = 0
+        self.restarts = 0
+        self.last_cycle_sec = 0.0
+        self.last_max_render_sec = 0.0
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # 用 fork：spawn 会重新执行 main.py 顶层代码（清空 snapshots 目录）
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+        )
+
+    def _restart(self):
+        # 子进程被杀（如 OOM）后整个进程池不可用：丢弃旧池重建，子进程在下次提交时按需 fork。
+        # 此时日志 / 写盘线程已在运行，子进程只做渲染、不碰这些锁
+        self.restarts += 1
+        print(f"⚠️ 绘图进程池已损坏，重建进程池（累计 {self.restarts} 次）")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor()
+
+    @property
+    def busy(self) -> bool:
+        return self._busy
+
+    def start(self):
+        # 一次性把子进程 fork 好；须在日志 / 写盘等线程启动前调用，子进程不继承被占用的锁
+        futures = [self._executor.submit(_warmup) for _ in range(self.max_workers)]
+        for f in futures:
+            f.result()
+
+    def build_jobs(self, tick_store, symbols, window_minutes: int = 1):
+        # 主进程只做窗口切片，把紧凑的 numpy 列数据交给子进程
+        now = datetime.now()
+        cutoff_ms = int((now - timedelta(minutes=window_minutes)).timestamp() * 1000)
+        jobs = []
+        for symbol in symbols:
+            windows = collect_windows(tick_store.symbol_data(symbol), cutoff_ms)
+            if not windows:
+                continue
+            colors = {exchange: get_color_for_exchange(exchange) for exchange in windows}
+            jobs.append((symbol, windows, window_minutes, now.timestamp(), colors))
+        return jobs
+
+    def skip_cycle(self):
+        self.skipped += 1
+        print(f"⏭️ 上一轮绘图未完成，跳过本轮（累计跳过 {self.skipped} 次）")
+
+    def submit_cycle(self, jobs, output_dir: str):
+        # 背压：上一轮还没画完就跳过本轮，不堆积
+        if self._busy:
+            self.skip_cycle()
+            return None
+        self._busy = True
+        self._task = asyncio.create_task(self._run_cycle(jobs, output_dir))
+        return self._task
+
+    async def _render_all(self, jobs, output_dir: str):
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(self._executor, _render_job, symbol, windows, output_dir,
+                                 window_minutes, now_ts, colors)
+            for symbol, windows, window_minutes, now_ts, colors in jobs
+        ]
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    async def _run_cycle(self, jobs, output_dir: str):
+        start = time.perf_counter()
+        try:
+            try:
+                results = await self._render_all(jobs, output_dir)
+            except BrokenProcessPool:
+                # 提交时就发现进程池已坏：重建后重画本轮
+                self._restart()
+                results = await self._render_all(jobs, output_dir)
+        finally:
+            self._busy = False
+
+        # 本轮渲染中途有子进程崩溃：这几张记为失败，下一轮用新进程池
+        if any(isinstance(result, BrokenProcessPool) for result in results):
+            self._restart()
+
+        render_times = []
+        for result in results:
+            if isinstance(result, Exception):
+                self.failed += 1
+                print(f"❌ 绘图失败: {result}")
+                continue
+            render_times.append(result[2])
+
+        self.cycles += 1
+        self.last_cycle_sec = time.perf_counter() - start
+        self.last_max_render_sec = max(render_times, default=0.0)
+        print(f"🖼️ 绘图完成 {len(render_times)}/{len(jobs)} 张，总耗时 {self.last_cycle_sec:.2f}s，"
+              f"单张最长 {self.last_max_render_sec * 1000:.0f}ms")
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "cycles": self.cycles,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "last_cycle_sec": round(self.last_cycle_sec, 3),
+            "last_max_render_sec": round(self.last_max_render_sec, 3),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,179 @@
+# utils/replay.py
+#
+# 录制帧回放：把 connectors/capture.py 录下的原始帧按顺序喂给对应交易所的 Connector，
+# 走和线上完全相同的 解压 → 解码 → handle_message → emit 路径，不需要连接交易所。
+#   speed=1   按录制时的节奏回放（帧间隔取自接收时间）
+#   speed=N   N 倍速
+#   speed=0   不等待，尽快回放（解析吞吐基准）
+# 输出的行情做摘要（digest），同一录制文件在解析逻辑不变时摘要不变，可用于回归比对
+#
+# 用法（在 market_ws_collector 目录下）：
+#   python -m utils.replay capture/bitget.cap [--speed 0] [--repeat 3]
+
+import argparse
+import asyncio
+import hashlib
+import importlib
+import time
+
+from connectors.capture import SessionStart, load_capture
+from models.base import MarketSnapshotBatch
+
+
+class ReplaySocket:
+    # 代替 websocket 连接：连接器回复的 pong / 重新订阅等消息只记录不发送
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def close(self):
+        self.closed = True
+
+
+class _DigestQueue:
+    # 代替行情队列：只计数并累积摘要，不保存行情
+    def __init__(self):
+        self.snapshots = 0
+        self._hash = hashlib.sha1()
+
+    async def put(self, item):
+        for snapshot in (item if isinstance(item, MarketSnapshotBatch) else (item,)):
+            self.snapshots += 1
+            # 部分交易所用本地时间作时间戳，摘要里不含时间戳
+            self._hash.update(
+                f"{snapshot.exchange}|{snapshot.symbol}|{snapshot.raw_symbol}|{snapshot.bid1}|{snapshot.ask1}|"
+                f"{snapshot.bid_vol1}|{snapshot.ask_vol1}\n".encode()
+            )
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+class _BookCounter:
+    def __init__(self):
+        self.books = 0
+
+    async def put(self, book):
+        self.books += 1
+
+
+class ReplayResult:
+    def __init__(self, exchange, frames, snapshots, books, seconds, errors, sent, digest):
+        self.exchange = exchange
+        self.frames = frames
+        self.snapshots = snapshots      # 输出的一档行情条数（批量帧按条计）
+        self.books = books              # 输出的 BookSnapshot 数（深度频道）
+        self.seconds = seconds
+        self.errors = errors            # 解压 / 解析失败的帧数
+        self.sent = sent                # 连接器回复的消息数（pong 等）
+        self.digest = digest
+
+    @property
+    def frames_per_sec(self) -> float:
+        return self.frames / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def us_per_frame(self) -> float:
+        return self.seconds / self.frames * 1e6 if self.frames else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "exchange": self.exchange,
+            "frames": self.frames,
+            "snapshots": self.snapshots,
+            "books": self.books,
+            "seconds": round(self.seconds, 4),
+            "frames_per_sec": round(self.frames_per_sec, 1),
+            "us_per_frame": round(self.us_per_frame, 2),
+            "errors": self.errors,
+            "sent": self.sent,
+            "digest": self.digest,
+        }
+
+
+def build_connector(header: dict, books: bool = True):
+    # 按录制文件头创建连接器，注入回放用的假连接和计数队列
+    module = importlib.import_module(f"connectors.{header['exchange']}")
+    conn = module.Connector(exchange=header["exchange"], symbols=header.get("symbols") or None,
+                            queue=_DigestQueue())
+    conn.label = f"{header.get('label', header['exchange'])}(回放)"
+    conn.ws = ReplaySocket()
+    if books:
+        conn.book_queue = _BookCounter()
+    return conn
+
+
+async def replay_frames(conn, frames: list, speed: float = 0.0, max_gap_sec: float = 5.0) -> float:
+    # frames: [(recv_ns, raw)]；返回耗时（秒）
+    # 录制文件可能跨多次启动追加，时间倒退或间隔超过 max_gap_sec 的按 max_gap_sec 处理
+    # 会话标记（每次连接写一条）处按重连处理：重置解压上下文、清空订单簿
+    max_gap_ns = int(max_gap_sec * 1e9)
+    start = time.perf_counter()
+    if not frames:
+        return 0.0
+    base_ns = frames[0][0]
+    offset_ns = 0
+    prev_ns = base_ns
+    for recv_ns, raw in frames:
+        if speed:
+            gap = recv_ns - prev_ns
+            offset_ns += gap if 0 <= gap <= max_gap_ns else max_gap_ns
+            delay = offset_ns / 1e9 / speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        prev_ns = recv_ns
+        if isinstance(raw, SessionStart):
+            conn.reset_session()
+            continue
+        await conn._process_frame(raw, time.monotonic_ns(), time.time_ns() // 1_000_000)
+    return time.perf_counter() - start
+
+
+async def replay_file(path: str, speed: float = 0.0, limit: int = None, books: bool = True) -> ReplayResult:
+    header, frames = load_capture(path)
+    if limit:
+        frames = frames[:limit]
+    conn = build_connector(header, books)
+    seconds = await replay_frames(conn, frames, speed)
+    counts = conn.log_throttle.counts
+    return ReplayResult(
+        exchange=header["exchange"],
+        frames=conn.frames,
+        snapshots=conn.queue.snapshots,
+        books=conn.book_queue.books if books else 0,
+        seconds=seconds,
+        errors=counts.get("parse_error", 0) + counts.get("decompress_error", 0),
+        sent=len(conn.ws.sent),
+        digest=conn.queue.hexdigest(),
+    )
+
+
+def format_result(result: ReplayResult) -> str:
+    return (f"▶️ [{result.exchange}] {result.frames} 帧 → {result.snapshots} 条行情 / {result.books} 本深度，"
+            f"{result.seconds:.3f}s，{result.frames_per_sec:,.0f} 帧/s（{result.us_per_frame:.1f}µs/帧），"
+            f"失败 {result.errors}，摘要 {result.digest[:12]}")
+
+
+async def _main(args):
+    for path in args.paths:
+        for _ in range(args.repeat):
+            result = await replay_file(path, args.speed, args.limit, not args.no_books)
+            print(format_result(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回放录制的原始帧")
+    parser.add_argument("paths", nargs="+", help="录制文件（.cap）")
+    parser.add_argument("--speed", type=float, default=0.0, help="回放倍速，0 表示尽快")
+    parser.add_argument("--limit", type=int, help="最多回放的帧数")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-books", action="store_true", help="不输出 BookSnapshot")
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
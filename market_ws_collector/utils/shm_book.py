@@ -0,0 +1,246 @@
+# utils/shm_book.py
+#
+# 共享内存最新盘口表：采集进程写，本机其他进程（策略）直接读，不走 socket / 文件
+# 布局：64 字节头 + n_exchanges × n_symbols 行，每行 64 字节（一个 cache line）
+#   行号 = exchange_index * n_symbols + symbol_index
+#   交易所 / symbol 下标由 top100_exchange_symbols.json 决定（与 ExchangeManager.load_connectors 同一份文件）
+# 每行带 seqlock：写入前 seq+1（奇数 = 正在写），写完再 +1；读者两次读到相同的偶数 seq 才算一致
+
+import json
+import os
+import time
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+MAGIC = 0x4B4F4F42504F54    # "TOPBOOK"
+HEADER_SIZE = 64
+
+HEADER_DTYPE = np.dtype([
+    ("magic", np.uint64),
+    ("layout_crc", np.uint64),      # 交易所 / symbol 列表的校验值，读者据此确认下标一致
+    ("n_exchanges", np.uint32),
+    ("n_symbols", np.uint32),
+    ("updates", np.uint64),         # 累计写入次数
+    ("writer_pid", np.uint32),      # 写入进程 pid，用于判断同名共享内存是否为残留
+    ("_pad", np.uint8, 28),
+])
+
+ROW_DTYPE = np.dtype([
+    ("seq", np.uint64),
+    ("bid", np.float64),
+    ("ask", np.float64),
+    ("bid_vol", np.float64),
+    ("ask_vol", np.float64),
+    ("ts", np.int64),               # 交易所毫秒时间戳
+    ("recv_ts", np.int64),          # 本地接收毫秒时间戳
+    ("_pad", np.uint64),
+])
+
+FIELDS = ("bid", "ask", "bid_vol", "ask_vol", "ts", "recv_ts")
+
+
+class BookLayout:
+    def __init__(self, exchanges: list, symbols: list):
+        self.exchanges = list(exchanges)
+        self.symbols = list(symbols)
+        self.exchange_index = {ex: i for i, ex in enumerate(self.exchanges)}
+        self.symbol_index = {sym: i for i, sym in enumerate(self.symbols)}
+        text = "\n".join(self.exchanges) + "|" + "\n".join(self.symbols)
+        self.crc = zlib.crc32(text.encode("utf-8"))
+
+    @classmethod
+    def from_symbols_file(cls, symbols_file: str):
+        with open(symbols_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        symbols = sorted({sym for syms in data.values() for sym in syms})
+        return cls(list(data.keys()), symbols)
+
+    @property
+    def rows(self) -> int:
+        return len(self.exchanges) * len(self.symbols)
+
+    @property
+    def nbytes(self) -> int:
+        return HEADER_SIZE + self.rows * ROW_DTYPE.itemsize
+
+    def row(self, exchange: str, symbol: str):
+        ex = self.exchange_index.get(exchange)
+        sym = self.symbol_index.get(symbol)
+        if ex is None or sym is None:
+            return None
+        return ex * len(self.symbols) + sym
+
+
+def _views(buf, layout: BookLayout):
+    header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=buf)[0:1]
+    rows = np.ndarray((layout.rows,), dtype=ROW_DTYPE, buffer=buf, offset=HEADER_SIZE)
+    # 同一块内存的两种视图：按 8 字节列直接读写，比结构化字段访问快
+    as_u64 = rows.view(np.uint64).reshape(layout.rows, 8)
+    as_f64 = rows.view(np.float64).reshape(layout.rows, 8)
+    as_i64 = rows.view(np.int64).reshape(layout.rows, 8)
+    return header, rows, as_u64, as_f64, as_i64
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _reclaim_stale(name: str):
+    existing = shared_memory.SharedMemory(name=name)
+    try:
+        if existing.size < HEADER_SIZE:
+            raise FileExistsError(f"共享内存 {name} 已存在且不是盘口表，请换一个 SHM_BOOK_NAME")
+        header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=existing.buf)[0]
+        magic, pid = int(header["magic"]), int(header["writer_pid"])
+        del header
+        if magic != MAGIC:
+            raise FileExistsError(f"共享内存 {name} 已存在且不是盘口表，请换一个 SHM_BOOK_NAME")
+        if pid and _pid_alive(pid):
+            raise FileExistsError(f"共享内存盘口表 {name} 正由进程 {pid} 写入，"
+                                  f"请先停止该进程或换一个 SHM_BOOK_NAME")
+    finally:
+        existing.close()
+    print(f"🧹 清理残留的共享内存盘口表 {name}（写入进程 {pid or '未知'} 已退出）")
+    existing.unlink()
+
+
+class ShmBookWriter:
+    def __init__(self, name: str, symbols_file: str):
+        self.name = name
+        self.layout = BookLayout.from_symbols_file(symbols_file)
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=self.layout.nbytes)
+        except FileExistsError:
+            # 只清理上次异常退出残留的盘口表；写者仍在运行或不是盘口表时报错，不动别人的内存
+            _reclaim_stale(name)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=self.layout.nbytes)
+
+        self.header, self.rows, self._seq, self._f64, self._i64 = _views(self.shm.buf, self.layout)
+        self.rows[:] = 0
+        self.header["magic"] = MAGIC
+        self.header["layout_crc"] = self.layout.crc
+        self.header["n_exchanges"] = len(self.layout.exchanges)
+        self.header["n_symbols"] = len(self.layout.symbols)
+        self.header["updates"] = 0
+        self.header["writer_pid"] = os.getpid()
+
+        self._row_cache = {}
+        self.updates = 0
+        self.unknown = 0        # 不在下标表里的 (exchange, symbol)
+
+    def publish(self, exchange: str, symbol: str, bid, ask, bid_vol, ask_vol, ts: int, recv_ts: int):
+        key = (exchange, symbol)
+        row = self._row_cache.get(key, -1)
+        if row == -1:
+            row = self._row_cache[key] = self.layout.row(exchange, symbol)
+        if row is None:
+            self.unknown += 1
+            return False
+
+        seq = self._seq[row]
+        seq[0] += 1                                     # 奇数：写入中
+        self._f64[row, 1:5] = (bid or 0.0, ask or 0.0,
+                               np.nan if bid_vol is None else bid_vol,
+                               np.nan if ask_vol is None else ask_vol)
+        self._i64[row, 5:7] = (ts, recv_ts)
+        seq[0] += 1                                     # 偶数：写入完成
+        self.updates += 1
+        self.header["updates"] = self.updates
+        return True
+
+    def publish_snapshot(self, snapshot, recv_ts: int):
+        return self.publish(snapshot.exchange, snapshot.raw_symbol or snapshot.symbol, snapshot.bid1, snapshot.ask1,
+                            snapshot.bid_vol1, snapshot.ask_vol1, snapshot.timestamp, recv_ts)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "rows": self.layout.rows,
+            "bytes": self.layout.nbytes,
+            "updates": self.updates,
+            "unknown": self.unknown,
+        }
+
+    def close(self):
+        del self.header, self.rows, self._seq, self._f64, self._i64
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ShmBookReader:
+    # 用法：
+    #   reader = ShmBookReader("market_ws_book", "../selector/top100_exchange_symbols.json")
+    #   reader.get("okx", "BTC-USDT")  → {"bid": ..., "ask": ..., ...} 或 None（尚无数据）
+    def __init__(self, name: str, symbols_file: str, timeout_sec: float = 0.1):
+        self.layout = BookLayout.from_symbols_file(symbols_file)
+        self.shm = shared_memory.SharedMemory(name=name)
+        # 读者不拥有这块内存：避免本进程退出时 resource_tracker 把它删掉
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.timeout_sec = timeout_sec
+
+        header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=self.shm.buf)[0]
+        if int(header["magic"]) != MAGIC:
+            raise ValueError(f"共享内存 {name} 不是盘口表")
+        if int(header["layout_crc"]) != self.layout.crc:
+            raise ValueError(f"共享内存 {name} 的交易所 / symbol 列表与 {symbols_file} 不一致")
+        self.header, self.rows, self._seq, _, _ = _views(self.shm.buf, self.layout)
+        self.retries = 0
+
+    def read_row(self, row: int):
+        # 返回 ROW_DTYPE 的一致副本；并发写入时自旋重试
+        seq = self._seq[row]
+        deadline = None
+        spins = 0
+        while True:
+            before = int(seq[0])
+            if not before & 1:
+                value = self.rows[row].copy()
+                if int(seq[0]) == before:
+                    return value
+            self.retries += 1
+            spins += 1
+            # 写者可能在写到一半时被调度出去：自旋一阵后让出 CPU
+            if spins % 64 == 0:
+                os.sched_yield()
+                if deadline is None:
+                    deadline = time.monotonic() + self.timeout_sec
+                elif time.monotonic() > deadline:
+                    raise TimeoutError(f"读取第 {row} 行超时（{self.timeout_sec}s）")
+
+    def get(self, exchange: str, symbol: str):
+        row = self.layout.row(exchange, symbol)
+        if row is None:
+            raise KeyError((exchange, symbol))
+        value = self.read_row(row)
+        if value["seq"] == 0:
+            return None
+        return {field: value[field].item() for field in FIELDS}
+
+    def symbol_view(self, symbol: str) -> dict:
+        # {exchange: {...}}，只包含有数据的交易所
+        result = {}
+        for exchange in self.layout.exchanges:
+            quote = self.get(exchange, symbol)
+            if quote is not None:
+                result[exchange] = quote
+        return result
+
+    def age_ms(self, exchange: str, symbol: str):
+        quote = self.get(exchange, symbol)
+        return None if quote is None else int(time.time() * 1000) - quote["recv_ts"]
+
+    @property
+    def updates(self) -> int:
+        return int(self.header["updates"][0])
+
+    def close(self):
+        del self.header, self.rows, self._seq
+        self.shm.close()
@@ -0,0 +1,105 @@
+# utils/spread_engine.py
+
+import numpy as np
+
+from utils.tick_store import as_window
+
+
+class SpreadResult:
+    def __init__(self, times, max_bid, min_ask, spread_pct, sell_idx, buy_idx, exchanges):
+        self.times = times              # 网格时间（epoch 毫秒，桶起点）
+        self.max_bid = max_bid          # 各时刻全市场最高买一
+        self.min_ask = min_ask          # 各时刻全市场最低卖一
+        self.spread_pct = spread_pct    # (max_bid - min_ask) / min_ask * 100，无效时为 NaN
+        self.sell_idx = sell_idx        # 最高买一所在交易所下标（-1 表示无数据）
+        self.buy_idx = buy_idx          # 最低卖一所在交易所下标
+        self.exchanges = exchanges      # 下标 → 交易所名
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def valid(self) -> np.ndarray:
+        return ~np.isnan(self.spread_pct)
+
+    def sell_exchanges(self) -> list:
+        return [self.exchanges[i] if i >= 0 else None for i in self.sell_idx.tolist()]
+
+    def buy_exchanges(self) -> list:
+        return [self.exchanges[i] if i >= 0 else None for i in self.buy_idx.tolist()]
+
+    def best(self):
+        # 窗口内价差最大的时刻：(index, spread_pct, buy_exchange, sell_exchange)，无数据返回 None
+        if not len(self.times) or not self.valid.any():
+            return None
+        i = int(np.nanargmax(self.spread_pct))
+        return i, float(self.spread_pct[i]), self.exchanges[self.buy_idx[i]], self.exchanges[self.sell_idx[i]]
+
+
+def _make_grid(series: dict, grid_ms: int, start_ms, end_ms) -> np.ndarray:
+    if start_ms is None:
+        start_ms = min(int(s["times"][0]) for s in series.values())
+    if end_ms is None:
+        end_ms = max(int(s["times"][-1]) for s in series.values())
+    first = start_ms // grid_ms * grid_ms
+    last = end_ms // grid_ms * grid_ms
+    return np.arange(first, last + grid_ms, grid_ms, dtype=np.int64)
+
+
+def compute_spread(series: dict, grid_ms: int = 1000, start_ms: int = None, end_ms: int = None,
+                   max_age_ms: int = None) -> SpreadResult:
+    # series: {exchange: {'times', 'bid', 'ask'}}，times 为升序 epoch 毫秒
+    # 每个网格桶取各交易所桶内（或此前）最后一笔报价（as-of join / forward fill），
+    # max_age_ms 限制报价的最大陈旧度，None 表示一直向前填充
+    series = {ex: s for ex, s in series.items() if len(s["times"])}
+    exchanges = list(series.keys())
+    if not exchanges:
+        empty_f = np.empty(0, dtype=np.float64)
+        empty_i = np.empty(0, dtype=np.int64)
+        return SpreadResult(empty_i, empty_f, empty_f, empty_f, empty_i, empty_i, exchanges)
+
+    grid = _make_grid(series, grid_ms, start_ms, end_ms)
+    sample_at = grid + (grid_ms - 1)   # 桶内最后一毫秒
+
+    n_ex, n_t = len(exchanges), len(grid)
+    bids = np.full((n_ex, n_t), -np.inf)
+    asks = np.full((n_ex, n_t), np.inf)
+
+    for row, ex in enumerate(exchanges):
+        times = np.asarray(series[ex]["times"], dtype=np.int64)
+        idx = np.searchsorted(times, sample_at, side="right") - 1
+        ok = idx >= 0
+        if max_age_ms is not None:
+            ok &= (sample_at - times[np.maximum(idx, 0)]) <= max_age_ms
+        safe = np.maximum(idx, 0)
+        b = np.asarray(series[ex]["bid"], dtype=np.float64)[safe]
+        a = np.asarray(series[ex]["ask"], dtype=np.float64)[safe]
+        # 空盘口（价格为 0）视为无报价
+        bids[row] = np.where(ok & (b > 0), b, -np.inf)
+        asks[row] = np.where(ok & (a > 0), a, np.inf)
+
+    sell_idx = np.argmax(bids, axis=0)
+    buy_idx = np.argmin(asks, axis=0)
+    cols = np.arange(n_t)
+    max_bid = bids[sell_idx, cols]
+    min_ask = asks[buy_idx, cols]
+
+    has_quote = np.isfinite(max_bid) & np.isfinite(min_ask)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        spread_pct = np.where(has_quote, (max_bid - min_ask) / min_ask * 100, np.nan)
+
+    max_bid = np.where(np.isfinite(max_bid), max_bid, np.nan)
+    min_ask = np.where(np.isfinite(min_ask), min_ask, np.nan)
+    sell_idx = np.where(np.isnan(max_bid), -1, sell_idx)
+    buy_idx = np.where(np.isnan(min_ask), -1, buy_idx)
+
+    return SpreadResult(grid, max_bid, min_ask, spread_pct, sell_idx, buy_idx, exchanges)
+
+
+def compute_symbol_spread(symbol_data: dict, start_ms: int = None, end_ms: int = None,
+                          grid_ms: int = 1000, max_age_ms: int = None) -> SpreadResult:
+    # symbol_data: {exchange: TickRingBuffer 或列数据}，先切窗口再对齐
+    # 向前多取一段，让第一个桶也能用窗口起点之前的报价填充
+    lookback = None if start_ms is None else start_ms - (max_age_ms if max_age_ms is not None else grid_ms)
+    series = {ex: as_window(data, lookback, end_ms) for ex, data in symbol_data.items()}
+    return compute_spread(series, grid_ms, start_ms, end_ms, max_age_ms)
@@ -0,0 +1,184 @@
+# utils/tick_store.py
+
+import datetime
+from collections import defaultdict
+
+import numpy as np
+
+# 每个 tick 的固定占用：int64 毫秒时间戳 + float64 bid/ask/bid_vol/ask_vol
+TICK_DTYPES = {
+    "times": np.int64,
+    "bid": np.float64,
+    "ask": np.float64,
+    "bid_vol": np.float64,
+    "ask_vol": np.float64,
+}
+BYTES_PER_TICK = sum(np.dtype(t).itemsize for t in TICK_DTYPES.values())
+
+DEFAULT_CAPACITY = 200_000
+
+
+def capacity_for_bytes(max_bytes: int) -> int:
+    # 按内存预算换算 ring buffer 容量（至少保留 1 个 tick）
+    return max(1, int(max_bytes) // BYTES_PER_TICK)
+
+
+def now_ms() -> int:
+    return int(datetime.datetime.now().timestamp() * 1000)
+
+
+def ms_to_datetime64(times_ms: np.ndarray) -> np.ndarray:
+    # epoch 毫秒 → 本地时区的 datetime64[ms]，与原先 datetime.now() 的展示保持一致
+    offset = datetime.datetime.now().astimezone().utcoffset()
+    offset_ms = int(offset.total_seconds() * 1000) if offset else 0
+    return (np.asarray(times_ms, dtype=np.int64) + offset_ms).astype("datetime64[ms]")
+
+
+# 单个 (symbol, exchange) 的定长列式 tick 缓存：
+# 写满后覆盖最旧数据，时间戳单调不减，因此窗口查询可用二分查找
+class TickRingBuffer:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError(f"capacity 必须为正数: {capacity}")
+        self.capacity = int(capacity)
+        self._columns = {
+            name: np.zeros(self.capacity, dtype=dtype)
+            for name, dtype in TICK_DTYPES.items()
+        }
+        self._times = self._columns["times"]
+        self._head = 0      # 下一个写入位置
+        self._size = 0
+        self._last_ms = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col.nbytes for col in self._columns.values())
+
+    @property
+    def last_ms(self):
+        return self._last_ms
+
+    def append(self, ts_ms: int, bid: float, ask: float, bid_vol=None, ask_vol=None):
+        # 本地时钟回拨时钳制到上一条，保证时间轴有序
+        if self._last_ms is not None and ts_ms < self._last_ms:
+            ts_ms = self._last_ms
+
+        i = self._head
+        cols = self._columns
+        cols["times"][i] = ts_ms
+        cols["bid"][i] = bid
+        cols["ask"][i] = ask
+        cols["bid_vol"][i] = np.nan if bid_vol is None else bid_vol
+        cols["ask_vol"][i] = np.nan if ask_vol is None else ask_vol
+
+        self._head = (i + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        self._last_ms = ts_ms
+
+    def _segments(self):
+        # 按逻辑顺序返回物理区间 [(start, end), ...]，最多两段
+        start = (self._head - self._size) % self.capacity
+        if start + self._size <= self.capacity:
+            return [(start, start + self._size)]
+        return [(start, self.capacity), (0, self._head)]
+
+    def _search(self, ts_ms: int, side: str) -> int:
+        # 在两段有序区间上二分，返回逻辑下标
+        offset = 0
+        for start, end in self._segments():
+            seg = self._times[start:end]
+            idx = int(np.searchsorted(seg, ts_ms, side=side))
+            if idx < len(seg):
+                return offset + idx
+            offset += len(seg)
+        return offset
+
+    def _slice(self, lo: int, hi: int) -> dict:
+        result = {}
+        segments = self._segments()
+        for name, col in self._columns.items():
+            parts = []
+            offset = 0
+            for start, end in segments:
+                seg_len = end - start
+                a = max(lo - offset, 0)
+                b = min(hi - offset, seg_len)
+                if a < b:
+                    parts.append(col[start + a:start + b])
+                offset += seg_len
+            if not parts:
+                result[name] = np.empty(0, dtype=col.dtype)
+            elif len(parts) == 1:
+                result[name] = parts[0].copy()
+            else:
+                result[name] = np.concatenate(parts)
+        return result
+
+    def window(self, start_ms: int = None, end_ms: int = None) -> dict:
+        # 返回 [start_ms, end_ms] 内的列数据副本：{'times', 'bid', 'ask', 'bid_vol', 'ask_vol'}
+        lo = 0 if start_ms is None else self._search(start_ms, "left")
+        hi = self._size if end_ms is None else self._search(end_ms, "right")
+        return self._slice(lo, max(lo, hi))
+
+    def last(self, duration_ms: int, end_ms: int = None) -> dict:
+        end_ms = now_ms() if end_ms is None else end_ms
+        return self.window(end_ms - duration_ms, end_ms)
+
+    def to_arrays(self) -> dict:
+        return self._slice(0, self._size)
+
+
+# 按 symbol → exchange 组织的 TickRingBuffer 集合，内存上限 = buffer 数 × capacity × BYTES_PER_TICK
+class TickStore:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, max_bytes_per_series: int = None):
+        if max_bytes_per_series is not None:
+            capacity = capacity_for_bytes(max_bytes_per_series)
+        self.capacity = capacity
+        self._data = defaultdict(dict)
+
+    def __contains__(self, symbol):
+        return symbol in self._data
+
+    def symbols(self):
+        return list(self._data.keys())
+
+    def buffer(self, symbol: str, exchange: str) -> TickRingBuffer:
+        buffers = self._data[symbol]
+        buf = buffers.get(exchange)
+        if buf is None:
+            buf = buffers[exchange] = TickRingBuffer(self.capacity)
+        return buf
+
+    def append(self, symbol, exchange, ts_ms, bid, ask, bid_vol=None, ask_vol=None):
+        self.buffer(symbol, exchange).append(ts_ms, bid, ask, bid_vol, ask_vol)
+
+    def symbol_data(self, symbol: str) -> dict:
+        # {exchange: TickRingBuffer}，可直接传给绘图函数
+        return dict(self._data.get(symbol, {}))
+
+    def window(self, symbol: str, start_ms: int = None, end_ms: int = None) -> dict:
+        # {exchange: {'times', 'bid', 'ask', ...}}，只保留窗口内有数据的交易所
+        result = {}
+        for exchange, buf in self._data.get(symbol, {}).items():
+            data = buf.window(start_ms, end_ms)
+            if len(data["times"]):
+                result[exchange] = data
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buf.nbytes for buffers in self._data.values() for buf in buffers.values())
+
+
+def as_window(data, start_ms: int = None, end_ms: int = None) -> dict:
+    # 统一绘图输入：TickRingBuffer 或已切好的 {'times', 'bid', 'ask', ...} 列数据
+    if isinstance(data, TickRingBuffer):
+        return data.window(start_ms, end_ms)
+    times = np.asarray(data["times"], dtype=np.int64)
+    lo = 0 if start_ms is None else int(np.searchsorted(times, start_ms, side="left"))
+    hi = len(times) if end_ms is None else int(np.searchsorted(times, end_ms, side="right"))
+    return {name: np.asarray(values)[lo:hi] for name, values in data.items()}